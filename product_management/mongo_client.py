@@ -1,9 +1,16 @@
-from pymongo import MongoClient
-from dotenv import load_dotenv
 import os
+import sys
 
-load_dotenv()  # .env dosyasını yükle
+# MongoDB bağlantısı user_management ile paylaşılan modülden alınır:
+# iki uygulama da aynı ayarlarla (havuz boyutu, zaman aşımları) tek istemci yönetimini kullanır.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'user_management'))
 
-client = MongoClient(os.getenv("MONGO_URI"))
-db = client["shop"]  # veya istediğin isim, örneğin "ecommerce"
-products_collection = db["products"]  # koleksiyon: ürünler
+from config import Config  # .env dosyasını da yükler
+from repositories.mongo_connection import MongoConnection
+from repositories.mongo_repository import MongoCacheVersionRepository
+
+mongo = MongoConnection.from_config(Config)
+db = mongo  # istemci ilk sorguda açılır; fork sonrası her süreç kendi istemcisini kurar
+products_collection = mongo["products"]  # koleksiyon: ürünler
+# user_management ile paylaşılan önbellek/ETag sürüm sayaçları
+cache_versions = MongoCacheVersionRepository(mongo)
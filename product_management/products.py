@@ -1,5 +1,6 @@
 from flask import Flask, request, render_template, redirect, url_for
-from mongo_client import products_collection  # bağlantıyı buradan alıyoruz
+from mongo_client import products_collection, cache_versions  # bağlantıyı buradan alıyoruz
+from services.product_services import CATALOG_NAMESPACE
 
 app = Flask(__name__)
 
@@ -12,6 +13,8 @@ def add_product():
         
         product = {"name": name, "price": price, "description": description}
         products_collection.insert_one(product)
+        # user_management'taki katalog önbelleği ve ETag'ler yeni ürünü görsün
+        cache_versions.bump(CATALOG_NAMESPACE)
         return redirect(url_for('list_products'))
     
     return render_template('add_product.html')
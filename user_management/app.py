@@ -1,21 +1,36 @@
-from flask import Flask, request, render_template, redirect, url_for, jsonify, make_response, session,flash
-from flask_mysqldb import MySQL
+from flask import Flask, request, render_template, stream_template, redirect, url_for, jsonify, make_response, session,flash
 from flask_bcrypt import Bcrypt
-from pymongo import MongoClient
-from bson.objectid import ObjectId
 from dotenv import load_dotenv
 from functools import wraps
 from flask_mail import Mail, Message
+from pymongo.errors import PyMongoError
 
 from repositories.mysql_repository import MySQLUserRepository
-from repositories.mongo_repository import MongoProductRepository
+from repositories.mysql_pool import MySQLConnectionPool
+from repositories.cache import LRUCache
+from repositories.mongo_connection import MongoConnection
+from repositories.shared_cache import SharedCache
+from repositories.pagination import decode_cursor
+from repositories.mongo_repository import (MongoProductRepository, MongoCartRepository, MongoOrderRepository,
+                                           MongoSalesRollupRepository, MongoMailOutboxRepository,
+                                           MongoCartDigestRepository, MongoCacheVersionRepository,
+                                           PRODUCT_SORTS)
 from services.auth_service import AuthService
 from services.product_services import ProductService
+from services.checkout_service import CheckoutService
+from services.mail_outbox import MailOutbox
+from services.cart_digest import CartDigestNotifier
+from services.product_import import IMPORT_FORMATS, iter_rows
+from services.product_export import EXPORT_CONTENT_TYPES, export_chunks, parse_fields
 
 import os 
 import jwt
+import math
 import datetime
+import hashlib
+import itertools
 from config import Config
+from migrations.mongo_indexes import ensure_indexes
 
 # .env dosyasını yükle
 load_dotenv()
@@ -24,19 +39,51 @@ app = Flask(__name__, template_folder='templates')
 
 app.config.from_object(Config)
 bcrypt = Bcrypt(app)
-mysql = MySQL(app)
+# MySQL bağlantı havuzu (bağlantılar ilk kullanımda açılır)
+mysql_pool = MySQLConnectionPool.from_config(Config)
 mail = Mail(app)
-# MongoDB bağlantısı
-client = MongoClient(os.getenv('MONGO_URI'))
-db = client['shop']  # veya os.getenv('MONGO_DB_NAME')
-products_collection = db['products']
-cart_collection = db['cart']  # Sepet için yeni koleksiyon
-
-
-user_repository = MySQLUserRepository(mysql)
-product_repository = MongoProductRepository(client)
-auth_service = AuthService(user_repository, bcrypt, mail)
-product_service = ProductService(product_repository)
+# MongoDB bağlantısı: tek paylaşılan istemci, her süreçte ilk kullanımda açılır
+mongo = MongoConnection.from_config(Config)
+if Config.MONGO_ENSURE_INDEXES:
+    ensure_indexes(mongo)
+    # Ana süreçte açılan istemci worker'lara fork ile taşınmasın
+    mongo.close()
+
+
+user_cache = LRUCache(max_size=Config.USER_CACHE_MAX_SIZE, ttl=Config.USER_CACHE_TTL)
+user_repository = MySQLUserRepository(mysql_pool, user_cache)
+# Girdiler makine başına SQLite'ta, sürüm sayaçları (invalidation ve ETag) MongoDB'de paylaşılır
+catalog_cache = SharedCache(Config.CATALOG_CACHE_PATH, ttl=Config.CATALOG_CACHE_TTL,
+                            stale_ttl=Config.CATALOG_CACHE_STALE_TTL,
+                            max_entries=Config.CATALOG_CACHE_MAX_ENTRIES,
+                            versions=MongoCacheVersionRepository(mongo))
+product_repository = MongoProductRepository(mongo)
+cart_repository = MongoCartRepository(mongo)
+order_repository = MongoOrderRepository(mongo)
+rollup_repository = MongoSalesRollupRepository(mongo)
+# E-postalar istek içinde gönderilmez: kalıcı kuyruğa yazılır, arka plan worker'ları SMTP ile iletir
+mail_outbox = MailOutbox(MongoMailOutboxRepository(mongo), mail, app,
+                         workers=Config.MAIL_OUTBOX_WORKERS,
+                         batch_size=Config.MAIL_OUTBOX_BATCH_SIZE,
+                         max_attempts=Config.MAIL_OUTBOX_MAX_ATTEMPTS,
+                         backoff_base=Config.MAIL_OUTBOX_BACKOFF_BASE,
+                         backoff_max=Config.MAIL_OUTBOX_BACKOFF_MAX,
+                         smtp_timeout=Config.MAIL_OUTBOX_SMTP_TIMEOUT)
+auth_service = AuthService(user_repository, bcrypt, mail_outbox)
+product_service = ProductService(product_repository, cart_repository, catalog_cache)
+checkout_service = CheckoutService(product_repository, cart_repository, user_repository,
+                                   order_repository, mail_outbox, rollup_repository)
+
+# Sepet hareketleri kullanıcı başına bir pencere boyunca biriktirilip tek özet e-postasıyla gönderilir
+cart_digest = CartDigestNotifier(MongoCartDigestRepository(mongo), mail_outbox, app,
+                                 window_seconds=Config.CART_DIGEST_WINDOW_SECONDS)
+
+# Yeniden başlatmadan önce kuyrukta kalan iletiler (ve penceresi dolan sepet özetleri) de
+# gönderilsin diye worker'lar her süreçte ilk istekte başlatılır (sonraki isteklerde maliyeti yok)
+@app.before_request
+def start_mail_outbox():
+    mail_outbox.start()
+    cart_digest.start()
 
 # Token doğrulama dekoratörü
 def token_required(f):
@@ -144,26 +191,216 @@ def add_product(current_user):
         price = float(request.form['price'])
         description = request.form['description']
         
-        product = {
-            "name": name, 
-            "price": price, 
-            "description": description,
-            "user_id": current_user['id'],
-            "created_by": current_user['username'],
-            "created_at": datetime.datetime.utcnow()
-        }
-        
-        products_collection.insert_one(product)
+        product_service.create_product(name, price, description, current_user)
         return redirect(url_for('list_products'))
     
     return render_template('add_product.html')
 
-# Ürün Listesi
+# Sayfa parametrelerini (limit, after, before) ve listelemede sıralama/fiyat filtresini
+# (sort, min_price, max_price) istekten oku; fiyat sınırları yalnızca verildiyse eklenir
+def get_page_args(filters=True):
+    limit = request.args.get('limit', type=int) or app.config['PRODUCTS_PAGE_SIZE']
+    limit = max(1, min(limit, app.config['PRODUCTS_MAX_PAGE_SIZE']))
+    page_args = {
+        'limit': limit,
+        'after': request.args.get('after') or None,
+        'before': request.args.get('before') or None,
+    }
+    if filters:
+        sort = request.args.get('sort', 'id')
+        page_args['sort'] = sort if sort in PRODUCT_SORTS else 'id'
+        for name in ('min_price', 'max_price'):
+            value = request.args.get(name, type=float)
+            if value is not None and math.isfinite(value):
+                page_args[name] = value
+    return page_args
+
+def check_cursors(page_args):
+    # ValueError: after/before çözülemiyor
+    for name in ('after', 'before'):
+        if page_args[name]:
+            decode_cursor(page_args[name])
+
+# Arama metni (?search=); boşluklar kırpılır, aşırı uzun sorgular kesilir
+def get_search_text():
+    return (request.args.get('search') or '').strip()[:app.config['PRODUCT_SEARCH_MAX_LENGTH']]
+
+# ETag'e eklenen dağıtım tuzu: şablonlar değiştiğinde eski ETag'ler geçersiz olur.
+# Aynı dağıtımdaki tüm worker'larda aynıdır.
+def template_salt():
+    template_dir = os.path.join(app.root_path, app.template_folder)
+    return str(int(max(os.path.getmtime(os.path.join(template_dir, name)) for name in os.listdir(template_dir))))
+
+ETAG_SALT = Config.ETAG_SALT or template_salt()
+
+def make_etag(*parts):
+    return hashlib.sha1("|".join(str(part) for part in (ETAG_SALT,) + parts).encode('utf-8')).hexdigest()
+
+# Koşullu GET: ETag istemcidekiyle eşleşiyorsa render() hiç çağrılmadan 304 döner.
+# version: sürüm sayacından (sürüm, son değişiklik zamanı); None ise doğrulayıcı eklenmez.
+def conditional_response(version, etag_parts, render):
+    if version is None:
+        return make_response(render())
+    number, updated_at = version
+    etag = make_etag(number, *etag_parts)
+    last_modified = (datetime.datetime.fromtimestamp(int(updated_at), datetime.timezone.utc)
+                     if updated_at else None)
+
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains(etag)
+    else:
+        not_modified = (last_modified is not None and request.if_modified_since is not None
+                        and request.if_modified_since >= last_modified)
+
+    response = app.response_class(status=304) if not_modified else make_response(render())
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    # Tarayıcı saklayabilir ama her seferinde doğrulamalı; sayfalar kullanıcıya özel
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def serialize_product(product):
+    data = dict(product)
+    if '_id' in data:
+        data['_id'] = str(data['_id'])
+    if isinstance(data.get('created_at'), datetime.datetime):
+        data['created_at'] = data['created_at'].isoformat()
+    return data
+
+# Ürün Listesi (filtre formu /products/filter'a gönderilir; aynı görünüm)
 @app.route('/products', methods=['GET'])
+@app.route('/products/filter', methods=['GET'], endpoint='filter_products')
 @token_required
 def list_products(current_user):
-    products = list(products_collection.find())
-    return render_template('product_list.html', products=products)
+    page_args = get_page_args()
+    preview_length = app.config['PRODUCT_DESCRIPTION_PREVIEW_LENGTH']
+    # Sayfa linkleri aynı sıralama ve filtrelerle devam eder
+    page_params = {name: value for name, value in page_args.items() if name not in ('after', 'before')}
+
+    def render():
+        try:
+            page = product_service.list_page(preview_length, **page_args)
+        except ValueError:
+            # Geçersiz imleç: ilk sayfaya dön
+            page = product_service.list_page(preview_length, **page_params)
+        return render_template('product_list.html', products=page['items'], page=page,
+                               limit=page_args['limit'], sort=page_args['sort'],
+                               min_price=page_args.get('min_price'), max_price=page_args.get('max_price'),
+                               page_endpoint='list_products', page_params=page_params)
+
+    # Sayfa, katalog sürümü + sorgu + oturumdaki kullanıcı bilgisiyle belirlenir
+    return conditional_response(
+        product_service.catalog_version(),
+        ('products', request.full_path, session.get('username'), session.get('user_type')),
+        render
+    )
+
+# Tüm ürünler tek sayfada: şablon parça parça gönderilir, başlık ve ilk kartlar katalog
+# okunurken tarayıcıya ulaşır; bellekte en fazla bir batch ürün tutulur
+@app.route('/products/all', methods=['GET'])
+@token_required
+def stream_products(current_user):
+    filters = get_page_args()
+    del filters['limit'], filters['after'], filters['before']
+
+    def render():
+        products = product_service.stream_listing(app.config['PRODUCT_DESCRIPTION_PREVIEW_LENGTH'],
+                                                  app.config['PRODUCTS_STREAM_BATCH_SIZE'], **filters)
+        return app.response_class(stream_template(
+            'product_list.html', products=products, page=None, sort=filters['sort'],
+            min_price=filters.get('min_price'), max_price=filters.get('max_price'),
+            limit=app.config['PRODUCTS_PAGE_SIZE']
+        ))
+
+    return conditional_response(
+        product_service.catalog_version(),
+        ('products-all', request.full_path, session.get('username'), session.get('user_type')),
+        render
+    )
+
+# Ürün Arama (ad ve açıklamada tam metin, en alakalı önce)
+@app.route('/products/search', methods=['GET'])
+@token_required
+def search_products(current_user):
+    text = get_search_text()
+    if not text:
+        return redirect(url_for('list_products'))
+    page_args = get_page_args(filters=False)
+    preview_length = app.config['PRODUCT_DESCRIPTION_PREVIEW_LENGTH']
+
+    def render():
+        try:
+            page = product_service.search_page(text, preview_length, **page_args)
+        except ValueError:
+            # Geçersiz imleç: ilk sayfaya dön
+            page = product_service.search_page(text, preview_length, limit=page_args['limit'])
+        return render_template('product_list.html', products=page['items'], page=page,
+                               limit=page_args['limit'], search=text,
+                               page_endpoint='search_products',
+                               page_params={'limit': page_args['limit'], 'search': text})
+
+    return conditional_response(
+        product_service.catalog_version(),
+        ('search', request.full_path, session.get('username'), session.get('user_type')),
+        render
+    )
+
+# API Endpoint - Ürün Listesi (sayfalı)
+@app.route('/api/products', methods=['GET'])
+@token_required
+def api_list_products(current_user):
+    page_args = get_page_args()
+    try:
+        # Geçersiz imleç 304'ten önce yakalanmalı
+        check_cursors(page_args)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
+    def render():
+        page = product_service.list_page(app.config['PRODUCT_DESCRIPTION_PREVIEW_LENGTH'], **page_args)
+        return jsonify({
+            'products': [serialize_product(product) for product in page['items']],
+            'next': page['next'],
+            'prev': page['prev'],
+        })
+
+    return conditional_response(product_service.catalog_version(), ('api', request.full_path), render)
+
+# API Endpoint - Ürün Arama (sayfalı, en alakalı önce)
+@app.route('/api/products/search', methods=['GET'])
+@token_required
+def api_search_products(current_user):
+    text = get_search_text()
+    if not text:
+        return jsonify({'message': 'Arama metni eksik!'}), 400
+    page_args = get_page_args(filters=False)
+    try:
+        check_cursors(page_args)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
+    def render():
+        page = product_service.search_page(text, app.config['PRODUCT_DESCRIPTION_PREVIEW_LENGTH'], **page_args)
+        return jsonify({
+            'products': [serialize_product(product) for product in page['items']],
+            'next': page['next'],
+            'prev': page['prev'],
+        })
+
+    return conditional_response(product_service.catalog_version(), ('api', request.full_path), render)
+
+# API Endpoint - Ürün Detayı (tam doküman)
+@app.route('/api/products/<product_id>', methods=['GET'])
+@token_required
+def api_get_product(current_user, product_id):
+    def render():
+        product = product_service.get_product_by_id(product_id)
+        if not product:
+            return jsonify({'message': 'Ürün bulunamadı'}), 404
+        return jsonify(serialize_product(product))
+
+    return conditional_response(product_service.catalog_version(), ('api', request.full_path), render)
 
 # API Endpoint - Ürün Ekleme
 @app.route('/api/products', methods=['POST'])
@@ -174,81 +411,94 @@ def api_add_product(current_user):
     if not data or 'name' not in data or 'price' not in data or 'description' not in data:
         return jsonify({'message': 'Ürün detayları eksik!'}), 400
     
-    product = {
-        "name": data['name'], 
-        "price": float(data['price']), 
-        "description": data['description'],
-        "user_id": current_user['id'],
-        "created_by": current_user['username'],
-        "created_at": datetime.datetime.utcnow()
-    }
-    
-    result = products_collection.insert_one(product)
+    product_id = product_service.create_product(
+        data['name'], float(data['price']), data['description'], current_user
+    )
     
     return jsonify({
         'message': 'Ürün başarıyla eklendi',
-        'product_id': str(result.inserted_id)
+        'product_id': str(product_id)
     }), 201
 
-# E-posta gönderme fonksiyonu
-def send_cart_update_email(user_email, action_type, product_name=None):
+# API Endpoint - Toplu Ürün Yükleme (NDJSON ya da CSV, gövde satır satır okunur)
+@app.route('/api/products/bulk', methods=['POST'])
+@token_required
+def api_bulk_add_products(current_user):
+    # tools.import_products gibi yalnızca tedarikçiler; rol token yerine kullanıcı kaydından okunur
+    user = user_repository.find_by_id(current_user['id'])
+    if not user or user.get('user_type') != 'supplier':
+        return jsonify({'message': 'Toplu yükleme yalnızca tedarikçilere açık!'}), 403
+    file_format = request.args.get('format') or IMPORT_FORMATS.get(request.mimetype)
+    if file_format not in ('ndjson', 'csv'):
+        return jsonify({'message': 'Desteklenmeyen biçim! application/x-ndjson ya da text/csv gönderin.'}), 415
+
+    rows = iter_rows(request.stream, file_format, app.config['BULK_IMPORT_MAX_LINE_BYTES'])
+    report = product_service.import_products(rows, current_user,
+                                             batch_size=app.config['BULK_IMPORT_BATCH_SIZE'],
+                                             max_errors=app.config['BULK_IMPORT_MAX_ERRORS'])
+    status = 201 if report['inserted'] else 400
+    return jsonify(dict(report, message=f"{report['inserted']} ürün eklendi, {report['failed']} satır hatalı")), status
+
+# API Endpoint - Katalog Dışa Aktarımı (NDJSON ya da CSV, _id sırasıyla akıtılır).
+# Bağlantı koparsa son alınan _id ile ?after= verilerek kaldığı yerden devam edilir.
+@app.route('/api/products/export', methods=['GET'])
+@token_required
+def api_export_products(current_user):
+    file_format = request.args.get('format', 'ndjson')
+    if file_format not in EXPORT_CONTENT_TYPES:
+        return jsonify({'message': 'Desteklenmeyen biçim! ndjson ya da csv kullanın.'}), 400
+    after_id = request.args.get('after') or None
     try:
-        subject = 'Sepet Güncellemesi'
-        
-        if action_type == 'add':
-            body = f'"{product_name}" ürünü sepetinize eklendi. Alışverişinizi tamamlamak için sitemizi ziyaret edebilirsiniz.'
-        elif action_type == 'remove':
-            body = f'"{product_name}" ürünü sepetinizden çıkarıldı.'
-        elif action_type == 'update':
-            body = f'"{product_name}" ürününün sepetinizdeki miktarı güncellendi.'
-        else:
-            body = 'Sepetinizde bir değişiklik yapıldı. Lütfen kontrol edin.'
-        
-        msg = Message(subject, recipients=[user_email])
-        msg.body = body
-        mail.send(msg)
-        print(f"E-posta başarıyla gönderildi: {user_email}")
+        fields = parse_fields(request.args.get('fields'))
+        products = product_service.export_products(fields, app.config['EXPORT_BATCH_SIZE'],
+                                                   supplier=request.args.get('supplier') or None,
+                                                   after_id=after_id)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    try:
+        # İlk batch yanıt başlıklarından önce okunur: sorgu hatası (ör. eksik indeks)
+        # başarılı görünen boş bir dosya yerine hata yanıtı olarak döner
+        first = next(products, None)
+    except PyMongoError as e:
+        products.close()
+        print(f"Dışa aktarım başlatılamadı: {str(e)}")
+        return jsonify({'message': 'Dışa aktarım başlatılamadı, lütfen daha sonra tekrar deneyin.'}), 503
+
+    def generate():
+        try:
+            documents = itertools.chain([first], products) if first is not None else iter(())
+            # after ile devam eden CSV mevcut dosyaya eklenir; başlık tekrar yazılmaz
+            yield from export_chunks(documents, fields, file_format, header=after_id is None)
+        finally:
+            # İstemci bağlantıyı kapatırsa sunucudaki cursor da kapatılır
+            products.close()
+
+    response = app.response_class(generate(), content_type=EXPORT_CONTENT_TYPES[file_format])
+    response.headers['Content-Disposition'] = f'attachment; filename=products.{file_format}'
+    return response
+
+# Sepet hareketini kullanıcının özet e-postasına ekler (e-posta pencere dolunca gönderilir)
+def notify_cart_activity(current_user, action_type, product_name=None):
+    try:
+        user = user_repository.find_by_id(current_user['id'])
+        if not user or 'email' not in user:
+            return False
+        cart_digest.record(current_user['id'], user['email'], action_type, product_name)
         return True
     except Exception as e:
-        print(f"E-posta gönderim hatası: {str(e)}")
+        print(f"Sepet hareketi kaydedilemedi: {str(e)}")
         return False
 
 # Sepete ürün ekleme
 @app.route('/add-to-cart/<product_id>', methods=['POST'])
 @token_required
 def add_to_cart(current_user, product_id):
-    # Ürünü veritabanından bul
-    product = products_collection.find_one({'_id': ObjectId(product_id)})
+    # Ürün sepette varsa miktarı artar, yoksa eklenir (önbellekteki ürün bilgisi + tek upsert)
+    product = product_service.add_to_cart(current_user['id'], product_id)
     
     if product:
-        # Ürün sepette var mı kontrol et
-        cart_item = cart_collection.find_one({
-            'user_id': current_user['id'],
-            'product_id': str(product['_id'])
-        })
-        
-        if cart_item:
-            # Ürün zaten sepette, miktarını artır
-            cart_collection.update_one(
-                {'_id': cart_item['_id']},
-                {'$inc': {'quantity': 1}}
-            )
-        else:
-            # Ürünü sepete ekle
-            cart_item = {
-                'user_id': current_user['id'],
-                'product_id': str(product['_id']),
-                'name': product['name'],
-                'price': product['price'],
-                'quantity': 1,
-                'added_at': datetime.datetime.utcnow()
-            }
-            cart_collection.insert_one(cart_item)
-        
-        # Kullanıcıya e-posta gönder
-        user = user_repository.find_by_id(current_user['id'])
-        if user and 'email' in user:
-            send_cart_update_email(user['email'], 'add', product['name'])
+        # Kullanıcının sepet özetine ekle
+        notify_cart_activity(current_user, 'add', product['name'])
         
         return redirect(url_for('view_cart'))
     
@@ -259,13 +509,10 @@ def delete_product(product_id):
     if "username" not in session or session.get("user_type") != "supplier":
         return "Yetkiniz yok!", 403
 
-    # burada ürünü sadece bu kullanıcı eklediyse silsin (opsiyonel güvenlik)
-    product = products_collection.find_one({"_id": ObjectId(product_id)})
-
-    if product["created_by"] != session["username"]:
+    # Ürün yalnızca bu kullanıcı eklediyse silinir (sahiplik kontrolü silme sorgusunda)
+    if not product_service.delete_product(product_id, session["username"]):
         return "Bu ürünü silme yetkiniz yok!", 403
 
-    products_collection.delete_one({"_id": ObjectId(product_id)})
     return redirect(url_for("list_products"))
 
 
@@ -274,29 +521,25 @@ def delete_product(product_id):
 @app.route('/cart', methods=['GET'])
 @token_required
 def view_cart(current_user):
-    # Kullanıcının sepetindeki ürünleri bul
-    cart_items = list(cart_collection.find({'user_id': current_user['id']}))
-    
-    # Toplam tutarı hesapla
-    total = sum(item['price'] * item['quantity'] for item in cart_items)
-    
-    return render_template('cart.html', cart_items=cart_items, total=total)
+    def render():
+        # Sepet satırları, toplam tutar ve ürün adedi tek aggregation ile
+        summary = product_service.cart_summary(current_user['id'])
+        return render_template('cart.html', cart_items=summary['items'], total=summary['total'],
+                               item_count=summary['item_count'])
+
+    return conditional_response(product_service.cart_version(current_user['id']),
+                                ('cart', current_user['id']), render)
 
 # Sepetten ürün kaldırma
 @app.route('/remove-from-cart/<item_id>', methods=['POST'])
 @token_required
 def remove_from_cart(current_user, item_id):
-    # Ürün adını bul (e-posta için)
-    cart_item = cart_collection.find_one({'_id': ObjectId(item_id), 'user_id': current_user['id']})
+    # Ürünü sepetten kaldır; silinen satırın adı e-posta için kullanılır
+    cart_item = product_service.remove_from_cart(current_user['id'], item_id)
     product_name = cart_item['name'] if cart_item else "Ürün"
     
-    # Ürünü sepetten kaldır
-    cart_collection.delete_one({'_id': ObjectId(item_id), 'user_id': current_user['id']})
-    
-    # Kullanıcıya e-posta gönder
-    user = user_repository.find_by_id(current_user['id'])
-    if user and 'email' in user:
-        send_cart_update_email(user['email'], 'remove', product_name)
+    # Kullanıcının sepet özetine ekle
+    notify_cart_activity(current_user, 'remove', product_name)
     
     return redirect(url_for('view_cart'))
 
@@ -304,78 +547,73 @@ def remove_from_cart(current_user, item_id):
 @app.route('/update-cart/<item_id>', methods=['POST'])
 @token_required
 def update_cart(current_user, item_id):
-    # Ürün adını bul (e-posta için)
-    cart_item = cart_collection.find_one({'_id': ObjectId(item_id), 'user_id': current_user['id']})
-    product_name = cart_item['name'] if cart_item else "Ürün"
-    
     quantity = int(request.form.get('quantity', 1))
     
-    if quantity > 0:
-        cart_collection.update_one(
-            {'_id': ObjectId(item_id), 'user_id': current_user['id']},
-            {'$set': {'quantity': quantity}}
-        )
-        
-        # Kullanıcıya e-posta gönder
-        user = user_repository.find_by_id(current_user['id'])
-        if user and 'email' in user:
-            send_cart_update_email(user['email'], 'update', product_name)
-    else:
-        # Miktar 0 veya negatifse ürünü sepetten kaldır
-        cart_collection.delete_one({'_id': ObjectId(item_id), 'user_id': current_user['id']})
-        
-        # Kullanıcıya e-posta gönder
-        user = user_repository.find_by_id(current_user['id'])
-        if user and 'email' in user:
-            send_cart_update_email(user['email'], 'remove', product_name)
+    # Miktar 0 veya negatifse ürün sepetten kaldırılır; dönen satırın adı e-posta için kullanılır
+    cart_item, removed = product_service.update_cart(current_user['id'], item_id, quantity)
+    product_name = cart_item['name'] if cart_item else "Ürün"
+    
+    # Kullanıcının sepet özetine ekle
+    notify_cart_activity(current_user, 'remove' if removed else 'update', product_name)
     
     return redirect(url_for('view_cart'))
 
 @app.route('/checkout', methods=['POST'])
 @token_required
 def checkout(current_user):
-    # Kullanıcının sepetindeki ürünleri bul
-    cart_items = list(cart_collection.find({'user_id': current_user['id']}))
+    success, messages = checkout_service.checkout(current_user['id'])
+    if success:
+        # Sipariş sepeti boşalttı
+        product_service.touch_cart(current_user['id'])
+    for message, category in messages:
+        flash(message, category)
     
-    if not cart_items:
-        flash('Sepetiniz boş!', 'error')
+    if not success:
         return redirect(url_for('view_cart'))
-
-    # Her bir sepet öğesi için ürün sahibine e-posta gönder
-    for item in cart_items:
-        # Ürünü MongoDB'den bul
-        product = products_collection.find_one({'_id': ObjectId(item['product_id'])})
-        if product and 'user_id' in product:
-            # Ürün sahibinin bilgilerini MySQL'den al
-            owner = user_repository.find_by_id(product['user_id'])
-            if owner and 'email' in owner:
-                try:
-                    msg = Message(
-                        subject='Ürününüz Satıldı!',
-                        recipients=[owner['email']],
-                        body=f"""
-                        Merhaba {owner['username']},
-
-                        '{item['name']}' adlı ürününüz satılmıştır!
-                        Detaylar:
-                        - Ürün: {item['name']}
-                        - Fiyat: {item['price']} TL
-                        - Adet: {item['quantity']}
-                        - Toplam: {item['price'] * item['quantity']} TL
-                        """
-                    )
-                    mail.send(msg)
-                except Exception as e:
-                    flash(f'E-posta gönderim hatası: {str(e)}', 'error')
-                    return redirect(url_for('view_cart'))
-            else:
-                flash(f'Ürün sahibi ({product["created_by"]}) için e-posta adresi bulunamadı.', 'warning')
-
-    # Sepeti temizleme
-    cart_collection.delete_many({'user_id': current_user['id']})
-    flash('Satın alma başarılı! Ürün sahiplerine e-posta gönderildi.', 'success')
     return redirect(url_for('list_products'))
 
+# Sipariş geçmişi (en yeni önce, keyset sayfalama)
+@app.route('/orders', methods=['GET'])
+@app.route('/order-history', methods=['GET'])
+@token_required
+def order_history(current_user):
+    limit = request.args.get('limit', type=int) or app.config['ORDERS_PAGE_SIZE']
+    limit = max(1, min(limit, app.config['PRODUCTS_MAX_PAGE_SIZE']))
+    try:
+        page = order_repository.find_page(current_user['id'], after=request.args.get('after') or None,
+                                          before=request.args.get('before') or None, limit=limit)
+    except ValueError:
+        # Geçersiz imleç: ilk sayfaya dön
+        page = order_repository.find_page(current_user['id'], limit=limit)
+    return render_template('orders.html', orders=page['items'], page=page, limit=limit)
+
+def is_admin(current_user):
+    # Token'daki değişmez kullanıcı id'sine göre; kullanıcı adı talebine güvenilmez
+    return current_user['id'] in app.config['ADMIN_USER_IDS']
+
+# Admin paneli: satış özetleri (sales_rollups) okunur, ham siparişler taranmaz
+@app.route('/admin', methods=['GET'])
+@token_required
+def admin_dashboard(current_user):
+    if not is_admin(current_user):
+        return "Yetkiniz yok!", 403
+
+    return render_template(
+        'admin.html',
+        suppliers=rollup_repository.totals('supplier'),
+        products=rollup_repository.totals('product', limit=app.config['ADMIN_DASHBOARD_TOP_PRODUCTS']),
+        daily=rollup_repository.daily(days=app.config['ADMIN_DASHBOARD_DAYS']),
+    )
+
+# Bu worker sürecinin MongoDB/MySQL bağlantı havuzu, katalog önbelleği, e-posta kuyruğu ve sepet özeti istatistikleri
+@app.route('/admin/pool-stats', methods=['GET'])
+@token_required
+def pool_stats(current_user):
+    if not is_admin(current_user):
+        return jsonify({'message': 'Yetkiniz yok!'}), 403
+    return jsonify({'mongo': mongo.stats(), 'mysql': mysql_pool.stats(), 'catalog_cache': catalog_cache.stats(),
+                    'mail_outbox': mail_outbox.stats(), 'cart_digest': cart_digest.stats()})
+
 # Profil görüntüleme ve düzenleme
 @app.route('/profile', methods=['GET', 'POST'])
 @token_required
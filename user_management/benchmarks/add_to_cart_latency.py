@@ -0,0 +1,90 @@
+# add_to_cart gecikme karşılaştırması: eski 3 round trip akışı ile tek upsert.
+#
+# Canlı bir MongoDB gerektirir (MONGO_URI); geçici bir veritabanı kullanılır ve sonunda silinir.
+# user_management dizininden çalıştırın:
+#   python -m benchmarks.add_to_cart_latency --iterations 500
+import argparse
+import datetime
+import os
+import statistics
+import tempfile
+import time
+
+from bson.objectid import ObjectId
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+load_dotenv()
+
+from migrations.mongo_indexes import MONGO_INDEXES, ensure_indexes
+from repositories.mongo_repository import MongoCartRepository, MongoProductRepository
+from repositories.shared_cache import SharedCache
+from services.product_services import ProductService
+
+
+def legacy_add(db, user_id, product_id):
+    # Eski akış: ürün find_one + sepet find_one + update_one/insert_one
+    product = db.products.find_one({'_id': ObjectId(product_id)})
+    cart_item = db.cart.find_one({'user_id': user_id, 'product_id': str(product['_id'])})
+    if cart_item:
+        db.cart.update_one({'_id': cart_item['_id']}, {'$inc': {'quantity': 1}})
+    else:
+        db.cart.insert_one({
+            'user_id': user_id,
+            'product_id': str(product['_id']),
+            'name': product['name'],
+            'price': product['price'],
+            'quantity': 1,
+            'added_at': datetime.datetime.utcnow(),
+        })
+
+
+def report(label, timings):
+    timings = sorted(timings)
+    p99 = timings[int(len(timings) * 0.99) - 1]
+    print(f"{label:<28} ort {statistics.mean(timings) * 1000:>7.3f} ms  "
+          f"p50 {statistics.median(timings) * 1000:>7.3f} ms  p99 {p99 * 1000:>7.3f} ms")
+
+
+def run(label, call, iterations, products):
+    timings = []
+    for i in range(iterations):
+        product_id = products[i % len(products)]
+        started = time.perf_counter()
+        call(i % 20, product_id)
+        timings.append(time.perf_counter() - started)
+    report(label, timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--products', type=int, default=50)
+    args = parser.parse_args()
+
+    client = MongoClient(os.getenv('MONGO_URI'))
+    db = client[f'bench_cart_{ObjectId()}']
+    cache_dir = tempfile.TemporaryDirectory()
+    try:
+        ensure_indexes(db, {'cart': MONGO_INDEXES['cart']})
+        products = [
+            str(db.products.insert_one({'name': f'Ürün {i}', 'price': float(i)}).inserted_id)
+            for i in range(args.products)
+        ]
+        product_service = ProductService(MongoProductRepository(db), MongoCartRepository(db),
+                                         SharedCache(os.path.join(cache_dir.name, 'catalog.sqlite3'), ttl=60))
+
+        def upsert_add(user_id, product_id):
+            product_service.add_to_cart(user_id, product_id)
+
+        run("önce: find + find + yaz", lambda u, p: legacy_add(db, u, p), args.iterations, products)
+        db.cart.delete_many({})
+        run("sonra: önbellek + upsert", upsert_add, args.iterations, products)
+    finally:
+        client.drop_database(db.name)
+        client.close()
+        cache_dir.cleanup()
+
+
+if __name__ == '__main__':
+    main()
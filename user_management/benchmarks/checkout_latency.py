@@ -0,0 +1,133 @@
+# Checkout gecikmesinin sepet büyüklüğüyle değişimi: eski satır başına döngü ile toplu akış.
+#
+# Canlı bir MongoDB gerektirir (MONGO_URI); geçici bir veritabanı kullanılır ve sonunda silinir.
+# MySQL ve SMTP yerine sabit gecikmeli sahte nesneler kullanılır, böylece yalnızca
+# round trip sayısının etkisi ölçülür.
+# user_management dizininden çalıştırın:
+#   python -m benchmarks.checkout_latency --sizes 1 5 10 50 100 --suppliers 5
+import argparse
+import os
+import time
+from contextlib import contextmanager
+
+from bson.objectid import ObjectId
+from dotenv import load_dotenv
+from flask import Flask
+from flask_mail import Mail, Message
+from pymongo import MongoClient
+
+load_dotenv()
+
+from repositories.mongo_repository import MongoCartRepository, MongoOrderRepository, MongoProductRepository
+from services.checkout_service import CheckoutService
+
+
+class LatencyUserRepository:
+    # Her çağrı bir MySQL round trip'i kadar bekler
+    def __init__(self, latency):
+        self.latency = latency
+
+    def _user(self, user_id):
+        return {'id': user_id, 'username': f'tedarikci{user_id}', 'email': f'tedarikci{user_id}@example.com'}
+
+    def find_by_id(self, user_id):
+        time.sleep(self.latency)
+        return self._user(user_id)
+
+    def find_by_ids(self, user_ids):
+        time.sleep(self.latency)
+        return {user_id: self._user(user_id) for user_id in user_ids}
+
+
+class LatencyMail:
+    # Her mesaj bir SMTP gönderimi kadar, her bağlantı bir SMTP oturumu kadar bekler
+    def __init__(self, send_latency, connect_latency):
+        self.send_latency = send_latency
+        self.connect_latency = connect_latency
+        self.sent = 0
+
+    def send(self, message):
+        time.sleep(self.connect_latency + self.send_latency)
+        self.sent += 1
+
+    @contextmanager
+    def connect(self):
+        time.sleep(self.connect_latency)
+        yield LatencyConnection(self)
+
+
+class LatencyConnection:
+    # Açık SMTP oturumu üzerinden gönderim: yalnızca mesaj gecikmesi
+    def __init__(self, mail):
+        self.mail = mail
+
+    def send(self, message):
+        time.sleep(self.mail.send_latency)
+        self.mail.sent += 1
+
+
+def legacy_checkout(db, user_repository, mail, user_id):
+    # Eski akış: satır başına ürün find_one + find_by_id + mail.send, sonra delete_many
+    cart_items = list(db.cart.find({'user_id': user_id}))
+    for item in cart_items:
+        product = db.products.find_one({'_id': ObjectId(item['product_id'])})
+        owner = user_repository.find_by_id(product['user_id'])
+        mail.send(Message(subject='Ürününüz Satıldı!', recipients=[owner['email']], body=item['name']))
+    db.cart.delete_many({'user_id': user_id})
+
+
+def fill_cart(db, product_ids, size, user_id):
+    db.cart.insert_many([
+        {'user_id': user_id, 'product_id': product_ids[i % len(product_ids)], 'name': f'Ürün {i}',
+         'price': 10.0, 'quantity': 1}
+        for i in range(size)
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 5, 10, 50, 100])
+    parser.add_argument('--suppliers', type=int, default=5)
+    parser.add_argument('--mysql-latency-ms', type=float, default=0.5)
+    parser.add_argument('--smtp-latency-ms', type=float, default=20)
+    parser.add_argument('--smtp-connect-ms', type=float, default=50)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    Mail(app)
+    client = MongoClient(os.getenv('MONGO_URI'))
+    db = client[f'bench_checkout_{ObjectId()}']
+    try:
+        max_size = max(args.sizes)
+        product_ids = [
+            str(db.products.insert_one({'name': f'Ürün {i}', 'price': 10.0,
+                                        'user_id': i % args.suppliers}).inserted_id)
+            for i in range(max_size)
+        ]
+        user_repository = LatencyUserRepository(args.mysql_latency_ms / 1000)
+
+        print(f"{'satır':>6} {'önce (ms)':>12} {'e-posta':>8} {'sonra (ms)':>12} {'e-posta':>8}")
+        with app.app_context():
+            for size in args.sizes:
+                mail = LatencyMail(args.smtp_latency_ms / 1000, args.smtp_connect_ms / 1000)
+                fill_cart(db, product_ids, size, 1)
+                started = time.perf_counter()
+                legacy_checkout(db, user_repository, mail, 1)
+                before, before_mails = time.perf_counter() - started, mail.sent
+
+                mail = LatencyMail(args.smtp_latency_ms / 1000, args.smtp_connect_ms / 1000)
+                service = CheckoutService(MongoProductRepository(db), MongoCartRepository(db),
+                                          user_repository, MongoOrderRepository(db), mail)
+                fill_cart(db, product_ids, size, 1)
+                started = time.perf_counter()
+                service.checkout(1)
+                after, after_mails = time.perf_counter() - started, mail.sent
+
+                print(f"{size:>6} {before * 1000:>12.1f} {before_mails:>8} {after * 1000:>12.1f} {after_mails:>8}")
+    finally:
+        client.drop_database(db.name)
+        client.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+# MySQL round trip karşılaştırması: eski "USE + sorgu" kalıbı ile havuzlu repository.
+#
+# Canlı bir MySQL gerektirir (.env içindeki MYSQL_* ayarları kullanılır).
+# user_management dizininden çalıştırın:
+#   python -m benchmarks.mysql_round_trips --iterations 200
+import argparse
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from config import Config
+from repositories.mysql_pool import MySQLConnectionPool
+from repositories.mysql_repository import MySQLUserRepository
+from repositories import mysql_statements as sql
+
+
+def questions(conn):
+    # Questions sayacı istemcinin sunucuya gönderdiği her ifadeyi sayar
+    cursor = conn.cursor()
+    cursor.execute("SHOW SESSION STATUS LIKE 'Questions'")
+    value = int(cursor.fetchone()[1])
+    cursor.close()
+    return value
+
+
+def legacy_call(conn, query, params):
+    cursor = conn.cursor()
+    cursor.execute(f"USE {Config.MYSQL_DB}")
+    cursor.execute(query, params)
+    cursor.fetchall()
+    cursor.close()
+
+
+def measure(pool, label, call, iterations):
+    with pool.connection() as conn:
+        before = questions(conn)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        call()
+    elapsed = time.perf_counter() - started
+    with pool.connection() as conn:
+        # SHOW ifadesinin kendisi de bir kez sayılır
+        round_trips = questions(conn) - before - 1
+    print(f"{label:<40} {round_trips / iterations:>6.2f} round trip/çağrı "
+          f"{elapsed / iterations * 1000:>8.3f} ms/çağrı")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--username', default='benchmark_user')
+    args = parser.parse_args()
+
+    # Sayaç oturum bazlı olduğundan tek bağlantılı havuz kullanılır
+    pool = MySQLConnectionPool.from_config(Config, min_size=1, max_size=1)
+    repository = MySQLUserRepository(pool)
+    user = repository.find_by_username(args.username)
+    user_id = user['id'] if user else 1
+
+    def legacy(query, params):
+        def call():
+            with pool.connection() as conn:
+                legacy_call(conn, query, params)
+        return call
+
+    cases = [
+        ('find_by_id', legacy(sql.FIND_BY_ID, (user_id,)), lambda: repository.find_by_id(user_id)),
+        ('find_by_username', legacy(sql.FIND_BY_USERNAME, (args.username,)),
+         lambda: repository.find_by_username(args.username)),
+        ('find_by_email', legacy(sql.FIND_BY_EMAIL, ('benchmark@example.com',)),
+         lambda: repository.find_by_email('benchmark@example.com')),
+    ]
+    for name, before, after in cases:
+        measure(pool, f"{name} (önce: USE + sorgu)", before, args.iterations)
+        measure(pool, f"{name} (sonra: havuz)", after, args.iterations)
+
+    pool.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+# Ürün listesi render karşılaştırması: list() + render_template ile stream_template + batch'li cursor.
+# İlk baytın üretilme süresi (TTFB), toplam süre ve en yüksek bellek (peak RSS) ölçülür.
+#
+# Canlı bir MongoDB gerektirir (MONGO_URI); geçici bir veritabanı kullanılır ve sonunda silinir.
+# Peak RSS süreç boyunca yalnızca artabildiği için her ölçüm ayrı bir süreçte yapılır.
+# user_management dizininden çalıştırın:
+#   python -m benchmarks.product_list_streaming --products 100000 --batch-sizes 100 500 1000
+import argparse
+import multiprocessing
+import os
+import resource
+import time
+
+from bson.objectid import ObjectId
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+load_dotenv()
+
+from repositories.mongo_repository import MongoProductRepository
+
+DESCRIPTION = "Uzun ürün açıklaması. " * 25
+INSERT_BATCH_SIZE = 5000
+
+
+def peak_rss_mb():
+    # Linux'ta ru_maxrss KB cinsindendir
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def seed(db, count):
+    batch = []
+    for i in range(count):
+        batch.append({'name': f'Ürün {i}', 'price': float(i % 1000), 'description': DESCRIPTION,
+                      'created_by': f'tedarikci{i % 50}', 'user_id': i % 50})
+        if len(batch) == INSERT_BATCH_SIZE:
+            db.products.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        db.products.insert_many(batch, ordered=False)
+
+
+def measure(mode, db_name, batch_size, results):
+    # Şablon ve url_for için uygulamanın kendisi kullanılır
+    from flask import render_template, stream_template
+    from app import app
+
+    client = MongoClient(os.getenv('MONGO_URI'))
+    repository = MongoProductRepository(client[db_name])
+    context = {'page': None, 'sort': 'id', 'limit': 20}
+    try:
+        with app.test_request_context('/products/all'):
+            baseline = peak_rss_mb()
+            started = time.perf_counter()
+            products = repository.iter_listing(batch_size=batch_size)
+            if mode == 'buffered':
+                chunks = iter([render_template('product_list.html', products=list(products), **context)])
+            else:
+                chunks = stream_template('product_list.html', products=products, **context)
+            size = len(next(chunks))
+            ttfb = time.perf_counter() - started
+            for chunk in chunks:
+                size += len(chunk)
+            total = time.perf_counter() - started
+        results.put((mode, batch_size, ttfb, total, baseline, peak_rss_mb(), size))
+    finally:
+        client.close()
+
+
+def run(mode, db_name, batch_size):
+    # spawn: çocuk süreç ebeveynin MongoClient'ını ve belleğini devralmaz
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=measure, args=(mode, db_name, batch_size, results))
+    process.start()
+    result = results.get()
+    process.join()
+    mode, batch_size, ttfb, total, baseline, peak, size = result
+    label = "önce: list + render" if mode == 'buffered' else f"sonra: stream batch={batch_size}"
+    print(f"{label:<28} TTFB {ttfb * 1000:>9.1f} ms  toplam {total * 1000:>9.1f} ms  "
+          f"peak RSS {peak:>7.1f} MB (+{peak - baseline:.1f})  {size / 1024 / 1024:.1f} MB HTML")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--products', type=int, default=100000)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[100, 500, 1000])
+    args = parser.parse_args()
+
+    client = MongoClient(os.getenv('MONGO_URI'))
+    db = client[f'bench_stream_{ObjectId()}']
+    try:
+        seed(db, args.products)
+        run('buffered', db.name, max(args.batch_sizes))
+        for batch_size in args.batch_sizes:
+            run('stream', db.name, batch_size)
+    finally:
+        client.drop_database(db.name)
+        client.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,8 @@
 import os
+from dotenv import load_dotenv
+
+# Config sınıfı değerleri import anında okur; .env önce yüklenmeli
+load_dotenv()
 
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY')
@@ -9,7 +13,78 @@ class Config:
     MAIL_USERNAME = os.getenv('MAIL_USERNAME')
     MAIL_PASSWORD = os.getenv('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.getenv('MAIL_DEFAULT_SENDER')
+    # E-posta kuyruğu: süreç başına worker thread'i, tek SMTP bağlantısıyla gönderilen en fazla
+    # ileti, deneme sayısı ve yeniden deneme beklemesi (saniye; her denemede iki katına çıkar)
+    MAIL_OUTBOX_WORKERS = int(os.getenv('MAIL_OUTBOX_WORKERS') or 2)
+    MAIL_OUTBOX_BATCH_SIZE = int(os.getenv('MAIL_OUTBOX_BATCH_SIZE') or 20)
+    MAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('MAIL_OUTBOX_MAX_ATTEMPTS') or 5)
+    MAIL_OUTBOX_BACKOFF_BASE = int(os.getenv('MAIL_OUTBOX_BACKOFF_BASE') or 5)
+    MAIL_OUTBOX_BACKOFF_MAX = int(os.getenv('MAIL_OUTBOX_BACKOFF_MAX') or 600)
+    # SMTP soket zaman aşımı (saniye); ileti kirasından (120 sn) kısa olmalı
+    MAIL_OUTBOX_SMTP_TIMEOUT = int(os.getenv('MAIL_OUTBOX_SMTP_TIMEOUT') or 30)
+    # Sepet hareketleri bu süre (saniye) boyunca biriktirilip kullanıcıya tek özet e-postası gider
+    CART_DIGEST_WINDOW_SECONDS = int(os.getenv('CART_DIGEST_WINDOW_SECONDS') or 300)
     MYSQL_HOST = os.getenv('MYSQL_HOST')
     MYSQL_USER = os.getenv('MYSQL_USER')
     MYSQL_PASSWORD = os.getenv('MYSQL_PASSWORD')
-    MYSQL_DB = os.getenv('MYSQL_DB')
\ No newline at end of file
+    # Veritabanı her havuz bağlantısı açılırken bir kez seçilir
+    MYSQL_DB = os.getenv('MYSQL_DB') or 'user_management'
+    MYSQL_PORT = int(os.getenv('MYSQL_PORT') or 3306)
+    # Bağlantı havuzu ayarları
+    MYSQL_POOL_MIN_SIZE = int(os.getenv('MYSQL_POOL_MIN_SIZE') or 1)
+    MYSQL_POOL_MAX_SIZE = int(os.getenv('MYSQL_POOL_MAX_SIZE') or 10)
+    MYSQL_POOL_IDLE_TIMEOUT = int(os.getenv('MYSQL_POOL_IDLE_TIMEOUT') or 300)
+    MYSQL_POOL_CHECKOUT_TIMEOUT = float(os.getenv('MYSQL_POOL_CHECKOUT_TIMEOUT') or 5)
+    MYSQL_POOL_HEALTH_CHECK_INTERVAL = float(os.getenv('MYSQL_POOL_HEALTH_CHECK_INTERVAL') or 30)
+    # Kullanıcı önbelleği (find_by_id / find_by_username / find_by_email)
+    USER_CACHE_MAX_SIZE = int(os.getenv('USER_CACHE_MAX_SIZE') or 1024)
+    USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL') or 60)
+    # Ürün listesi sayfalama
+    PRODUCTS_PAGE_SIZE = int(os.getenv('PRODUCTS_PAGE_SIZE') or 20)
+    PRODUCTS_MAX_PAGE_SIZE = int(os.getenv('PRODUCTS_MAX_PAGE_SIZE') or 100)
+    # Sipariş geçmişi sayfa boyutu
+    ORDERS_PAGE_SIZE = int(os.getenv('ORDERS_PAGE_SIZE') or 10)
+    # Admin paneline erişebilen kullanıcıların MySQL id'leri (virgülle ayrılmış). Kullanıcı adı
+    # kullanılmaz: kayıtta ve profilde serbestçe seçilebilir, id ise değişmez.
+    ADMIN_USER_IDS = {int(user_id) for user_id in os.getenv('ADMIN_USER_IDS', '').split(',') if user_id.strip()}
+    # Admin panelinde gösterilen gün ve ürün sayısı
+    ADMIN_DASHBOARD_DAYS = int(os.getenv('ADMIN_DASHBOARD_DAYS') or 14)
+    ADMIN_DASHBOARD_TOP_PRODUCTS = int(os.getenv('ADMIN_DASHBOARD_TOP_PRODUCTS') or 20)
+    # Liste görünümünde gösterilen açıklama uzunluğu (karakter)
+    PRODUCT_DESCRIPTION_PREVIEW_LENGTH = int(os.getenv('PRODUCT_DESCRIPTION_PREVIEW_LENGTH') or 160)
+    # /products/all akışında MongoDB'den tek seferde çekilen ürün sayısı
+    PRODUCTS_STREAM_BATCH_SIZE = int(os.getenv('PRODUCTS_STREAM_BATCH_SIZE') or 500)
+    # Toplu ürün yüklemede tek insert_many'deki ürün sayısı, yanıtta listelenen en fazla
+    # satır hatası ve bir satırın en fazla boyutu (bayt)
+    BULK_IMPORT_BATCH_SIZE = int(os.getenv('BULK_IMPORT_BATCH_SIZE') or 1000)
+    BULK_IMPORT_MAX_ERRORS = int(os.getenv('BULK_IMPORT_MAX_ERRORS') or 100)
+    BULK_IMPORT_MAX_LINE_BYTES = int(os.getenv('BULK_IMPORT_MAX_LINE_BYTES') or 65536)
+    # Katalog dışa aktarımında MongoDB'den tek seferde çekilen ürün sayısı
+    EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE') or 1000)
+    # Arama metninin en fazla uzunluğu (karakter); fazlası kesilir
+    PRODUCT_SEARCH_MAX_LENGTH = int(os.getenv('PRODUCT_SEARCH_MAX_LENGTH') or 100)
+    # MongoDB bağlantısı; istemci her süreçte ilk kullanımda açılır
+    MONGO_URI = os.getenv('MONGO_URI')
+    MONGO_DB_NAME = os.getenv('MONGO_DB_NAME') or 'shop'
+    MONGO_MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE') or 100)
+    MONGO_MIN_POOL_SIZE = int(os.getenv('MONGO_MIN_POOL_SIZE') or 0)
+    MONGO_CONNECT_TIMEOUT_MS = int(os.getenv('MONGO_CONNECT_TIMEOUT_MS') or 5000)
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS') or 5000)
+    # Boş bırakılırsa sınırsız (pymongo varsayılanı)
+    MONGO_SOCKET_TIMEOUT_MS = int(os.getenv('MONGO_SOCKET_TIMEOUT_MS')) if os.getenv('MONGO_SOCKET_TIMEOUT_MS') else None
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS')) if os.getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS') else None
+    # Uygulama açılışında MongoDB indekslerini oluştur (dağıtımda migrations.runner tercih edilir)
+    MONGO_ENSURE_INDEXES = os.getenv('MONGO_ENSURE_INDEXES', '').lower() in ('1', 'true', 'yes')
+    # Katalog önbelleği (liste sayfaları, ürün detayları, sepete ekleme için ürün bilgileri).
+    # Aynı makinedeki tüm worker'lar bu SQLite dosyasını paylaşır. Varsayılan olarak uygulamanın
+    # instance klasöründedir: herkesin yazabildiği geçici dizindeki dosyaya başka bir kullanıcı
+    # önbellek girdisi yerleştirebilirdi.
+    CATALOG_CACHE_PATH = os.getenv('CATALOG_CACHE_PATH') or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'instance', 'catalog_cache.sqlite3')
+    CATALOG_CACHE_TTL = int(os.getenv('CATALOG_CACHE_TTL') or 30)
+    # Önbellekteki en fazla girdi; anahtarlar istekten (sayfa, filtre, arama) türediği için sınırlanır
+    CATALOG_CACHE_MAX_ENTRIES = int(os.getenv('CATALOG_CACHE_MAX_ENTRIES') or 10000)
+    # TTL dolduktan sonra arka planda yenilenirken bayat verinin sunulabileceği süre
+    CATALOG_CACHE_STALE_TTL = int(os.getenv('CATALOG_CACHE_STALE_TTL') or 300)
+    # ETag'lere eklenen dağıtım tuzu; boşsa şablon dosyalarının değişiklik zamanından üretilir
+    ETAG_SALT = os.getenv('ETAG_SALT') or ''
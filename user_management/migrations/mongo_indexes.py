@@ -0,0 +1,197 @@
+import datetime
+
+from bson.objectid import ObjectId
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+
+# Rotaların ihtiyaç duyduğu MongoDB indeksleri (koleksiyon -> indeksler).
+# create_indexes var olan aynı tanımlı indeksleri yeniden oluşturmaz, yani idempotenttir.
+MONGO_INDEXES = {
+    'products': [
+        # delete_product sahiplik kontrolü, tedarikçi listeleri
+        IndexModel([('created_by', ASCENDING)], name='products_created_by'),
+        # checkout'ta ürün sahibinin bulunması
+        IndexModel([('user_id', ASCENDING)], name='products_user_id'),
+        # /products?sort=newest keyset sayfalama; fiyat aralığıyla birlikte price indeks
+        # anahtarından elenir, yalnızca aralıktaki ürünler için doküman okunur (FETCH)
+        IndexModel([('created_at', DESCENDING), ('_id', DESCENDING), ('price', ASCENDING)],
+                   name='products_created_at_id_price'),
+        # /products?sort=id + fiyat aralığı: _id sırası, fiyat indeks anahtarından elenir
+        IndexModel([('_id', ASCENDING), ('price', ASCENDING)], name='products_id_price'),
+        # /products?sort=price_asc|price_desc ve fiyat aralığı: aralık indeks sınırı olur,
+        # azalan sıralama indeksin tersten okunmasıyla karşılanır
+        IndexModel([('price', ASCENDING), ('_id', ASCENDING)], name='products_price_id'),
+        # /products?sort=supplier: tedarikçiye, sonra fiyata göre; fiyat aralığı da indekste elenir
+        IndexModel([('created_by', ASCENDING), ('price', ASCENDING), ('_id', ASCENDING)],
+                   name='products_created_by_price_id'),
+        # /api/products/export?supplier=: tedarikçinin ürünleri _id sırasıyla, kaldığı yerden devam
+        IndexModel([('created_by', ASCENDING), ('_id', ASCENDING)], name='products_created_by_id'),
+        # /products/search tam metin arama; ad eşleşmesi açıklamadakinden daha alakalı sayılır
+        IndexModel([('name', TEXT), ('description', TEXT)], name='products_text',
+                   weights={'name': 10, 'description': 1}, default_language='turkish'),
+    ],
+    'cart': [
+        # add_to_cart find_one({'user_id', 'product_id'}); önek olarak find/delete_many({'user_id'}).
+        # Unique olduğu için aynı ürün bir kullanıcının sepetinde tek satırdır.
+        IndexModel([('user_id', ASCENDING), ('product_id', ASCENDING)],
+                   name='cart_user_product', unique=True),
+    ],
+    'orders': [
+        # /orders sipariş geçmişi: kullanıcıya göre en yeni önce keyset sayfalama
+        IndexModel([('user_id', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)],
+                   name='orders_user_created_at'),
+    ],
+    'sales_rollups': [
+        # Checkout'taki $inc upsert'leri ve günlük sorgular; unique olduğu için
+        # eş zamanlı upsert'ler aynı sayaç için tek doküman üretir
+        IndexModel([('scope', ASCENDING), ('key', ASCENDING), ('day', ASCENDING)],
+                   name='sales_rollups_scope_key_day', unique=True),
+        # Admin paneli: kapsam başına tüm zamanlar toplamları gelire göre
+        IndexModel([('scope', ASCENDING), ('day', ASCENDING), ('revenue', DESCENDING)],
+                   name='sales_rollups_scope_day_revenue'),
+    ],
+    'mail_outbox': [
+        # Worker'ların zamanı gelmiş iletiyi kiralaması ve durum başına kuyruk derinliği
+        IndexModel([('status', ASCENDING), ('next_attempt_at', ASCENDING)],
+                   name='mail_outbox_status_next_attempt'),
+        # Gönderilmiş iletiler bir hafta sonra silinir (gönderilemeyenler incelemek için kalır)
+        IndexModel([('sent_at', ASCENDING)], name='mail_outbox_sent_at_ttl',
+                   expireAfterSeconds=7 * 24 * 3600),
+    ],
+    'cart_digests': [
+        # Penceresi dolan kullanıcı özetlerinin sırayla alınması
+        IndexModel([('due_at', ASCENDING)], name='cart_digests_due_at'),
+    ],
+}
+
+# Rotaların çalıştırdığı sorgu kalıpları: (ad, koleksiyon, filtre, sıralama).
+# Değerler yalnızca explain() için örnek; önemli olan alanlar ve tipleri.
+ROUTE_QUERIES = [
+    ('add_to_cart: sepet satırı', 'cart', {'user_id': 0, 'product_id': ''}, None),
+    ('view_cart / checkout: kullanıcı sepeti', 'cart', {'user_id': 0}, None),
+    ('remove_from_cart / update_cart', 'cart', {'_id': ObjectId(), 'user_id': 0}, None),
+    ('add_to_cart / delete_product: ürün', 'products', {'_id': ObjectId()}, None),
+    ('tedarikçi ürünleri', 'products', {'created_by': ''}, None),
+    ('ürün sahibine göre', 'products', {'user_id': 0}, None),
+    ('list_products: sort=id', 'products', {}, [('_id', ASCENDING)]),
+    ('list_products: sort=newest', 'products', {}, [('created_at', DESCENDING), ('_id', DESCENDING)]),
+    # Filtreli listeler uygulamadaki gibi PRODUCT_SORT_INDEXES indeksine hint'lenir (5. eleman)
+    ('list_products: sort=price_asc + fiyat aralığı', 'products', {'price': {'$gte': 0, '$lte': 1}},
+     [('price', ASCENDING), ('_id', ASCENDING)], 'products_price_id'),
+    ('list_products: sort=price_desc + fiyat aralığı', 'products', {'price': {'$gte': 0, '$lte': 1}},
+     [('price', DESCENDING), ('_id', DESCENDING)], 'products_price_id'),
+    ('list_products: sort=supplier + fiyat aralığı', 'products', {'price': {'$gte': 0, '$lte': 1}},
+     [('created_by', ASCENDING), ('price', ASCENDING), ('_id', ASCENDING)], 'products_created_by_price_id'),
+    ('list_products: sort=newest + fiyat aralığı', 'products', {'price': {'$gte': 0}},
+     [('created_at', DESCENDING), ('_id', DESCENDING)], 'products_created_at_id_price'),
+    ('list_products: sort=id + fiyat aralığı', 'products', {'price': {'$lte': 1}}, [('_id', ASCENDING)],
+     'products_id_price'),
+    ('export_products: katalog', 'products', {'_id': {'$gt': ObjectId()}}, [('_id', ASCENDING)]),
+    ('export_products: tedarikçi', 'products', {'created_by': '', '_id': {'$gt': ObjectId()}},
+     [('_id', ASCENDING)]),
+    ('search_products: tam metin', 'products', {'$text': {'$search': 'ürün'}}, None),
+    ('order_history: kullanıcı siparişleri', 'orders', {'user_id': 0},
+     [('created_at', DESCENDING), ('_id', DESCENDING)]),
+    ('admin: tedarikçi toplamları', 'sales_rollups', {'scope': 'supplier', 'day': 'all'},
+     [('revenue', DESCENDING)]),
+    ('admin: günlük satışlar', 'sales_rollups', {'scope': 'store', 'key': None, 'day': {'$gte': '', '$ne': 'all'}},
+     [('day', DESCENDING)]),
+    ('mail outbox: ileti kiralama', 'mail_outbox',
+     {'status': {'$in': ['pending', 'sending']}, 'next_attempt_at': {'$lte': datetime.datetime(2024, 1, 1)}},
+     [('next_attempt_at', ASCENDING)]),
+    ('sepet özeti: penceresi dolanlar', 'cart_digests', {'due_at': {'$lte': datetime.datetime(2024, 1, 1)}},
+     [('due_at', ASCENDING)]),
+]
+
+
+def ensure_indexes(db, indexes=MONGO_INDEXES):
+    # Eksik indeksleri oluşturur; koleksiyon -> oluşturulan indeks adları
+    created = {}
+    for collection_name, models in indexes.items():
+        try:
+            created[collection_name] = db[collection_name].create_indexes(models)
+        except OperationFailure as e:
+            # Örn. sepette tekrar eden (user_id, product_id) satırları varsa unique indeks kurulamaz;
+            # önce dedupe_cart çalıştırılmalı
+            raise RuntimeError(f"{collection_name} indeksleri oluşturulamadı: {e}") from e
+    return created
+
+
+def _live_key(key):
+    # Sunucu text indeks alanlarını tek bir ('_fts', 'text'), ('_ftsx', 1) çiftiyle saklar
+    live = []
+    for field, direction in key:
+        if direction == TEXT:
+            if ('_fts', TEXT) not in live:
+                live += [('_fts', TEXT), ('_ftsx', 1)]
+        else:
+            live.append((field, direction))
+    return tuple(live)
+
+
+def missing_indexes(db, indexes=MONGO_INDEXES):
+    # Canlı veritabanında anahtar deseni (ve unique seçeneği) eşleşmeyen indeksleri döner
+    missing = []
+    for collection_name, models in indexes.items():
+        existing = db[collection_name].index_information()
+        present = {
+            (tuple((field, direction) for field, direction in info['key']), bool(info.get('unique')))
+            for info in existing.values()
+        }
+        for model in models:
+            document = model.document
+            key = _live_key(document['key'].items())
+            if (key, bool(document.get('unique'))) not in present:
+                missing.append((collection_name, document['name'], key))
+    return missing
+
+
+def _plan_stages(plan):
+    # explain() çıktısındaki tüm "stage" değerleri (iç içe inputStage/inputStages dahil)
+    if isinstance(plan, dict):
+        if 'stage' in plan:
+            yield plan['stage']
+        for value in plan.values():
+            yield from _plan_stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            yield from _plan_stages(value)
+
+
+def find_collscans(db, queries=ROUTE_QUERIES):
+    # Kazanan planı COLLSCAN olan ya da sonuçları bellekte sıralayan (SORT: sıralamayı
+    # karşılayan indeks yok) rota sorgularını döner: [(ad, koleksiyon, aşamalar)]
+    collscans = []
+    for name, collection_name, filter_, sort, *hint in queries:
+        cursor = db[collection_name].find(filter_)
+        if sort:
+            cursor = cursor.sort(sort)
+        if hint:
+            cursor = cursor.hint(hint[0])
+        explain = cursor.limit(1).explain()
+        stages = list(_plan_stages(explain.get('queryPlanner', {}).get('winningPlan', {})))
+        if 'COLLSCAN' in stages or 'SORT' in stages:
+            collscans.append((name, collection_name, stages))
+    return collscans
+
+
+def dedupe_cart(db):
+    # Unique (user_id, product_id) indeksinden önce tekrar eden sepet satırlarını
+    # miktarları toplayarak tek satıra indirir; birleştirilen grup sayısını döner
+    cart = db['cart']
+    groups = cart.aggregate([
+        {'$group': {
+            '_id': {'user_id': '$user_id', 'product_id': '$product_id'},
+            'ids': {'$push': '$_id'},
+            'quantity': {'$sum': '$quantity'},
+            'count': {'$sum': 1},
+        }},
+        {'$match': {'count': {'$gt': 1}}},
+    ], allowDiskUse=True)
+    merged = 0
+    for group in groups:
+        keep, *duplicates = group['ids']
+        cart.update_one({'_id': keep}, {'$set': {'quantity': group['quantity']}})
+        cart.delete_many({'_id': {'$in': duplicates}})
+        merged += 1
+    return merged
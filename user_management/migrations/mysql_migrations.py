@@ -0,0 +1,126 @@
+# MySQL şema göçleri. Her göç bir kez uygulanır ve schema_migrations tablosuna yazılır.
+# Göçler idempotent yazılır; yarıda kalan bir göç tekrar çalıştırılabilir.
+
+CREATE_MIGRATIONS_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INT PRIMARY KEY,
+    description VARCHAR(255) NOT NULL,
+    applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+# Rotaların ihtiyaç duyduğu indeksler: (tablo, kolonlar, unique)
+REQUIRED_INDEXES = [
+    ('users', ('username',), True),   # find_by_username, login
+    ('users', ('email',), True),      # find_by_email, get_user_mail, update_profile
+]
+
+
+def index_exists(cursor, table, columns, unique=False):
+    # Kolonları aynı sırayla kapsayan bir indeks var mı? unique isteniyorsa kolonları birebir
+    # aynı olan unique indeks aranır: (email, x) unique indeksi email'i tek başına tekil yapmaz.
+    cursor.execute(
+        "SELECT index_name, non_unique, column_name FROM information_schema.statistics "
+        "WHERE table_schema = DATABASE() AND table_name = %s ORDER BY index_name, seq_in_index",
+        (table,)
+    )
+    indexes = {}
+    for index_name, non_unique, column_name in cursor.fetchall():
+        entry = indexes.setdefault(index_name, {'unique': not non_unique, 'columns': []})
+        entry['columns'].append(column_name)
+    for entry in indexes.values():
+        if unique:
+            if entry['unique'] and tuple(entry['columns']) == tuple(columns):
+                return True
+        elif tuple(entry['columns'][:len(columns)]) == tuple(columns):
+            return True
+    return False
+
+
+def table_exists(cursor, table):
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s",
+        (table,)
+    )
+    return cursor.fetchone()[0] > 0
+
+
+def create_users_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            username VARCHAR(100) NOT NULL,
+            password VARCHAR(255) NOT NULL,
+            email VARCHAR(100) NOT NULL,
+            user_type ENUM('customer', 'supplier') NOT NULL DEFAULT 'customer',
+            UNIQUE KEY uq_users_username (username)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+    # Tablo daha önce elle oluşturulmuşsa username indeksi eksik olabilir
+    if not index_exists(cursor, 'users', ('username',), unique=True):
+        cursor.execute("ALTER TABLE users ADD UNIQUE INDEX uq_users_username (username)")
+
+
+def add_unique_email_index(cursor):
+    if index_exists(cursor, 'users', ('email',), unique=True):
+        return
+    cursor.execute("SELECT email, COUNT(*) FROM users GROUP BY email HAVING COUNT(*) > 1 LIMIT 10")
+    duplicates = cursor.fetchall()
+    if duplicates:
+        emails = ", ".join(row[0] for row in duplicates)
+        raise RuntimeError(
+            f"users.email üzerinde tekrar eden kayıtlar var, unique indeks eklenemedi: {emails}"
+        )
+    cursor.execute("ALTER TABLE users ADD UNIQUE INDEX uq_users_email (email)")
+
+
+# (sürüm, açıklama, fonksiyon) — yeni göçler listenin sonuna eklenir
+MIGRATIONS = [
+    (1, 'users tablosu', create_users_table),
+    (2, 'users.email unique indeksi', add_unique_email_index),
+]
+
+
+def applied_versions(cursor):
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def migrate(conn, migrations=MIGRATIONS):
+    # Uygulanmamış göçleri sırayla çalıştırır, uygulanan sürümleri döner
+    cursor = conn.cursor()
+    cursor.execute(CREATE_MIGRATIONS_TABLE)
+    done = applied_versions(cursor)
+    applied = []
+    for version, description, apply in migrations:
+        if version in done:
+            continue
+        apply(cursor)
+        cursor.execute(
+            "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+            (version, description)
+        )
+        conn.commit()
+        applied.append(version)
+    cursor.close()
+    return applied
+
+
+def pending(conn, migrations=MIGRATIONS):
+    cursor = conn.cursor()
+    if not table_exists(cursor, 'schema_migrations'):
+        cursor.close()
+        return [version for version, _, _ in migrations]
+    done = applied_versions(cursor)
+    cursor.close()
+    return [version for version, _, _ in migrations if version not in done]
+
+
+def missing_indexes(conn):
+    cursor = conn.cursor()
+    missing = []
+    for table, columns, unique in REQUIRED_INDEXES:
+        if not table_exists(cursor, table) or not index_exists(cursor, table, columns, unique):
+            missing.append((table, columns, unique))
+    cursor.close()
+    return missing
@@ -0,0 +1,128 @@
+# Şema ve indeks göçlerini uygular. Dağıtım sırasında, uygulama başlamadan önce çalıştırılır.
+# user_management dizininden:
+#   python -m migrations.runner           # MySQL göçleri + MongoDB indeksleri
+#   python -m migrations.runner --check   # hiçbir şey değiştirmeden eksikleri raporla
+#   python -m migrations.runner --mongo-only --explain   # COLLSCAN'e ya da bellekte sıralamaya (SORT) düşen rota sorgularını raporla
+#   python -m migrations.runner --mongo-only --rebuild-rollups   # satış özetlerini siparişlerden yeniden hesapla
+import argparse
+import sys
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from config import Config
+from repositories.mysql_pool import MySQLConnectionPool
+from repositories.mongo_connection import MongoConnection
+from repositories.mongo_repository import MongoSalesRollupRepository
+from migrations import mysql_migrations, mongo_indexes
+
+
+def mysql_pool(config=Config):
+    # Veritabanı henüz yoksa oluşturulabilsin diye veritabanı seçmeden bağlanılır
+    return MySQLConnectionPool(
+        host=config.MYSQL_HOST,
+        user=config.MYSQL_USER,
+        password=config.MYSQL_PASSWORD,
+        port=config.MYSQL_PORT,
+        min_size=0,
+        max_size=1,
+    )
+
+
+def run_mysql(check=False, config=Config):
+    pool = mysql_pool(config)
+    problems = []
+    with pool.connection() as conn:
+        cursor = conn.cursor()
+        if check:
+            cursor.execute(
+                "SELECT COUNT(*) FROM information_schema.schemata WHERE schema_name = %s",
+                (config.MYSQL_DB,)
+            )
+            if not cursor.fetchone()[0]:
+                cursor.close()
+                print(f"[mysql] {config.MYSQL_DB} veritabanı yok")
+                return [f"{config.MYSQL_DB} veritabanı yok"]
+        else:
+            cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{config.MYSQL_DB}` CHARACTER SET utf8mb4")
+        cursor.execute(f"USE `{config.MYSQL_DB}`")
+        cursor.close()
+
+        if check:
+            for version in mysql_migrations.pending(conn):
+                problems.append(f"uygulanmamış göç: {version}")
+        else:
+            for version in mysql_migrations.migrate(conn):
+                print(f"[mysql] göç {version} uygulandı")
+
+        for table, columns, unique in mysql_migrations.missing_indexes(conn):
+            kind = "unique indeks" if unique else "indeks"
+            problems.append(f"eksik {kind}: {table}({', '.join(columns)})")
+    pool.close()
+
+    for problem in problems:
+        print(f"[mysql] {problem}")
+    return problems
+
+
+def run_mongo(check=False, explain=False, dedupe_cart=False, rebuild_rollups=False):
+    db = MongoConnection.from_config(Config, max_pool_size=1)
+    if dedupe_cart and not check:
+        merged = mongo_indexes.dedupe_cart(db)
+        print(f"[mongo] {merged} tekrar eden sepet satırı grubu birleştirildi")
+    if not check:
+        for collection_name, names in mongo_indexes.ensure_indexes(db).items():
+            print(f"[mongo] {collection_name}: {', '.join(names)}")
+    if rebuild_rollups and not check:
+        orders, documents = MongoSalesRollupRepository(db).rebuild(
+            indexes=mongo_indexes.MONGO_INDEXES['sales_rollups']
+        )
+        print(f"[mongo] {orders} siparişten {documents} satış özeti dokümanı yeniden hesaplandı")
+
+    problems = [
+        f"eksik indeks: {collection_name}.{name} {dict(key)}"
+        for collection_name, name, key in mongo_indexes.missing_indexes(db)
+    ]
+    if explain:
+        problems += [
+            f"{'COLLSCAN' if 'COLLSCAN' in stages else 'SORT'}: {name} ({collection_name}) "
+            f"plan={' > '.join(stages)}"
+            for name, collection_name, stages in mongo_indexes.find_collscans(db)
+        ]
+    db.close()
+
+    for problem in problems:
+        print(f"[mongo] {problem}")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MySQL şema göçleri ve MongoDB indeksleri")
+    parser.add_argument('--check', action='store_true', help="değişiklik yapmadan eksikleri raporla")
+    parser.add_argument('--mysql-only', action='store_true')
+    parser.add_argument('--mongo-only', action='store_true')
+    parser.add_argument('--explain', action='store_true',
+                        help="rota sorgularını explain() ile çalıştırıp COLLSCAN ve SORT aşamalarını raporla")
+    parser.add_argument('--dedupe-cart', action='store_true',
+                        help="unique sepet indeksinden önce tekrar eden sepet satırlarını birleştir")
+    parser.add_argument('--rebuild-rollups', action='store_true',
+                        help="sales_rollups koleksiyonunu orders'tan yeniden hesapla")
+    args = parser.parse_args(argv)
+
+    problems = []
+    if not args.mongo_only:
+        problems += run_mysql(check=args.check)
+    if not args.mysql_only:
+        problems += run_mongo(check=args.check, explain=args.explain, dedupe_cart=args.dedupe_cart,
+                              rebuild_rollups=args.rebuild_rollups)
+
+    if problems:
+        print(f"{len(problems)} sorun bulundu.")
+        return 1
+    print("Şema ve indeksler güncel.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,101 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    # Boyutu sınırlı, süreli (TTL) ve thread-safe süreç içi önbellek.
+    # Girdiler etiketlenebilir; invalidate_tag aynı etiketli tüm girdileri siler.
+
+    def __init__(self, max_size=1024, ttl=60, clock=time.monotonic):
+        if max_size < 1:
+            raise ValueError("max_size en az 1 olmalı")
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # anahtar -> (değer, bitiş zamanı, etiketler)
+        self._tags = {}                 # etiket -> anahtar kümesi
+        self._version = 0
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'invalidations': 0,
+        }
+
+    def version(self):
+        # Okuma öncesi alınıp set(if_version=...) ile verilirse, arada yapılan
+        # bir invalidation sonrası eski verinin önbelleğe yazılması engellenir
+        with self._lock:
+            return self._version
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return default
+            value, expires_at, _ = entry
+            if expires_at <= self._clock():
+                self._remove(key)
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return default
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return value
+
+    def set(self, key, value, tags=(), ttl=None, if_version=None):
+        with self._lock:
+            if if_version is not None and if_version != self._version:
+                return False
+            if key in self._entries:
+                self._remove(key)
+            expires_at = self._clock() + (self.ttl if ttl is None else ttl)
+            self._entries[key] = (value, expires_at, tuple(tags))
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_size:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats['evictions'] += 1
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._version += 1
+            if key in self._entries:
+                self._remove(key)
+                self._stats['invalidations'] += 1
+
+    def invalidate_tag(self, tag):
+        with self._lock:
+            self._version += 1
+            for key in list(self._tags.get(tag, ())):
+                self._remove(key)
+                self._stats['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+            self._tags.clear()
+
+    def _remove(self, key):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, size=len(self._entries), max_size=self.max_size)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,201 @@
+import os
+import threading
+import weakref
+
+from pymongo import MongoClient, monitoring
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    # pymongo bağlantı havuzu olaylarından sayaç tutar
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {
+            'created': 0,
+            'closed': 0,
+            'checkouts': 0,
+            'checkins': 0,
+            'checkout_failures': 0,
+            'pool_clears': 0,
+        }
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['open'] = stats['created'] - stats['closed']
+        stats['in_use'] = stats['checkouts'] - stats['checkins']
+        return stats
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._count('pool_clears')
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._count('created')
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._count('closed')
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._count('checkout_failures')
+
+    def connection_checked_out(self, event):
+        self._count('checkouts')
+
+    def connection_checked_in(self, event):
+        self._count('checkins')
+
+
+class LazyCollection:
+    # Koleksiyon adını tutar; her erişimde o anki sürecin istemcisindeki koleksiyona yönlenir.
+    # Modül seviyesinde saklanabilir, fork sonrası ebeveynin soketlerini kullanmaz.
+    __slots__ = ('_connection', '_name')
+
+    def __init__(self, connection, name):
+        self._connection = connection
+        self._name = name
+
+    @property
+    def name(self):
+        return self._name
+
+    def __getattr__(self, attr):
+        return getattr(self._connection.collection(self._name), attr)
+
+    def __repr__(self):
+        return f"LazyCollection({self._connection.db_name}.{self._name})"
+
+
+class MongoConnection:
+    # Uygulamadaki tek MongoClient'ı yönetir.
+    # İstemci ilk kullanımda oluşturulur; prefork sunucularda (gunicorn vb.) her worker
+    # fork'tan sonra kendi istemcisini ve bağlantı havuzunu açar.
+    def __init__(self, uri=None, db_name='shop', max_pool_size=100, min_pool_size=0,
+                 connect_timeout_ms=20000, server_selection_timeout_ms=30000,
+                 socket_timeout_ms=None, wait_queue_timeout_ms=None, client_factory=MongoClient):
+        if min_pool_size < 0 or max_pool_size < 1 or min_pool_size > max_pool_size:
+            raise ValueError("Geçersiz havuz boyutu: min_pool_size <= max_pool_size ve max_pool_size >= 1 olmalı")
+
+        self.uri = uri
+        self.db_name = db_name
+        self.max_pool_size = max_pool_size
+        self.min_pool_size = min_pool_size
+        self.connect_timeout_ms = connect_timeout_ms
+        self.server_selection_timeout_ms = server_selection_timeout_ms
+        self.socket_timeout_ms = socket_timeout_ms
+        self.wait_queue_timeout_ms = wait_queue_timeout_ms
+        self._client_factory = client_factory
+
+        self._lock = threading.Lock()
+        self._reset()
+
+        if hasattr(os, 'register_at_fork'):
+            # Fork anında başka bir thread kilidi tutuyor olabilir; çocukta kilit ve istemci sıfırlanır
+            ref = weakref.ref(self)
+            os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._after_fork())
+
+    @classmethod
+    def from_config(cls, config, **kwargs):
+        return cls(
+            uri=config.MONGO_URI,
+            db_name=config.MONGO_DB_NAME,
+            max_pool_size=config.MONGO_MAX_POOL_SIZE,
+            min_pool_size=config.MONGO_MIN_POOL_SIZE,
+            connect_timeout_ms=config.MONGO_CONNECT_TIMEOUT_MS,
+            server_selection_timeout_ms=config.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            socket_timeout_ms=config.MONGO_SOCKET_TIMEOUT_MS,
+            wait_queue_timeout_ms=config.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+            **kwargs
+        )
+
+    def _reset(self):
+        self._client = None
+        self._pid = None
+        self._collections = {}
+        self._listener = PoolStatsListener()
+
+    def _after_fork(self):
+        # Ebeveynin istemcisi kapatılmaz: soketleri ebeveyn hâlâ kullanıyor
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _create_client(self):
+        return self._client_factory(
+            self.uri,
+            maxPoolSize=self.max_pool_size,
+            minPoolSize=self.min_pool_size,
+            connectTimeoutMS=self.connect_timeout_ms,
+            serverSelectionTimeoutMS=self.server_selection_timeout_ms,
+            socketTimeoutMS=self.socket_timeout_ms,
+            waitQueueTimeoutMS=self.wait_queue_timeout_ms,
+            event_listeners=[self._listener],
+        )
+
+    @property
+    def client(self):
+        pid = os.getpid()
+        client = self._client
+        if client is None or self._pid != pid:
+            with self._lock:
+                if self._client is None or self._pid != pid:
+                    # Fork kancası çalışmadıysa (ör. C seviyesinde fork) pid değişiminden anlaşılır
+                    if self._pid != pid:
+                        self._reset()
+                    self._client = self._create_client()
+                    self._pid = pid
+                client = self._client
+        return client
+
+    @property
+    def db(self):
+        return self.client[self.db_name]
+
+    @property
+    def name(self):
+        return self.db_name
+
+    def collection(self, name):
+        # Collection nesneleri süreç başına bir kez oluşturulur
+        self.client
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self._collections[name] = self.db[name]
+        return collection
+
+    def __getitem__(self, name):
+        return LazyCollection(self, name)
+
+    def command(self, *args, **kwargs):
+        return self.db.command(*args, **kwargs)
+
+    def stats(self):
+        return dict(
+            self._listener.snapshot(),
+            connected=self._client is not None and self._pid == os.getpid(),
+            pid=self._pid,
+            max_pool_size=self.max_pool_size,
+            min_pool_size=self.min_pool_size,
+        )
+
+    def close(self):
+        with self._lock:
+            if self._client is not None and self._pid == os.getpid():
+                self._client.close()
+            self._reset()
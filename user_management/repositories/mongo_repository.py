@@ -1,18 +1,601 @@
+import datetime
+import time
 from abc import ABC, abstractmethod
-from flask_pymongo import PyMongo
+from bson.objectid import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.database import Database
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from .pagination import keyset_page, keyset_pipeline_page
+
+# Sayfalama için desteklenen sıralamalar; son alan her zaman benzersiz olmalı (_id)
+PRODUCT_SORTS = {
+    'id': [('_id', 1)],
+    'newest': [('created_at', -1), ('_id', -1)],
+    'price_asc': [('price', 1), ('_id', 1)],
+    'price_desc': [('price', -1), ('_id', -1)],
+    'supplier': [('created_by', 1), ('price', 1), ('_id', 1)],
+}
+
+# Fiyat filtresi varken her sıralamayı karşılayan indeks (migrations/mongo_indexes.py).
+# Planlayıcı products_price_id'yi seçip sonuçları bellekte sıralayabilir; hint bunu önler.
+# Tüm indeksler price içerir, fiyat aralığı doküman okunmadan indeks anahtarından elenir.
+PRODUCT_SORT_INDEXES = {
+    'id': 'products_id_price',
+    'newest': 'products_created_at_id_price',
+    'price_asc': 'products_price_id',
+    'price_desc': 'products_price_id',
+    'supplier': 'products_created_by_price_id',
+}
+
+# Arama sonuçları alaka puanına göre (en alakalı önce); eşit puanlarda _id sırası
+SEARCH_SORT = [('score', -1), ('_id', 1)]
+
+# Liste görünümlerinde açıklamanın en fazla bu kadar karakteri gönderilir
+DESCRIPTION_PREVIEW_LENGTH = 160
+
+
+def listing_projection(preview_length=DESCRIPTION_PREVIEW_LENGTH):
+    # Ürün kartı yalnızca ad, fiyat ve kısa açıklama gösterir; uzun açıklama ve
+    # audit alanları (created_at, user_id...) sunucuda kırpılır, ağa çıkmaz
+    return {
+        'name': 1,
+        'price': 1,
+        'created_by': 1,
+        'short_description': {'$substrCP': [{'$ifNull': ['$description', '']}, 0, preview_length]},
+    }
+
+
+def price_query(min_price=None, max_price=None):
+    # Fiyat aralığı filtresi; sınır verilmezse boş sözlük
+    price = {}
+    if min_price is not None:
+        price['$gte'] = min_price
+    if max_price is not None:
+        price['$lte'] = max_price
+    return {'price': price} if price else {}
+
 
 class MongoBaseRepository(ABC):
     @abstractmethod
     def find_all(self):
         pass
 
+# Sepete eklerken gereken ürün alanları
+SNAPSHOT_PROJECTION = {'name': 1, 'price': 1}
+
+# Çok dokümanlı okumalarda sunucudan tek seferde istenen en fazla doküman;
+# varsayılan ilk batch (101 doküman) büyük $in sorgularını birden fazla getMore'a böler
+MAX_BATCH_SIZE = 1000
+
+# Mevcut indeks adlarının yeniden okunma aralığı (saniye); migration sonrası hint'ler kendiliğinden açılır
+INDEX_NAMES_TTL = 60
+
+
 class MongoProductRepository(MongoBaseRepository):
-    def __init__(self, mongo: PyMongo):
-        self.collection = mongo.db.products
+    def __init__(self, db: Database):
+        self.collection = db['products']
+        self._index_names = None
+        self._index_names_until = 0
 
-    def find_all(self):
+    def _sort_hint(self, sort):
+        # Sıralamanın indeksi veritabanında yoksa (migration henüz çalışmadı ya da indeks yeniden
+        # adlandırıldı) hint verilmez; olmayan indekse hint sorguyu OperationFailure ile düşürür
+        now = time.monotonic()
+        if self._index_names is None or now >= self._index_names_until:
+            try:
+                self._index_names = set(self.collection.index_information())
+            except OperationFailure:
+                self._index_names = set()
+            self._index_names_until = now + INDEX_NAMES_TTL
+        name = PRODUCT_SORT_INDEXES[sort]
+        return name if name in self._index_names else None
+
+    def find_all(self, projection=None, batch_size=MAX_BATCH_SIZE):
         try:
-            return list(self.collection.find({}, {'_id': 0}))
+            return list(self.collection.find({}, projection or {'_id': 0}).batch_size(batch_size))
         except Exception as e:
             print(f"Ürün listeleme hatası: {str(e)}")
-            return []
\ No newline at end of file
+            return []
+
+    def find_by_id(self, product_id, projection=None):
+        # Detay görünümü: projeksiyon verilmezse dokümanın tamamı döner
+        try:
+            return self.collection.find_one({'_id': ObjectId(product_id)}, projection)
+        except InvalidId:
+            return None
+
+    def find_by_ids(self, product_ids, projection=None):
+        # Tek $in sorgusuyla birden fazla ürün; id (str) -> ürün sözlüğü döner
+        object_ids = []
+        for product_id in dict.fromkeys(str(product_id) for product_id in product_ids):
+            try:
+                object_ids.append(ObjectId(product_id))
+            except InvalidId:
+                continue
+        if not object_ids:
+            return {}
+        cursor = self.collection.find({'_id': {'$in': object_ids}}, projection).batch_size(
+            min(len(object_ids), MAX_BATCH_SIZE)
+        )
+        return {str(product['_id']): product for product in cursor}
+
+    def find_snapshot(self, product_id):
+        # add_to_cart için ürünün yalnızca ad/fiyat bilgisi
+        return self.find_by_id(product_id, SNAPSHOT_PROJECTION)
+
+    def insert(self, product):
+        return self.collection.insert_one(product).inserted_id
+
+    def insert_many(self, products):
+        # Sırasız toplu ekleme: hatalı doküman diğerlerini durdurmaz, batch tek round trip'tir.
+        # Başarısız dokümanların (sıra, mesaj) listesi döner.
+        try:
+            self.collection.insert_many(products, ordered=False)
+            return []
+        except BulkWriteError as e:
+            return [(error['index'], error['errmsg']) for error in e.details.get('writeErrors', [])]
+
+    def delete_owned(self, product_id, username):
+        # Sahiplik kontrolü filtrenin parçası: find_one + delete_one yerine tek round trip.
+        # Ürün yoksa ya da başkasına aitse False döner.
+        try:
+            result = self.collection.delete_one({'_id': ObjectId(product_id), 'created_by': username})
+        except InvalidId:
+            return False
+        return bool(result.deleted_count)
+
+    def find_listing_page(self, preview_length=DESCRIPTION_PREVIEW_LENGTH, **kwargs):
+        return self.find_page(projection=listing_projection(preview_length), **kwargs)
+
+    def find_page(self, after=None, before=None, limit=20, sort='id', query=None, projection=None,
+                  min_price=None, max_price=None):
+        # Keyset sayfalama: koleksiyonun tamamı okunmaz, skip() kullanılmaz.
+        # after/before önceki yanıttaki next/prev imleçleridir (ValueError: geçersiz imleç).
+        price = price_query(min_price, max_price)
+        if price:
+            query = dict(query or {}, **price)
+        hint = self._sort_hint(sort) if query else None
+        try:
+            return keyset_page(self.collection, PRODUCT_SORTS[sort], after=after, before=before,
+                               limit=limit, query=query, projection=projection, hint=hint)
+        except OperationFailure:
+            if not hint:
+                raise
+            # İndeks son okumadan sonra silindi; hint'siz tekrar denenir, adlar yeniden okunur
+            self._index_names = None
+            return keyset_page(self.collection, PRODUCT_SORTS[sort], after=after, before=before,
+                               limit=limit, query=query, projection=projection)
+
+    def iter_listing(self, sort='id', min_price=None, max_price=None,
+                     preview_length=DESCRIPTION_PREVIEW_LENGTH, batch_size=MAX_BATCH_SIZE):
+        # Filtreye uyan tüm ürünler liste alanlarıyla; list() yapılmaz, cursor döner.
+        # Dokümanlar sunucudan batch_size'lık parçalarla, tüketildikçe çekilir.
+        query = price_query(min_price, max_price)
+        cursor = self.collection.find(query, listing_projection(preview_length)).sort(
+            PRODUCT_SORTS[sort]
+        ).batch_size(batch_size)
+        hint = self._sort_hint(sort) if query else None
+        if hint:
+            cursor = cursor.hint(hint)
+        return cursor
+
+    def iter_export(self, fields, created_by=None, after_id=None, batch_size=MAX_BATCH_SIZE):
+        # Dışa aktarım: _id sırasıyla, istenen alanlarla cursor. after_id'den (hariç) devam eder;
+        # her batch _id indeksinden (tedarikçi filtresiyle products_created_by_id) okunur.
+        # ValueError: geçersiz after_id
+        query = {}
+        if created_by is not None:
+            query['created_by'] = created_by
+        if after_id:
+            try:
+                query['_id'] = {'$gt': ObjectId(after_id)}
+            except (InvalidId, TypeError) as e:
+                raise ValueError("Geçersiz ürün id") from e
+        return self.collection.find(query, {field: 1 for field in fields}).sort('_id', 1).hint(
+            'products_created_by_id' if created_by is not None else '_id_'
+        ).batch_size(batch_size)
+
+    def search_page(self, text, after=None, before=None, limit=20, preview_length=DESCRIPTION_PREVIEW_LENGTH):
+        # name/description üzerindeki text indeksiyle arama (products_text).
+        # Eşleşenler hemen liste alanlarına indirilir; uzun açıklamalar sıralamaya taşınmaz.
+        # ValueError: geçersiz sayfa imleci.
+        projection = dict(listing_projection(preview_length), score={'$meta': 'textScore'})
+        pipeline = [
+            {'$match': {'$text': {'$search': text}}},
+            {'$project': projection},
+        ]
+        return keyset_pipeline_page(self.collection, pipeline, SEARCH_SORT,
+                                    after=after, before=before, limit=limit)
+
+
+# Sepet sayfasında gösterilen alanlar
+CART_LINE_PROJECTION = {'name': 1, 'price': 1, 'quantity': 1, 'product_id': 1}
+
+
+class MongoCartRepository:
+    def __init__(self, db: Database):
+        self.collection = db['cart']
+
+    def cart_summary(self, user_id):
+        # Satırlar, toplam tutar ve ürün adedi tek aggregation (tek round trip) ile;
+        # toplam Python'da değil sunucuda hesaplanır
+        result = next(self.collection.aggregate([
+            {'$match': {'user_id': user_id}},
+            {'$facet': {
+                'items': [
+                    {'$sort': {'added_at': 1, '_id': 1}},
+                    {'$project': CART_LINE_PROJECTION},
+                ],
+                'totals': [
+                    {'$group': {
+                        '_id': None,
+                        'total': {'$sum': {'$multiply': ['$price', '$quantity']}},
+                        'item_count': {'$sum': '$quantity'},
+                    }},
+                ],
+            }},
+        ]), None)
+        totals = result['totals'][0] if result and result['totals'] else {}
+        return {
+            'items': result['items'] if result else [],
+            'total': totals.get('total', 0),
+            'item_count': totals.get('item_count', 0),
+        }
+
+    def find_lines(self, user_id, projection=None, batch_size=MAX_BATCH_SIZE):
+        return list(self.collection.find(
+            {'user_id': user_id}, projection or CART_LINE_PROJECTION
+        ).batch_size(batch_size))
+
+    def clear(self, user_id):
+        # Sepetin tamamı tek delete_many ile silinir
+        return self.collection.delete_many({'user_id': user_id})
+
+    def upsert_cart_line(self, user_id, product, quantity=1):
+        # Tek round trip: satır varsa miktar artar, yoksa oluşturulur.
+        # cart(user_id, product_id) unique indeksi eş zamanlı eklemelerde tek satırı garanti eder.
+        filter_ = {'user_id': user_id, 'product_id': str(product['_id'])}
+        update = {
+            '$inc': {'quantity': quantity},
+            '$setOnInsert': {
+                'name': product['name'],
+                'price': product['price'],
+                'added_at': datetime.datetime.utcnow(),
+            },
+        }
+        try:
+            return self.collection.update_one(filter_, update, upsert=True)
+        except DuplicateKeyError:
+            # Aynı anda gelen başka bir upsert satırı oluşturdu; artık güncelleme yeterli
+            return self.collection.update_one(filter_, {'$inc': {'quantity': quantity}})
+
+    def remove_line(self, user_id, item_id):
+        # Silinen satırı (e-posta için adıyla) tek round trip'te döner; yoksa None
+        try:
+            return self.collection.find_one_and_delete(
+                {'_id': ObjectId(item_id), 'user_id': user_id}, projection=CART_LINE_PROJECTION
+            )
+        except InvalidId:
+            return None
+
+    def set_quantity(self, user_id, item_id, quantity):
+        # Güncellenen satırı tek round trip'te döner; yoksa None
+        try:
+            return self.collection.find_one_and_update(
+                {'_id': ObjectId(item_id), 'user_id': user_id},
+                {'$set': {'quantity': quantity}},
+                projection=CART_LINE_PROJECTION,
+                return_document=ReturnDocument.AFTER,
+            )
+        except InvalidId:
+            return None
+
+
+# Sipariş geçmişi en yeniden eskiye; orders(user_id, created_at, _id) indeksiyle karşılanır
+ORDER_SORT = [('created_at', -1), ('_id', -1)]
+
+
+class MongoOrderRepository:
+    def __init__(self, db: Database):
+        self.db = db
+        self.collection = db['orders']
+        self.cart_collection = db['cart']
+        self._transactions = None
+
+    def supports_transactions(self):
+        # Transaction yalnızca replica set / sharded cluster üzerinde kullanılabilir
+        if self._transactions is None:
+            hello = self.db.client.admin.command('hello')
+            self._transactions = 'setName' in hello or hello.get('msg') == 'isdbgrid'
+        return self._transactions
+
+    def place_order(self, order, user_id, lines):
+        # Sipariş (başlık + satırlar tek doküman) yazımı ve sepetin düşülmesi birlikte yapılır.
+        # Transaction desteklenmiyorsa önce sipariş yazılır, sonra sepet düşülür.
+        # Sepetin tamamı silinmez: `lines` (siparişe giren sepet satırları) okunduktan sonra
+        # eklenen satırlar ve artırılan miktarlar sepette kalır.
+        def write(session=None):
+            self.collection.insert_one(order, session=session)
+            # Okunduğundan beri değişmeyen satırlar (olağan durum) tek delete_many ile silinir
+            deleted = self.cart_collection.delete_many({'user_id': user_id, '$or': [
+                {'_id': line['_id'], 'quantity': line['quantity']} for line in lines
+            ]}, session=session).deleted_count
+            if deleted == len(lines):
+                return
+            # Arada miktarı değişen satırlardan yalnızca siparişe giren miktar düşülür
+            for line in lines:
+                self.cart_collection.update_one({'_id': line['_id'], 'user_id': user_id},
+                                                {'$inc': {'quantity': -line['quantity']}}, session=session)
+            self.cart_collection.delete_many({'_id': {'$in': [line['_id'] for line in lines]},
+                                              'user_id': user_id, 'quantity': {'$lte': 0}}, session=session)
+
+        if self.supports_transactions():
+            with self.db.client.start_session() as session:
+                session.with_transaction(write)
+        else:
+            write()
+        return order['_id']
+
+    def find_page(self, user_id, after=None, before=None, limit=10):
+        return keyset_page(self.collection, ORDER_SORT, after=after, before=before,
+                           limit=limit, query={'user_id': user_id})
+
+
+# Satış özetleri: kapsam (supplier/product/store), anahtar ve gün başına sayaçlar.
+# day='all' dokümanları tüm zamanların toplamıdır; panel yalnızca bunları okur.
+ROLLUP_ALL_TIME = 'all'
+ROLLUP_REBUILD_BATCH_SIZE = 1000
+
+
+def rollup_increments(order):
+    # Bir siparişin özet sayaçlarına katkısı: {(kapsam, anahtar, gün): sayaçlar}
+    day = order['created_at'].strftime('%Y-%m-%d')
+    increments = {}
+
+    def add(scope, key, name, revenue, units, orders):
+        for bucket in (day, ROLLUP_ALL_TIME):
+            counters = increments.setdefault((scope, key, bucket), {
+                'name': name, 'revenue': 0, 'units': 0, 'orders': 0,
+            })
+            counters['revenue'] += revenue
+            counters['units'] += units
+            counters['orders'] += orders
+
+    suppliers = set()
+    for line in order['lines']:
+        add('product', line['product_id'], line['name'], line['line_total'], line['quantity'], 1)
+        if line.get('supplier_id') is not None:
+            # Tedarikçinin sipariş sayısı sipariş başına bir kez artar
+            first = line['supplier_id'] not in suppliers
+            suppliers.add(line['supplier_id'])
+            add('supplier', line['supplier_id'], line.get('supplier'),
+                line['line_total'], line['quantity'], 1 if first else 0)
+    add('store', None, None, order['total'], order['item_count'], 1)
+    return increments
+
+
+class MongoSalesRollupRepository:
+    def __init__(self, db: Database):
+        self.db = db
+        self.collection = db['sales_rollups']
+
+    def record_order(self, order):
+        # Tüm sayaçlar tek unordered bulk_write ile $inc upsert edilir;
+        # sales_rollups(scope, key, day) unique indeksi satır başına tek doküman sağlar
+        operations = [
+            UpdateOne(
+                {'scope': scope, 'key': key, 'day': day},
+                {
+                    '$inc': {field: counters[field] for field in ('revenue', 'units', 'orders')},
+                    '$set': {'name': counters['name']},
+                },
+                upsert=True,
+            )
+            for (scope, key, day), counters in rollup_increments(order).items()
+        ]
+        return self.collection.bulk_write(operations, ordered=False)
+
+    def totals(self, scope, limit=None):
+        # Tüm zamanlar toplamları, gelire göre azalan
+        cursor = self.collection.find(
+            {'scope': scope, 'day': ROLLUP_ALL_TIME}, {'_id': 0}
+        ).sort([('revenue', -1)])
+        if limit:
+            cursor = cursor.limit(limit)
+        return list(cursor)
+
+    def daily(self, scope='store', key=None, days=14):
+        # Son `days` günün günlük sayaçları, en yeni önce
+        since = (datetime.datetime.utcnow() - datetime.timedelta(days=days - 1)).strftime('%Y-%m-%d')
+        return list(self.collection.find(
+            {'scope': scope, 'key': key, 'day': {'$gte': since, '$ne': ROLLUP_ALL_TIME}}, {'_id': 0}
+        ).sort([('day', -1)]))
+
+    def rebuild(self, indexes=(), orders_collection=None, batch_size=ROLLUP_REBUILD_BATCH_SIZE):
+        # Özetleri ham siparişlerden yeniden hesaplar. Sonuç geçici koleksiyona yazılıp
+        # renameCollection ile tek adımda yerine konur; okuyucular yarım veri görmez.
+        # Yeniden hesaplama sürerken gelen siparişlerin artışları kaybolur, bu yüzden
+        # bakım penceresinde çalıştırılmalıdır. Dönen değer: (sipariş sayısı, doküman sayısı)
+        orders_collection = orders_collection if orders_collection is not None else self.db['orders']
+        merged = {}
+        order_count = 0
+        for order in orders_collection.find(
+            {}, {'created_at': 1, 'lines': 1, 'total': 1, 'item_count': 1}
+        ).batch_size(batch_size):
+            order_count += 1
+            for key, counters in rollup_increments(order).items():
+                target = merged.setdefault(key, {'name': counters['name'], 'revenue': 0, 'units': 0, 'orders': 0})
+                for field in ('revenue', 'units', 'orders'):
+                    target[field] += counters[field]
+
+        staging = self.db[f'{self.collection.name}_rebuild']
+        staging.drop()
+        documents = [
+            dict(counters, scope=scope, key=key, day=day)
+            for (scope, key, day), counters in merged.items()
+        ]
+        for start in range(0, len(documents), batch_size):
+            staging.insert_many(documents[start:start + batch_size], ordered=False)
+        if documents:
+            # İndeksler yeniden adlandırmayla birlikte taşınır
+            if indexes:
+                staging.create_indexes(list(indexes))
+            staging.rename(self.collection.name, dropTarget=True)
+        else:
+            staging.drop()
+            self.collection.delete_many({})
+        return order_count, len(documents)
+
+
+# E-posta kuyruğu durumları: pending (gönderilecek) -> sending (bir worker'da) -> sent | failed
+OUTBOX_PENDING = 'pending'
+OUTBOX_SENDING = 'sending'
+OUTBOX_SENT = 'sent'
+OUTBOX_FAILED = 'failed'
+
+
+class MongoMailOutboxRepository:
+    # Kalıcı e-posta kuyruğu: istek yalnızca kuyruğa yazar, SMTP'yi arka plandaki worker'lar
+    # konuşur. Yeniden başlatmada bekleyen ve yarıda kalan (kirası dolan) iletiler kaybolmaz.
+    def __init__(self, db: Database):
+        self.collection = db['mail_outbox']
+
+    def enqueue(self, message, now=None):
+        now = now or datetime.datetime.utcnow()
+        document = dict(message, status=OUTBOX_PENDING, attempts=0, created_at=now, next_attempt_at=now)
+        return self.collection.insert_one(document).inserted_id
+
+    def claim(self, lease_seconds, now=None):
+        # Zamanı gelmiş ilk iletiyi kiralar. Gönderirken çöken worker'ın iletisi kira
+        # dolunca (next_attempt_at) yeniden alınır. Her kiralama bir deneme sayılır; böylece
+        # worker'ı çökerten ileti de deneme sınırına takılır. Kuyruk boşsa None.
+        now = now or datetime.datetime.utcnow()
+        return self.collection.find_one_and_update(
+            {'status': {'$in': [OUTBOX_PENDING, OUTBOX_SENDING]}, 'next_attempt_at': {'$lte': now}},
+            {'$set': {
+                'status': OUTBOX_SENDING,
+                'lease_id': ObjectId(),
+                'next_attempt_at': now + datetime.timedelta(seconds=lease_seconds),
+            }, '$inc': {'attempts': 1}},
+            sort=[('next_attempt_at', 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    def _finish(self, message, update):
+        # Kirası başka bir worker'a geçmiş iletinin durumu ezilmez; o durumda False
+        result = self.collection.update_one(
+            {'_id': message['_id'], 'lease_id': message['lease_id']}, update
+        )
+        return bool(result.modified_count)
+
+    def mark_sent(self, message, now=None):
+        return self._finish(message, {
+            '$set': {'status': OUTBOX_SENT, 'sent_at': now or datetime.datetime.utcnow()},
+            '$unset': {'lease_id': '', 'last_error': ''},
+        })
+
+    def mark_retry(self, message, next_attempt_at, error):
+        return self._finish(message, {
+            '$set': {'status': OUTBOX_PENDING, 'next_attempt_at': next_attempt_at, 'last_error': error},
+            '$unset': {'lease_id': ''},
+        })
+
+    def mark_failed(self, message, error):
+        return self._finish(message, {
+            '$set': {'status': OUTBOX_FAILED, 'last_error': error},
+            '$unset': {'lease_id': ''},
+        })
+
+    def depth(self, now=None):
+        # Durum başına ileti sayısı ve en eski gönderilmeyi bekleyen iletinin gecikmesi (saniye);
+        # sorgular (status, next_attempt_at) indeksinden karşılanır
+        now = now or datetime.datetime.utcnow()
+        depth = {status: self.collection.count_documents({'status': status})
+                 for status in (OUTBOX_PENDING, OUTBOX_SENDING, OUTBOX_FAILED)}
+        oldest = self.collection.find_one({'status': OUTBOX_PENDING, 'next_attempt_at': {'$lte': now}},
+                                          {'created_at': 1}, sort=[('next_attempt_at', 1)])
+        depth['oldest_due_seconds'] = (now - oldest['created_at']).total_seconds() if oldest else 0
+        return depth
+
+
+class MongoCartDigestRepository:
+    # Sepet hareketlerini kullanıcı başına tek dokümanda biriktirir (_id = user_id).
+    # İlk hareket pencereyi açar (due_at); sonraki hareketler aynı dokümana eklenir.
+    # Pencere dolunca doküman kiralanır, özet kuyruğa yazıldıktan sonra gönderilen hareketler
+    # düşülür. Kuyruğa yazılamazsa kira dolunca özet yeniden denenir; hareket kaybolmaz.
+    MAX_EVENTS = 100
+
+    def __init__(self, db: Database):
+        self.collection = db['cart_digests']
+
+    def record(self, user_id, email, event, window_seconds, now=None):
+        now = now or datetime.datetime.utcnow()
+        update = {
+            '$push': {'events': {'$each': [event], '$slice': -self.MAX_EVENTS}},
+            '$inc': {'event_count': 1},
+            '$set': {'email': email},
+            '$setOnInsert': {'first_at': now, 'due_at': now + datetime.timedelta(seconds=window_seconds)},
+        }
+        try:
+            self.collection.update_one({'_id': user_id}, update, upsert=True)
+        except DuplicateKeyError:
+            # Aynı kullanıcının eşzamanlı ilk iki hareketi: ikisi de upsert etmeye çalıştı
+            self.collection.update_one({'_id': user_id}, update)
+
+    def claim_due(self, lease_seconds, now=None):
+        # Penceresi dolmuş bir kullanıcının özetini kiralar (due_at kira sonuna ertelenir,
+        # başka süreç aynı özeti almaz); yoksa None
+        now = now or datetime.datetime.utcnow()
+        return self.collection.find_one_and_update(
+            {'due_at': {'$lte': now}},
+            {'$set': {'due_at': now + datetime.timedelta(seconds=lease_seconds)}},
+            sort=[('due_at', 1)],
+        )
+
+    def finish(self, digest, window_seconds, now=None):
+        # Özeti gönderilen hareketleri düşer. Kiralamadan sonra gelen hareketler silinmez;
+        # doküman onlarla yeni bir pencere açar.
+        now = now or datetime.datetime.utcnow()
+        sent = digest['event_count']
+        while True:
+            if self.collection.delete_one({'_id': digest['_id'], 'event_count': sent}).deleted_count:
+                return
+            current = self.collection.find_one({'_id': digest['_id']}, {'event_count': 1})
+            if current is None:
+                return
+            count = current['event_count']
+            result = self.collection.update_one({'_id': digest['_id'], 'event_count': count}, {
+                '$push': {'events': {'$each': [], '$slice': -(count - sent)}},
+                '$inc': {'event_count': -sent},
+                '$set': {'first_at': now, 'due_at': now + datetime.timedelta(seconds=window_seconds)},
+            })
+            if result.modified_count:
+                return
+            # Arada yeni bir hareket geldi; güncel sayıyla yeniden denenir
+
+    def pending(self):
+        return self.collection.count_documents({})
+
+
+class MongoCacheVersionRepository:
+    # Önbellek/ETag sürüm sayaçları (_id = ad alanı). Sayaçlar MongoDB'de durduğu için tüm
+    # makinelerde ve product_management gibi aynı veritabanına yazan diğer uygulamalarda aynıdır.
+    def __init__(self, db: Database):
+        self.collection = db['cache_versions']
+
+    def version(self, namespace):
+        # (sürüm, son değişiklik zamanı - epoch saniye); hiç değişmemiş ad alanı için (0, None)
+        document = self.collection.find_one({'_id': namespace})
+        if document is None:
+            return 0, None
+        updated_at = document['updated_at'].replace(tzinfo=datetime.timezone.utc).timestamp()
+        return document['version'], updated_at
+
+    def bump(self, namespace, now=None):
+        update = {'$inc': {'version': 1}, '$set': {'updated_at': now or datetime.datetime.utcnow()}}
+        try:
+            self.collection.update_one({'_id': namespace}, update, upsert=True)
+        except DuplicateKeyError:
+            # Aynı ad alanının eşzamanlı ilk iki artırımı: ikisi de upsert etmeye çalıştı
+            self.collection.update_one({'_id': namespace}, update)
@@ -0,0 +1,204 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import MySQLdb
+from MySQLdb.constants import CLIENT
+
+
+class PoolExhaustedError(Exception):
+    pass
+
+
+class MySQLConnectionPool:
+    def __init__(self, host, user, password, db=None, port=3306,
+                 min_size=1, max_size=10, idle_timeout=300, checkout_timeout=5,
+                 health_check_interval=30, connect=None):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Geçersiz havuz boyutu: min_size <= max_size ve max_size >= 1 olmalı")
+
+        self.host = host
+        self.user = user
+        self.password = password
+        self.db = db
+        self.port = port
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        # Bu süreden kısa boşta kalan bağlantılara ping atılmaz (fazladan round trip olmasın)
+        self.health_check_interval = health_check_interval
+        self._connect = connect or self._default_connect
+
+        self._lock = threading.Condition()
+        self._idle = []        # (bağlantı, son kullanım zamanı) çiftleri, LIFO
+        self._size = 0         # açık bağlantı sayısı (boşta + kullanımda)
+        self._in_use = 0
+        self._stats = {
+            'created': 0,
+            'closed': 0,
+            'checkouts': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'health_check_failures': 0,
+            'idle_evictions': 0,
+        }
+
+    @classmethod
+    def from_config(cls, config, **kwargs):
+        return cls(
+            host=config.MYSQL_HOST,
+            user=config.MYSQL_USER,
+            password=config.MYSQL_PASSWORD,
+            db=config.MYSQL_DB,
+            port=config.MYSQL_PORT,
+            min_size=config.MYSQL_POOL_MIN_SIZE,
+            max_size=config.MYSQL_POOL_MAX_SIZE,
+            idle_timeout=config.MYSQL_POOL_IDLE_TIMEOUT,
+            checkout_timeout=config.MYSQL_POOL_CHECKOUT_TIMEOUT,
+            health_check_interval=config.MYSQL_POOL_HEALTH_CHECK_INTERVAL,
+            **kwargs
+        )
+
+    def _default_connect(self):
+        params = {
+            'host': self.host or 'localhost',
+            'user': self.user,
+            'passwd': self.password or '',
+            'port': self.port,
+            'charset': 'utf8mb4',
+            # UPDATE sonrası rowcount, değişen değil eşleşen satır sayısını versin
+            'client_flag': CLIENT.FOUND_ROWS,
+        }
+        if self.db:
+            params['db'] = self.db
+        return MySQLdb.connect(**params)
+
+    def _open(self):
+        conn = self._connect()
+        self._stats['created'] += 1
+        return conn
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        self._stats['closed'] += 1
+
+    def _is_healthy(self, conn):
+        try:
+            conn.ping()
+            return True
+        except Exception:
+            self._stats['health_check_failures'] += 1
+            return False
+
+    def acquire(self):
+        deadline = time.monotonic() + self.checkout_timeout
+        with self._lock:
+            while True:
+                while self._idle:
+                    conn, last_used = self._idle.pop()
+                    idle_for = time.monotonic() - last_used
+                    expired = idle_for > self.idle_timeout
+                    if expired:
+                        self._stats['idle_evictions'] += 1
+                    needs_check = idle_for >= self.health_check_interval
+                    if expired or (needs_check and not self._is_healthy(conn)):
+                        self._size -= 1
+                        self._close(conn)
+                        continue
+                    self._in_use += 1
+                    self._stats['checkouts'] += 1
+                    return conn
+
+                if self._size < self.max_size:
+                    # Bağlantı kilit dışında açılır; yer önceden ayrılır
+                    self._size += 1
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolExhaustedError(
+                        f"MySQL bağlantı havuzu dolu ({self.max_size}), {self.checkout_timeout} sn beklendi"
+                    )
+                self._stats['waits'] += 1
+                self._lock.wait(remaining)
+
+        try:
+            conn = self._open()
+        except Exception:
+            with self._lock:
+                self._size -= 1
+                self._lock.notify()
+            raise
+
+        with self._lock:
+            self._in_use += 1
+            self._stats['checkouts'] += 1
+        return conn
+
+    def release(self, conn, discard=False):
+        with self._lock:
+            self._in_use -= 1
+            if discard:
+                self._size -= 1
+                self._close(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+                self._trim_idle()
+            self._lock.notify()
+
+    def _trim_idle(self):
+        # min_size üzerindeki, idle_timeout süresini aşmış bağlantıları kapat
+        now = time.monotonic()
+        keep = []
+        for conn, last_used in self._idle:
+            if now - last_used > self.idle_timeout and self._size > self.min_size:
+                self._size -= 1
+                self._stats['idle_evictions'] += 1
+                self._close(conn)
+            else:
+                keep.append((conn, last_used))
+        self._idle = keep
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        except MySQLdb.OperationalError:
+            # Bağlantı kopmuş olabilir, havuza geri koyma
+            self.release(conn, discard=True)
+            raise
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception:
+                self.release(conn, discard=True)
+                raise
+            self.release(conn)
+            raise
+        else:
+            self.release(conn)
+
+    def stats(self):
+        with self._lock:
+            return dict(
+                self._stats,
+                size=self._size,
+                idle=len(self._idle),
+                in_use=self._in_use,
+                min_size=self.min_size,
+                max_size=self.max_size,
+            )
+
+    def close(self):
+        with self._lock:
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._size -= 1
+                self._close(conn)
+            self._lock.notify_all()
@@ -1,156 +1,199 @@
 from abc import ABC, abstractmethod
-from flask_mysqldb import MySQL
+import MySQLdb
+from .mysql_pool import MySQLConnectionPool
+from .cache import LRUCache
+from . import mysql_statements as sql
+
+# MySQL ER_DUP_ENTRY hata kodu
+DUPLICATE_ENTRY = 1062
+
+
+class DuplicateEntryError(Exception):
+    def __init__(self, field, message=None):
+        super().__init__(message or f"{field} zaten kullanılıyor")
+        self.field = field
+
+
+def _duplicate_field(error):
+    # "Duplicate entry 'x' for key 'users.email'" -> 'email'
+    message = str(error.args[1]) if len(error.args) > 1 else str(error)
+    key = message.rsplit("for key", 1)[-1]
+    for field in ('username', 'email'):
+        if field in key:
+            return field
+    return None
+
 
 class BaseRepository(ABC):
     @abstractmethod
     def save(self, data):
         pass
-    
+
     @abstractmethod
     def find_by_username(self, username):
         pass
 
 class MySQLUserRepository(BaseRepository):
-    def __init__(self, mysql: MySQL):
-        self.mysql = mysql
-    
+    def __init__(self, pool: MySQLConnectionPool, cache: LRUCache = None):
+        self.pool = pool
+        # Önbellekte şifre hash'i tutulmaz; hash gereken okumalar fresh=True ile
+        # her zaman MySQL'e gider
+        self.cache = cache
+
+    def _fetch_user(self, query, params, to_user=sql.row_to_user):
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            user = cursor.fetchone()
+            cursor.close()
+        return to_user(user)
+
+    def _cached_lookup(self, field, value, query, credentials_query, fresh=False):
+        # fresh=False: önbellekten ya da hash'siz sorguyla profil (password alanı yok).
+        # fresh=True: kimlik doğrulama için her zaman MySQL'den, şifre hash'iyle birlikte.
+        if fresh:
+            version = self.cache.version() if self.cache is not None else None
+            user = self._fetch_user(credentials_query, (value,))
+        else:
+            key = (field, str(value))
+            cached = self.cache.get(key) if self.cache is not None else None
+            if cached is not None:
+                return dict(cached)
+            version = self.cache.version() if self.cache is not None else None
+            user = self._fetch_user(query, (value,), sql.row_to_profile)
+        if user and self.cache is not None:
+            self._cache_user(user, version)
+        return user
+
+    def _cache_user(self, user, version):
+        profile = {k: v for k, v in user.items() if k != 'password'}
+        tags = (('user', str(user['id'])),)
+        for cache_key in (('id', str(user['id'])), ('username', user['username']), ('email', user['email'])):
+            self.cache.set(cache_key, profile, tags=tags, if_version=version)
+
+    def _invalidate(self, user_id):
+        if self.cache is not None:
+            self.cache.invalidate_tag(('user', str(user_id)))
+
     def save(self, data):
         try:
-            cursor = self.mysql.connection.cursor()
-            cursor.execute("USE user_management")
-            cursor.execute(
-                "INSERT INTO users (username, password, email, user_type) VALUES (%s, %s, %s, %s)",
-                (data['username'], data['password'], data['email'], data['user_type'])
-            )
-            self.mysql.connection.commit()
-            cursor.close()
-            return True
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    sql.INSERT_USER,
+                    (data['username'], data['password'], data['email'], data['user_type'])
+                )
+                conn.commit()
+                cursor.close()
+                return True
         except Exception as e:
             print(f"Kayıt hatası: {str(e)}")
             return False
-    
-    def find_by_username(self, username):
+
+    def find_by_username(self, username, fresh=False):
         try:
-            cursor = self.mysql.connection.cursor()
-            cursor.execute("USE user_management")
-            cursor.execute(
-                "SELECT id, username, password, email, user_type FROM users WHERE username = %s",
-                (username,)
-            )
-            user = cursor.fetchone()
-            cursor.close()
-            if user:
-                return {
-                    'id': user[0],
-                    'username': user[1],
-                    'password': user[2],
-                    'email': user[3],
-                    'user_type': user[4],
-                }
-            return None
+            return self._cached_lookup('username', username, sql.FIND_BY_USERNAME,
+                                       sql.FIND_CREDENTIALS_BY_USERNAME, fresh)
         except Exception as e:
             print(f"Arama hatası: {str(e)}")
             return None
-        
+
     def get_user_mail(self, email):
         try:
-            cursor = self.mysql.connection.cursor()
-            cursor.execute("USE user_management")
-            cursor.execute(
-                "SELECT id, username, password, email, user_type FROM users WHERE email = %s",  
-                (email,)
-            )
-            user = cursor.fetchone()
-            cursor.close()
-        
-            if user:
-                return {
-                    'id': user[0],           
-                    'username': user[1],
-                    'password': user[2],     
-                    'email': user[3],
-                    'user_type': user[4],
-                }
-            return None
+            return self._cached_lookup('email', email, sql.FIND_BY_EMAIL, sql.FIND_CREDENTIALS_BY_EMAIL)
         except Exception as e:
             print(f"Arama hatası: {str(e)}")
             return None
+
     def update_password(self, user_id, new_hashed_password):
         try:
-            cursor = self.mysql.connection.cursor()
-            cursor.execute("USE user_management")
-            query = "UPDATE users SET password = %s WHERE id = %s"
-            cursor.execute(query, (new_hashed_password, user_id))
-            self.mysql.connection.commit()
-            cursor.close()
-            return True
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(sql.UPDATE_PASSWORD, (new_hashed_password, user_id))
+                conn.commit()
+                cursor.close()
+                return True
         except Exception as e:
             print(f"Şifre güncelleme hatası: {str(e)}")
             return False
+        finally:
+            self._invalidate(user_id)
 
-    
-    def find_by_id(self, user_id):
+
+    def find_by_id(self, user_id, fresh=False):
         try:
-            cursor = self.mysql.connection.cursor()
-            cursor.execute("USE user_management")
-            cursor.execute(
-                "SELECT id, username, password, email, user_type FROM users WHERE id = %s",
-                (user_id,)
-            )
-            user = cursor.fetchone()
-            cursor.close()
-            if user:
-                return {
-                    'id': user[0],
-                    'username': user[1],
-                    'password': user[2],
-                    'email': user[3],
-                    'user_type': user[4],
-                }
-            return None
+            return self._cached_lookup('id', user_id, sql.FIND_BY_ID, sql.FIND_CREDENTIALS_BY_ID, fresh)
         except Exception as e:
             print(f"ID ile arama hatası: {str(e)}")
             return None
-    
-    def find_by_email(self, email):
+
+    def find_by_ids(self, user_ids, chunk_size=sql.FIND_BY_IDS_CHUNK_SIZE):
+        # Birden fazla kullanıcıyı tek (ya da parça başına bir) IN sorgusuyla getirir.
+        # Dönen sözlük id -> kullanıcı şeklindedir; bulunamayan id'ler yer almaz.
+        # Kullanıcılar önbellekten de gelse MySQL'den de gelse password alanı içermez.
+        users = {}
+        fetched = []
+        missing = []
+        for user_id in dict.fromkeys(user_ids):
+            cached = self.cache.get(('id', str(user_id))) if self.cache is not None else None
+            if cached is not None:
+                users[cached['id']] = dict(cached)
+            else:
+                missing.append(user_id)
+
+        if not missing:
+            return users
+
         try:
-            cursor = self.mysql.connection.cursor()
-            cursor.execute("USE user_management")
-            cursor.execute(
-                "SELECT id, username, password, email, user_type FROM users WHERE email = %s",
-                (email,)
-            )
-            user = cursor.fetchone()
-            cursor.close()
-            if user:
-                return {
-                    'id': user[0],
-                    'username': user[1],
-                    'password': user[2],
-                    'email': user[3],
-                    'user_type': user[4],
-                }
-            return None
+            version = self.cache.version() if self.cache is not None else None
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                for start in range(0, len(missing), chunk_size):
+                    chunk = missing[start:start + chunk_size]
+                    cursor.execute(sql.find_by_ids_sql(len(chunk)), chunk)
+                    for row in cursor.fetchall():
+                        user = sql.row_to_profile(row)
+                        users[user['id']] = user
+                        fetched.append(user)
+                cursor.close()
+        except Exception as e:
+            print(f"Toplu ID ile arama hatası: {str(e)}")
+            return users
+
+        if self.cache is not None:
+            for user in fetched:
+                self._cache_user(user, version)
+        return users
+
+    def find_by_email(self, email, fresh=False):
+        try:
+            return self._cached_lookup('email', email, sql.FIND_BY_EMAIL, sql.FIND_CREDENTIALS_BY_EMAIL, fresh)
         except Exception as e:
             print(f"E-posta ile arama hatası: {str(e)}")
             return None
-    
+
     def update_user(self, user_id, update_data):
         try:
-            cursor = self.mysql.connection.cursor()
-            cursor.execute("USE user_management")
-            
-            # Dinamik SQL oluştur
-            set_clause = ", ".join([f"{key} = %s" for key in update_data.keys()])
+            # Aynı kolon kümesi için SQL metni önbellekten gelir
+            query = sql.update_user_sql(tuple(update_data.keys()))
             values = list(update_data.values())
             values.append(user_id)  # WHERE koşulu için
-            
-            sql = f"UPDATE users SET {set_clause} WHERE id = %s"
-            cursor.execute(sql, values)
-            
-            self.mysql.connection.commit()
-            cursor.close()
-            return True
+
+            # Tek UPDATE: benzersizlik kontrolü username/email unique index'lerine bırakılır
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query, values)
+                matched = cursor.rowcount
+                conn.commit()
+                cursor.close()
+                return matched != 0
+        except MySQLdb.IntegrityError as e:
+            if e.args and e.args[0] == DUPLICATE_ENTRY:
+                raise DuplicateEntryError(_duplicate_field(e), str(e)) from e
+            print(f"Kullanıcı güncelleme hatası: {str(e)}")
+            return False
         except Exception as e:
             print(f"Kullanıcı güncelleme hatası: {str(e)}")
-            return False
\ No newline at end of file
+            return False
+        finally:
+            self._invalidate(user_id)
@@ -0,0 +1,54 @@
+from functools import lru_cache
+
+# users tablosu için sabit sorgu kalıpları.
+# Veritabanı havuzdaki her bağlantı açılırken seçildiği için (bkz. MySQLConnectionPool)
+# sorgulardan önce "USE ..." çalıştırmaya gerek yoktur.
+
+USER_COLUMNS = ('id', 'username', 'password', 'email', 'user_type')
+# Şifre hash'i olmayan profil kolonları; kimlik doğrulama dışındaki tüm okumalar bunları seçer
+PROFILE_COLUMNS = ('id', 'username', 'email', 'user_type')
+UPDATABLE_COLUMNS = frozenset({'username', 'password', 'email', 'user_type'})
+
+_SELECT_USER = "SELECT id, username, password, email, user_type FROM users WHERE {column} = %s"
+_SELECT_PROFILE = "SELECT id, username, email, user_type FROM users WHERE {column} = %s"
+
+FIND_BY_ID = _SELECT_PROFILE.format(column='id')
+FIND_BY_USERNAME = _SELECT_PROFILE.format(column='username')
+FIND_BY_EMAIL = _SELECT_PROFILE.format(column='email')
+
+# Şifre hash'iyle birlikte; yalnızca fresh=True (giriş, şifre değişikliği) okumalarında
+FIND_CREDENTIALS_BY_ID = _SELECT_USER.format(column='id')
+FIND_CREDENTIALS_BY_USERNAME = _SELECT_USER.format(column='username')
+FIND_CREDENTIALS_BY_EMAIL = _SELECT_USER.format(column='email')
+
+# find_by_ids için tek sorguda gönderilecek en fazla id sayısı
+FIND_BY_IDS_CHUNK_SIZE = 500
+
+INSERT_USER = "INSERT INTO users (username, password, email, user_type) VALUES (%s, %s, %s, %s)"
+UPDATE_PASSWORD = "UPDATE users SET password = %s WHERE id = %s"
+
+
+@lru_cache(maxsize=32)
+def update_user_sql(columns):
+    # Aynı kolon kümesi için SQL metni bir kez üretilir ve tekrar kullanılır
+    unknown = set(columns) - UPDATABLE_COLUMNS
+    if unknown:
+        raise ValueError(f"Güncellenemeyen kolon(lar): {', '.join(sorted(unknown))}")
+    set_clause = ", ".join(f"{column} = %s" for column in columns)
+    return f"UPDATE users SET {set_clause} WHERE id = %s"
+
+
+@lru_cache(maxsize=64)
+def find_by_ids_sql(count):
+    placeholders = ", ".join(["%s"] * count)
+    return f"SELECT id, username, email, user_type FROM users WHERE id IN ({placeholders})"
+
+
+def row_to_user(row, columns=USER_COLUMNS):
+    if not row:
+        return None
+    return dict(zip(columns, row))
+
+
+def row_to_profile(row):
+    return row_to_user(row, PROFILE_COLUMNS)
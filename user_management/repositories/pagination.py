@@ -0,0 +1,115 @@
+import base64
+from bson import json_util
+
+
+# Keyset (cursor) sayfalama yardımcıları.
+# İmleç, sayfadaki son (ya da ilk) dokümanın sıralama alanlarındaki değerlerini taşır;
+# bir sonraki sayfa skip() yerine bu değerlerden büyük/küçük koşuluyla okunur.
+
+def encode_cursor(values):
+    raw = json_util.dumps(list(values)).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json_util.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception as e:
+        raise ValueError("Geçersiz sayfa imleci") from e
+    if not isinstance(values, list):
+        raise ValueError("Geçersiz sayfa imleci")
+    return values
+
+
+def sort_values(document, sort):
+    return [document.get(field) for field, _ in sort]
+
+
+def keyset_filter(sort, values, forward=True):
+    # sort=[('a', 1), ('_id', 1)], values=[va, vid] için:
+    # {'$or': [{'a': {'$gt': va}}, {'a': va, '_id': {'$gt': vid}}]}
+    #
+    # Alanı null olan ya da hiç olmayan dokümanlar (ör. created_by/created_at'siz eski ürünler)
+    # artan sırada tüm değerlerden önce gelir, ama $gt/$lt null ile diğer türleri karşılaştırmaz:
+    # null grubundan sonrası {'$ne': None} ile, küçüğe doğru ilerlerken null grubu
+    # {'a': None} ile ayrıca seçilir. _id hiçbir zaman null olmaz.
+    if len(values) != len(sort):
+        raise ValueError("Geçersiz sayfa imleci")
+    clauses = []
+    for i, (field, direction) in enumerate(sort):
+        ascending = (direction == 1) == forward
+        prefix = {sort[j][0]: values[j] for j in range(i)}
+        if values[i] is None:
+            if ascending:
+                clauses.append(dict(prefix, **{field: {'$ne': None}}))
+            continue
+        clauses.append(dict(prefix, **{field: {'$gt' if ascending else '$lt': values[i]}}))
+        if not ascending and field != '_id':
+            clauses.append(dict(prefix, **{field: None}))
+    return clauses[0] if len(clauses) == 1 else {'$or': clauses}
+
+
+def reverse_sort(sort):
+    return [(field, -direction) for field, direction in sort]
+
+
+def keyset_page(collection, sort, after=None, before=None, limit=20, query=None, projection=None, hint=None):
+    # Bir sayfa doküman okur: {'items': [...], 'next': imleç|None, 'prev': imleç|None}.
+    # Sıralamanın son alanı benzersiz olmalı (genelde _id). hint: sıralamayı karşılayan indeks adı.
+    forward = before is None
+    token = after if forward else before
+
+    conditions = [query] if query else []
+    if token:
+        conditions.append(keyset_filter(sort, decode_cursor(token), forward=forward))
+    if not conditions:
+        filter_ = {}
+    elif len(conditions) == 1:
+        filter_ = conditions[0]
+    else:
+        filter_ = {'$and': conditions}
+
+    if projection and any(projection.values()):
+        # İmleç değerleri için sıralama alanları projeksiyonda bulunmalı
+        projection = dict(projection, **{field: 1 for field, _ in sort})
+
+    cursor = collection.find(filter_, projection).sort(
+        sort if forward else reverse_sort(sort)
+    ).limit(limit + 1)
+    if hint:
+        cursor = cursor.hint(hint)
+    return _page(list(cursor), sort, forward, token, limit)
+
+
+def keyset_pipeline_page(collection, pipeline, sort, after=None, before=None, limit=20):
+    # Aggregation ile keyset sayfalama: pipeline sıralama alanlarını üreten ilk aşamalardır
+    # (ör. $text + textScore). İmleç koşulu, $sort ve $limit sona eklenir; $sort+$limit
+    # sunucuda yalnızca limit+1 dokümanı bellekte tutar.
+    forward = before is None
+    token = after if forward else before
+
+    stages = list(pipeline)
+    if token:
+        stages.append({'$match': keyset_filter(sort, decode_cursor(token), forward=forward)})
+    stages.append({'$sort': dict(sort if forward else reverse_sort(sort))})
+    stages.append({'$limit': limit + 1})
+    return _page(list(collection.aggregate(stages)), sort, forward, token, limit)
+
+
+def _page(items, sort, forward, token, limit):
+    has_more = len(items) > limit
+    items = items[:limit]
+    if not forward:
+        items.reverse()
+
+    if forward:
+        has_next, has_prev = has_more, bool(token)
+    else:
+        has_next, has_prev = True, has_more
+
+    return {
+        'items': items,
+        'next': encode_cursor(sort_values(items[-1], sort)) if items and has_next else None,
+        'prev': encode_cursor(sort_values(items[0], sort)) if items and has_prev else None,
+    }
@@ -0,0 +1,267 @@
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+from bson import json_util
+
+
+CREATE_TABLES = (
+    """
+    CREATE TABLE IF NOT EXISTS cache_entries (
+        key TEXT PRIMARY KEY,
+        value TEXT,
+        fresh_until REAL NOT NULL DEFAULT 0,
+        stale_until REAL NOT NULL DEFAULT 0,
+        lease_until REAL NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS cache_versions (
+        namespace TEXT PRIMARY KEY,
+        version INTEGER NOT NULL,
+        updated_at REAL NOT NULL
+    )
+    """,
+)
+
+# Yükleme/yenileme hakkını alır: satır yoksa oluşturur, varsa süresi dolmuş kirayı devralır
+TAKE_LEASE = """
+    INSERT INTO cache_entries (key, lease_until) VALUES (?, ?)
+    ON CONFLICT(key) DO UPDATE SET lease_until = excluded.lease_until
+    WHERE cache_entries.lease_until < ?
+"""
+
+STORE = """
+    INSERT INTO cache_entries (key, value, fresh_until, stale_until, lease_until) VALUES (?, ?, ?, ?, 0)
+    ON CONFLICT(key) DO UPDATE SET value = excluded.value, fresh_until = excluded.fresh_until,
+        stale_until = excluded.stale_until, lease_until = 0
+"""
+
+BUMP_VERSION = """
+    INSERT INTO cache_versions (namespace, version, updated_at) VALUES (?, 1, ?)
+    ON CONFLICT(namespace) DO UPDATE SET version = version + 1, updated_at = excluded.updated_at
+"""
+
+
+class SharedCache:
+    # Aynı makinedeki tüm worker süreçlerinin paylaştığı SQLite tabanlı önbellek.
+    #
+    # - Her ad alanının (namespace) bir sürüm sayacı vardır; anahtarlar sürümle birlikte
+    #   saklanır, invalidate() sayacı artırır ve eski girdiler erişilemez hâle gelir.
+    # - ttl dolan girdi stale_ttl boyunca bayat olarak sunulmaya devam eder; bu sırada
+    #   tüm süreçlerde yalnızca bir arka plan yenilemesi çalışır.
+    # - Soğuk anahtar için yalnızca bir yükleme yapılır: süreç içinde aynı anahtarı isteyenler
+    #   aynı Future'ı bekler, süreçler arasında kirayı (lease) alan yükler, diğerleri sonucu bekler.
+    # - versions (ör. MongoCacheVersionRepository) verilirse sürüm sayaçları oradan okunur ve
+    #   orada artırılır; böylece başka makinede ya da başka uygulamada yapılan değişiklik de
+    #   bu makinedeki girdileri ve ETag'leri geçersiz kılar. Verilmezse SQLite'ta tutulur.
+    # - None sonuçlar (ör. olmayan ürün) saklanmaz. Süresi dolan girdiler yazma sırasında en fazla
+    #   purge_interval'de bir silinir; girdi sayısı max_entries'i aşarsa en eskiler atılır.
+    def __init__(self, path, ttl=30, stale_ttl=300, lease_timeout=5, poll_interval=0.02,
+                 clock=time.time, versions=None, max_entries=10000, purge_interval=30):
+        self.path = path
+        self.versions = versions
+        self.max_entries = max_entries
+        self.purge_interval = purge_interval
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.lease_timeout = lease_timeout
+        self.poll_interval = poll_interval
+        self._clock = clock
+        self._next_purge = 0
+
+        self._local = threading.local()
+        self._pid = None
+        self._lock = threading.Lock()
+        self._inflight = {}   # anahtar -> Future (süreç içi istek birleştirme)
+        self._stats = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'loads': 0,
+            'refreshes': 0,
+            'coalesced': 0,
+            'invalidations': 0,
+            'evictions': 0,
+        }
+
+        directory = os.path.dirname(os.path.abspath(path))
+        # Önbellek dosyası yalnızca uygulamanın kullanıcısına ait dizinde tutulur
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        with self._connection() as conn:
+            for statement in CREATE_TABLES:
+                conn.execute(statement)
+
+    def _connection(self):
+        # Thread başına bir bağlantı; fork sonrası ebeveynin bağlantıları kullanılmaz
+        pid = os.getpid()
+        if self._pid != pid:
+            self._local = threading.local()
+            self._lock = threading.Lock()
+            self._inflight = {}
+            self._pid = pid
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.lease_timeout, isolation_level=None,
+                                   check_same_thread=False)
+            # WAL: okuyucular yazıcıyı beklemez
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def version(self, namespace):
+        # (sürüm, son değişiklik zamanı); hiç değişmemiş ad alanı için (0, None)
+        if self.versions is not None:
+            return self.versions.version(namespace)
+        row = self._connection().execute(
+            "SELECT version, updated_at FROM cache_versions WHERE namespace = ?", (namespace,)
+        ).fetchone()
+        return row if row else (0, None)
+
+    def bump(self, namespace):
+        # Yalnızca sürüm sayacını artırır (ör. ETag için sepet sürümü)
+        if self.versions is not None:
+            self.versions.bump(namespace)
+            return
+        self._connection().execute(BUMP_VERSION, (namespace, self._clock()))
+
+    def invalidate(self, namespace):
+        self.bump(namespace)
+        self._count('invalidations')
+        # Önceki sürümün girdileri artık okunmaz; süresi dolanlar bu fırsatta temizlenir
+        self.purge()
+
+    def get_or_load(self, namespace, key, loader, ttl=None):
+        # loader() istisna fırlatırsa önbelleğe bir şey yazılmaz, istisna çağırana iletilir
+        version, _ = self.version(namespace)
+        full_key = f"{namespace}:{version}:{key}"
+        now = self._clock()
+        row = self._connection().execute(
+            "SELECT value, fresh_until, stale_until FROM cache_entries WHERE key = ?", (full_key,)
+        ).fetchone()
+        if row and row[0] is not None:
+            value, fresh_until, stale_until = row
+            if fresh_until > now:
+                self._count('hits')
+                return json_util.loads(value)
+            if stale_until > now:
+                self._count('stale_hits')
+                if self._take_lease(full_key, now):
+                    threading.Thread(target=self._refresh, args=(full_key, loader, ttl), daemon=True).start()
+                return json_util.loads(value)
+
+        self._count('misses')
+        return self._load_coalesced(full_key, loader, ttl)
+
+    def _take_lease(self, full_key, now):
+        cursor = self._connection().execute(TAKE_LEASE, (full_key, now + self.lease_timeout, now))
+        return cursor.rowcount == 1
+
+    def _store(self, full_key, value, ttl):
+        if value is None:
+            # Olmayan kayıt saklanmaz; istekten gelen rastgele anahtarlar önbelleği doldurmasın
+            self._connection().execute("DELETE FROM cache_entries WHERE key = ?", (full_key,))
+            return
+        now = self._clock()
+        ttl = self.ttl if ttl is None else ttl
+        self._connection().execute(
+            STORE, (full_key, json_util.dumps(value), now + ttl, now + ttl + self.stale_ttl)
+        )
+        if now >= self._next_purge:
+            self._next_purge = now + self.purge_interval
+            self.purge()
+
+    def _release(self, full_key):
+        self._connection().execute("UPDATE cache_entries SET lease_until = 0 WHERE key = ?", (full_key,))
+
+    def _refresh(self, full_key, loader, ttl):
+        try:
+            self._store(full_key, loader(), ttl)
+            self._count('refreshes')
+        except Exception as e:
+            # Bayat girdi stale_until'e kadar sunulmaya devam eder
+            self._release(full_key)
+            print(f"Önbellek yenileme hatası ({full_key}): {str(e)}")
+
+    def _load_coalesced(self, full_key, loader, ttl):
+        with self._lock:
+            future = self._inflight.get(full_key)
+            owner = future is None
+            if owner:
+                future = self._inflight[full_key] = Future()
+        if not owner:
+            self._count('coalesced')
+            return future.result()
+
+        try:
+            value = self._load_once(full_key, loader, ttl)
+            future.set_result(value)
+            return value
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(full_key, None)
+
+    def _load_once(self, full_key, loader, ttl):
+        # Kirayı alan süreç yükler; alamayan, kira süresi boyunca diğer sürecin sonucunu bekler
+        if not self._take_lease(full_key, self._clock()):
+            deadline = self._clock() + self.lease_timeout
+            while self._clock() < deadline:
+                time.sleep(self.poll_interval)
+                row = self._connection().execute(
+                    "SELECT value, fresh_until FROM cache_entries WHERE key = ?", (full_key,)
+                ).fetchone()
+                if row and row[0] is not None and row[1] > self._clock():
+                    self._count('coalesced')
+                    return json_util.loads(row[0])
+                if not self._lease_held(full_key) and self._take_lease(full_key, self._clock()):
+                    # Diğer süreç yükleyemedi ya da kira süresi doldu; kirayı devral
+                    break
+        try:
+            value = loader()
+        except Exception:
+            self._release(full_key)
+            raise
+        self._count('loads')
+        self._store(full_key, value, ttl)
+        return value
+
+    def _lease_held(self, full_key):
+        row = self._connection().execute(
+            "SELECT lease_until FROM cache_entries WHERE key = ?", (full_key,)
+        ).fetchone()
+        return bool(row) and row[0] > self._clock()
+
+    def purge(self):
+        # Bayatlık süresi de dolmuş ve kirası olmayan girdileri, ardından max_entries'i aşan
+        # en eski girdileri siler; silinen satır sayısı
+        now = self._clock()
+        conn = self._connection()
+        removed = conn.execute(
+            "DELETE FROM cache_entries WHERE stale_until < ? AND lease_until < ?", (now, now)
+        ).rowcount
+        excess = conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0] - self.max_entries
+        if excess > 0:
+            evicted = conn.execute(
+                "DELETE FROM cache_entries WHERE key IN ("
+                "SELECT key FROM cache_entries WHERE lease_until < ? ORDER BY stale_until LIMIT ?)",
+                (now, excess)
+            ).rowcount
+            self._count('evictions', evicted)
+            removed += evicted
+        return removed
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['size'] = self._connection().execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+        return stats
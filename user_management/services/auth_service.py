@@ -1,5 +1,6 @@
 import os
 from models.user import User
+from repositories.mysql_repository import DuplicateEntryError
 from flask_mail import Message
 
 class AuthService:
@@ -13,21 +14,20 @@ class AuthService:
         return self.user_repository.save(user_data)
     
     def login(self, username, password):
-        user = self.user_repository.find_by_username(username)
+        # Şifre hash'i önbellekten değil, her zaman veritabanından okunur
+        user = self.user_repository.find_by_username(username, fresh=True)
         if user:
             if self.bcrypt.check_password_hash(user['password'], password):
                 return user
         return None
     
     def update_profile(self, user_id, username=None, email=None, current_password=None, new_password=None):
-        # Önce kullanıcıyı ID ile bulalım
-        user = self.user_repository.find_by_id(user_id)
-        
-        if not user:
-            return False, "Kullanıcı bulunamadı."
-        
-        # Şifre değişikliği istenmişse, mevcut şifreyi kontrol et
+        # Şifre değişikliği istenmişse, mevcut şifreyi kontrol et.
+        # Hash yalnızca bu durumda okunur; diğer güncellemeler tek UPDATE ile yapılır.
         if new_password:
+            user = self.user_repository.find_by_id(user_id, fresh=True)
+            if not user:
+                return False, "Kullanıcı bulunamadı."
             if not current_password or not self.bcrypt.check_password_hash(user['password'], current_password):
                 return False, "Mevcut şifre yanlış."
             # Yeni şifreyi hashle
@@ -35,18 +35,6 @@ class AuthService:
         else:
             hashed_password = None
         
-        # Kullanıcı adı veya email değişikliği istenmişse, bu değerlerin başka kullanıcılarda
-        # kullanılmadığından emin olmalıyız
-        if username and username != user['username']:
-            existing_user = self.user_repository.find_by_username(username)
-            if existing_user:
-                return False, "Bu kullanıcı adı zaten kullanılıyor."
-        
-        if email and email != user['email']:
-            existing_user = self.user_repository.find_by_email(email)
-            if existing_user:
-                return False, "Bu e-posta adresi zaten kullanılıyor."
-        
         # Profili güncelle
         update_data = {}
         if username:
@@ -57,7 +45,14 @@ class AuthService:
             update_data['password'] = hashed_password
         
         if update_data:
-            success = self.user_repository.update_user(user_id, update_data)
+            # Kullanıcı adı / e-posta çakışmalarını unique index'ler yakalar;
+            # ayrı kontrol sorgusu yok, kontrol ile yazma arasında yarış da yok
+            try:
+                success = self.user_repository.update_user(user_id, update_data)
+            except DuplicateEntryError as e:
+                if e.field == 'email':
+                    return False, "Bu e-posta adresi zaten kullanılıyor."
+                return False, "Bu kullanıcı adı zaten kullanılıyor."
             if success:
                 return True, "Profil başarıyla güncellendi."
             else:
@@ -74,6 +69,6 @@ class AuthService:
             )
             msg.body = f"Şifre sıfırlamak için bu bağlantıya tıklayın: {verify_link}\nBu bağlantı 15 dakika geçerlidir."
             self.mail.send(msg)
-            print("📤 Mail başarıyla gönderildi.")
+            print("📤 Mail gönderim kuyruğuna alındı.")
         except Exception as e:
             print(f"❌ E-posta gönderme hatası: {str(e)}")
@@ -0,0 +1,120 @@
+import datetime
+import os
+import threading
+import weakref
+
+from flask_mail import Message
+
+CART_ACTIONS = {
+    'add': 'eklendi',
+    'remove': 'çıkarıldı',
+    'update': 'miktarı güncellendi',
+}
+
+
+def digest_body(events, event_count=None):
+    # Ürün başına hareketleri sayar: '"Çay": 3 kez eklendi, 1 kez çıkarıldı'
+    products = {}
+    for event in events:
+        counts = products.setdefault(event.get('product') or 'Bir ürün', {})
+        counts[event['action']] = counts.get(event['action'], 0) + 1
+    lines = ['Sepetinizde yapılan değişiklikler:', '']
+    for product, counts in products.items():
+        parts = [f"{count} kez {CART_ACTIONS.get(action, 'değiştirildi')}" if count > 1
+                 else CART_ACTIONS.get(action, 'değiştirildi')
+                 for action, count in counts.items()]
+        lines.append(f'- "{product}": {", ".join(parts)}')
+    skipped = (event_count or len(events)) - len(events)
+    if skipped > 0:
+        lines.append(f'- ve {skipped} değişiklik daha')
+    lines += ['', 'Alışverişinizi tamamlamak için sitemizi ziyaret edebilirsiniz.']
+    return '\n'.join(lines)
+
+
+class CartDigestNotifier:
+    # Sepet ekleme/çıkarma/güncelleme hareketlerini kullanıcı başına `window_seconds` boyunca
+    # biriktirir (MongoCartDigestRepository) ve pencere başına tek özet e-postası kuyruğa yazar.
+    # Böylece e-posta sayısı tıklama sayısıyla değil aktif kullanıcı sayısıyla artar.
+    # Biriken hareketler MongoDB'de durduğu için hangi süreçten gelirse gelsin tek özette
+    # birleşir; pencereyi hangi süreç kiralarsa özeti o gönderir. Hareketler ancak özet
+    # e-posta kuyruğuna yazıldıktan sonra silinir.
+    def __init__(self, repository, outbox, app, window_seconds=300, poll_interval=5.0, lease_seconds=60):
+        self.repository = repository
+        self.outbox = outbox
+        self.app = app
+        self.window_seconds = window_seconds
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+
+        self._reset()
+
+        if hasattr(os, 'register_at_fork'):
+            ref = weakref.ref(self)
+            os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._reset())
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._stats = {'events': 0, 'digests': 0, 'digest_events': 0}
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def record(self, user_id, email, action, product_name=None):
+        event = {'action': action, 'product': product_name, 'at': datetime.datetime.utcnow()}
+        self.repository.record(user_id, email, event, self.window_seconds)
+        self._count('events')
+        self.start()
+
+    def start(self):
+        if self._pid != os.getpid():
+            self._reset()
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='cart-digest', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+        self._stopping.clear()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                self.flush_due()
+            except Exception as e:
+                print(f"Sepet özeti gönderilemedi: {str(e)}")
+            self._stopping.wait(self.poll_interval)
+
+    def flush_due(self, now=None):
+        # Penceresi dolan her kullanıcı için bir özet kuyruğa yazar; yazılan özet sayısını döner
+        flushed = 0
+        with self.app.app_context():
+            while True:
+                digest = self.repository.claim_due(self.lease_seconds, now)
+                if digest is None:
+                    return flushed
+                msg = Message('Sepet Güncellemesi', recipients=[digest['email']])
+                msg.body = digest_body(digest['events'], digest.get('event_count'))
+                self.outbox.send(msg)
+                self.repository.finish(digest, self.window_seconds, now)
+                self._count('digests')
+                self._count('digest_events', digest.get('event_count', len(digest['events'])))
+                flushed += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['events_per_digest'] = stats['digest_events'] / (stats['digests'] or 1)
+        stats['pending_users'] = self.repository.pending()
+        stats['window_seconds'] = self.window_seconds
+        return stats
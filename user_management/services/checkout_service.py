@@ -0,0 +1,108 @@
+import datetime
+from bson.objectid import ObjectId
+from flask_mail import Message
+
+# Ürün sahibini bulmak için ürünlerden okunan alanlar
+OWNER_PROJECTION = {'user_id': 1, 'created_by': 1}
+
+
+class CheckoutService:
+    def __init__(self, product_repository, cart_repository, user_repository, order_repository, mail,
+                 rollup_repository=None):
+        self.product_repository = product_repository
+        self.cart_repository = cart_repository
+        self.user_repository = user_repository
+        self.order_repository = order_repository
+        self.mail = mail
+        self.rollup_repository = rollup_repository
+
+    def checkout(self, user_id):
+        # Satın alma akışı, sepet büyüklüğünden bağımsız sabit sayıda sorgu yapar:
+        # sepet satırları, tek $in ürün sorgusu, tek toplu sahip sorgusu ve
+        # sipariş yazımı + siparişe giren sepet satırlarının düşülmesi (tek transaction).
+        # Dönen değer: (başarılı mı, [(flash mesajı, kategori), ...])
+        lines = self.cart_repository.find_lines(user_id)
+        if not lines:
+            return False, [('Sepetiniz boş!', 'error')]
+
+        products = self.product_repository.find_by_ids(
+            [line['product_id'] for line in lines], OWNER_PROJECTION
+        )
+        owners = self.user_repository.find_by_ids(
+            {product['user_id'] for product in products.values() if 'user_id' in product}
+        )
+
+        order = self.build_order(user_id, lines, products)
+        self.order_repository.place_order(order, user_id, lines)
+        if self.rollup_repository is not None:
+            try:
+                self.rollup_repository.record_order(order)
+            except Exception as e:
+                # Sipariş kaydedildi; özetler migrations.runner --rebuild-rollups ile düzeltilebilir
+                print(f"Satış özeti güncellenemedi: {str(e)}")
+
+        # Satırları tedarikçiye göre grupla: her tedarikçiye tek e-posta
+        lines_by_owner = {}
+        messages = []
+        for line in order['lines']:
+            if line['supplier_id'] is None:
+                continue
+            owner = owners.get(line['supplier_id'])
+            if owner and owner.get('email'):
+                lines_by_owner.setdefault(owner['id'], (owner, []))[1].append(line)
+            else:
+                messages.append((f'Ürün sahibi ({line["supplier"]}) için e-posta adresi bulunamadı.', 'warning'))
+
+        try:
+            # Tüm e-postalar tek bağlantı üzerinden gönderilir; mail bir MailOutbox ise
+            # iletiler yalnızca kuyruğa yazılır ve SMTP'yi arka plan worker'ları konuşur
+            with self.mail.connect() as connection:
+                for owner, owner_lines in lines_by_owner.values():
+                    connection.send(self.build_sale_message(owner, owner_lines))
+        except Exception as e:
+            # Sipariş kaydedildi; bildirim hatası siparişi geri almaz
+            messages.append((f'E-posta gönderim hatası: {str(e)}', 'error'))
+            return True, messages + [('Siparişiniz alındı.', 'success')]
+
+        return True, messages + [('Satın alma başarılı! Ürün sahiplerine e-posta gönderildi.', 'success')]
+
+    def build_order(self, user_id, lines, products):
+        # Sipariş geçmişi sepetten yeniden kurulmaz; satırlar siparişe gömülü saklanır
+        order_lines = []
+        for line in lines:
+            product = products.get(line['product_id'], {})
+            order_lines.append({
+                'product_id': line['product_id'],
+                'name': line['name'],
+                'price': line['price'],
+                'quantity': line['quantity'],
+                'line_total': line['price'] * line['quantity'],
+                'supplier_id': product.get('user_id'),
+                'supplier': product.get('created_by'),
+            })
+        return {
+            '_id': ObjectId(),
+            'user_id': user_id,
+            'status': 'completed',
+            'created_at': datetime.datetime.utcnow(),
+            'lines': order_lines,
+            'total': sum(line['line_total'] for line in order_lines),
+            'item_count': sum(line['quantity'] for line in order_lines),
+        }
+
+    def build_sale_message(self, owner, lines):
+        details = "\n".join(
+            f"- {line['name']}: {line['quantity']} adet x {line['price']} TL = {line['line_total']} TL"
+            for line in lines
+        )
+        total = sum(line['line_total'] for line in lines)
+        return Message(
+            subject='Ürününüz Satıldı!',
+            recipients=[owner['email']],
+            body=(
+                f"Merhaba {owner['username']},\n\n"
+                f"Aşağıdaki ürünleriniz satılmıştır!\n"
+                f"Detaylar:\n{details}\n"
+                f"Toplam: {total} TL\n"
+            )
+        )
@@ -0,0 +1,245 @@
+import datetime
+import os
+import random
+import smtplib
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+from flask_mail import Connection, Mail, Message
+
+# Kuyruğa yazılan Message alanları
+MESSAGE_FIELDS = ('subject', 'recipients', 'body', 'html', 'sender', 'cc', 'bcc', 'reply_to')
+
+
+def serialize_message(message):
+    data = {field: getattr(message, field, None) for field in MESSAGE_FIELDS}
+    if isinstance(data['sender'], tuple):
+        data['sender'] = list(data['sender'])
+    return data
+
+
+def build_message(document):
+    sender = document.get('sender')
+    return Message(
+        subject=document.get('subject') or '',
+        recipients=document.get('recipients') or [],
+        body=document.get('body'),
+        html=document.get('html'),
+        sender=tuple(sender) if isinstance(sender, list) else sender,
+        cc=document.get('cc'),
+        bcc=document.get('bcc'),
+        reply_to=document.get('reply_to'),
+    )
+
+
+class TimeoutConnection(Connection):
+    # flask_mail.Connection, SMTP soketi zaman aşımıyla açılır. flask_mail zaman aşımı
+    # vermez; yanıt vermeyen sunucu worker'ı ileti kirası dolana kadar bekletebilirdi.
+    def __init__(self, mail, timeout):
+        super().__init__(mail)
+        self.timeout = timeout
+
+    def configure_host(self):
+        if self.mail.use_ssl:
+            host = smtplib.SMTP_SSL(self.mail.server, self.mail.port, timeout=self.timeout)
+        else:
+            host = smtplib.SMTP(self.mail.server, self.mail.port, timeout=self.timeout)
+        host.set_debuglevel(int(self.mail.debug))
+        if self.mail.use_tls:
+            host.starttls()
+        if self.mail.username and self.mail.password:
+            host.login(self.mail.username, self.mail.password)
+        return host
+
+
+class MailOutbox:
+    # flask_mail.Mail yerine servislere verilir: send() ve connect() aynı arayüzle iletiyi
+    # yalnızca kalıcı kuyruğa (MongoMailOutboxRepository) yazar, istek SMTP'yi beklemez.
+    #
+    # - Her süreçte `workers` thread'i kuyruğu boşaltır; thread'ler ilk kullanımda başlar,
+    #   prefork sunucularda her worker süreci kendi thread'lerini açar.
+    # - Bir worker tek SMTP bağlantısıyla en fazla `batch_size` ileti gönderir; her ileti
+    #   gönderilmeden hemen önce `lease_seconds` için kiralanır.
+    # - SMTP soket işlemleri `smtp_timeout` (kiradan kısa) sonra zaman aşımına uğrar.
+    # - Başarısız ileti üstel geri çekilmeyle (backoff_base * 2^deneme, en fazla backoff_max,
+    #   ±%50 rastgele) yeniden denenir; max_attempts denemeden sonra failed olarak kalır.
+    def __init__(self, repository, mail, app, workers=2, batch_size=20, max_attempts=5,
+                 backoff_base=5, backoff_max=600, lease_seconds=120, poll_interval=1.0,
+                 smtp_timeout=30):
+        self.repository = repository
+        self.mail = mail
+        self.app = app
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.smtp_timeout = min(smtp_timeout, lease_seconds / 2)
+
+        self._reset()
+
+        if hasattr(os, 'register_at_fork'):
+            # Ebeveynin thread'leri çocuk süreçte yoktur; sayaçlar ve kilit sıfırlanır
+            ref = weakref.ref(self)
+            os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._reset())
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+        self._stats = {
+            'enqueued': 0,
+            'sent': 0,
+            'retried': 0,
+            'failed': 0,
+            # Gönderildi ama kirası başka worker'a geçmişti: ileti iki kez gitmiş olabilir
+            'lease_lost': 0,
+            'smtp_seconds': 0.0,
+            'delivery_seconds': 0.0,
+            'max_delivery_seconds': 0.0,
+        }
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    # --- flask_mail.Mail arayüzü ---
+
+    def send(self, message):
+        self.repository.enqueue(serialize_message(message))
+        self._count('enqueued')
+        self.start()
+        self._wakeup.set()
+
+    @contextmanager
+    def connect(self):
+        # CheckoutService tek bağlantı üzerinden gönderir; kuyrukta bağlantı açmak gerekmez
+        yield self
+
+    # --- worker'lar ---
+
+    def start(self):
+        # Süreç başına bir kez; fork kancası çalışmadıysa pid değişiminden anlaşılır
+        if self._pid != os.getpid():
+            self._reset()
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f'mail-outbox-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout=5):
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self._stopping.clear()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                delivered = self.drain_once()
+            except Exception as e:
+                # Kuyruğa erişilemiyor (ör. MongoDB kapalı); bir sonraki turda yeniden denenir
+                print(f"E-posta kuyruğu okunamadı: {str(e)}")
+                delivered = 0
+            if not delivered:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    def _claim(self):
+        while True:
+            document = self.repository.claim(self.lease_seconds)
+            if document is None or document['attempts'] <= self.max_attempts:
+                return document
+            # Önceki kiraların hepsi gönderim bitmeden doldu (ör. iletiyi gönderen worker çöktü)
+            self._give_up(document, document.get('last_error') or 'Kira süresi doldu')
+
+    def _connect(self):
+        state = self.app.extensions.get('mail') if isinstance(self.mail, Mail) else None
+        if state is None:
+            return self.mail.connect()
+        return TimeoutConnection(state, self.smtp_timeout)
+
+    def drain_once(self):
+        # Tek SMTP bağlantısıyla en fazla batch_size ileti gönderir; işlenen ileti sayısını döner.
+        # İletiler toplu değil, gönderilmeden hemen önce tek tek kiralanır: yavaş bir sunucuda
+        # sıradaki iletilerin kirası dolup başka worker'da ikinci kez gönderilmez.
+        document = self._claim()
+        if document is None:
+            return 0
+        processed = 0
+        with self.app.app_context():
+            try:
+                with self._connect() as connection:
+                    while document is not None:
+                        processed += 1
+                        try:
+                            self._deliver(connection, document)
+                        except Exception as e:
+                            self._retry(document, str(e))
+                        document = None
+                        if processed < self.batch_size:
+                            document = self._claim()
+            except Exception as e:
+                # SMTP bağlantısı kurulamadı: kiralanmış ileti yeniden denenir
+                if document is not None:
+                    self._retry(document, str(e))
+        return processed
+
+    def _deliver(self, connection, document):
+        started = time.monotonic()
+        connection.send(build_message(document))
+        now = datetime.datetime.utcnow()
+        if not self.repository.mark_sent(document, now):
+            self._count('lease_lost')
+            print(f"E-posta kirası gönderim sırasında doldu, ileti iki kez gitmiş olabilir: {document['_id']}")
+        delivery = (now - document['created_at']).total_seconds()
+        with self._lock:
+            self._stats['sent'] += 1
+            self._stats['smtp_seconds'] += time.monotonic() - started
+            self._stats['delivery_seconds'] += delivery
+            self._stats['max_delivery_seconds'] = max(self._stats['max_delivery_seconds'], delivery)
+
+    def backoff(self, attempts):
+        delay = min(self.backoff_max, self.backoff_base * 2 ** attempts)
+        return delay * random.uniform(0.5, 1.5)
+
+    def _give_up(self, document, error):
+        self.repository.mark_failed(document, error)
+        self._count('failed')
+        print(f"E-posta gönderilemedi, {document['attempts']} deneme sonrası bırakıldı "
+              f"({document.get('recipients')}): {error}")
+
+    def _retry(self, document, error):
+        # attempts, kiralamada artırılmıştır (bu deneme dahil)
+        attempts = document['attempts']
+        if attempts >= self.max_attempts:
+            self._give_up(document, error)
+            return
+        next_attempt_at = datetime.datetime.utcnow() + datetime.timedelta(seconds=self.backoff(attempts - 1))
+        self.repository.mark_retry(document, next_attempt_at, error)
+        self._count('retried')
+
+    def stats(self):
+        # Bu sürecin sayaçları + kuyruk derinliği (tüm süreçler için ortak)
+        with self._lock:
+            stats = dict(self._stats)
+        sent = stats['sent'] or 1
+        stats['avg_smtp_ms'] = stats.pop('smtp_seconds') / sent * 1000
+        stats['avg_delivery_ms'] = stats.pop('delivery_seconds') / sent * 1000
+        stats['max_delivery_ms'] = stats.pop('max_delivery_seconds') * 1000
+        stats['workers_alive'] = sum(thread.is_alive() for thread in self._threads)
+        stats['queue'] = self.repository.depth()
+        return stats
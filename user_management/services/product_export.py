@@ -0,0 +1,78 @@
+import csv
+import datetime
+import io
+import json
+
+# Katalog dışa aktarımı (/api/products/export ve tools.export_products).
+# Dokümanlar cursor'dan geldikçe biçimlenir ve parça parça üretilir; katalog bellekte toplanmaz.
+
+# Dışa aktarılabilen alanlar; _id her zaman yazılır (kaldığı yerden devam için)
+EXPORT_FIELDS = ('_id', 'name', 'price', 'description', 'created_by', 'user_id', 'created_at')
+
+EXPORT_CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+# Yanıta tek seferde yazılan yaklaşık karakter sayısı; her doküman için ayrı yazma yapılmaz
+CHUNK_SIZE = 64 * 1024
+
+
+def parse_fields(value):
+    # "name,price" -> ('_id', 'name', 'price'); boş ise tüm alanlar. ValueError: bilinmeyen alan
+    if not value:
+        return EXPORT_FIELDS
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in EXPORT_FIELDS]
+    if unknown:
+        raise ValueError(f"Bilinmeyen alan: {', '.join(unknown)}")
+    return ('_id',) + tuple(dict.fromkeys(field for field in fields if field != '_id'))
+
+
+def _value(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def _chunks(pieces):
+    buffer, size = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= CHUNK_SIZE:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def ndjson_lines(documents, fields):
+    for document in documents:
+        yield json.dumps({field: _value(document.get(field)) for field in fields}, ensure_ascii=False) + '\n'
+
+
+def csv_lines(documents, fields, header=True):
+    # header=False: kaldığı yerden devam eden aktarım mevcut dosyaya eklenir, başlık tekrarlanmaz
+    output = io.StringIO()
+    writer = csv.writer(output)
+    if header:
+        writer.writerow(fields)
+        yield output.getvalue()
+    for document in documents:
+        output.seek(0)
+        output.truncate()
+        writer.writerow(['' if document.get(field) is None else _value(document.get(field)) for field in fields])
+        yield output.getvalue()
+
+
+def export_lines(documents, fields, file_format, header=True):
+    if file_format == 'ndjson':
+        return ndjson_lines(documents, fields)
+    return csv_lines(documents, fields, header)
+
+
+def export_chunks(documents, fields, file_format, header=True):
+    return _chunks(export_lines(documents, fields, file_format, header))
@@ -0,0 +1,102 @@
+import csv
+import json
+import math
+
+# Toplu ürün yükleme (/api/products/bulk ve tools.import_products).
+# Gövde satır satır okunur ve doğrulanır; hiçbir aşamada dosyanın tamamı bellekte tutulmaz.
+
+# İçerik türü -> biçim
+IMPORT_FORMATS = {
+    'application/x-ndjson': 'ndjson',
+    'application/ndjson': 'ndjson',
+    'application/jsonl': 'ndjson',
+    'text/csv': 'csv',
+}
+
+DEFAULT_MAX_LINE_BYTES = 64 * 1024
+
+
+class LineTooLong(ValueError):
+    pass
+
+
+def read_lines(stream, max_line_bytes=DEFAULT_MAX_LINE_BYTES):
+    # Binary akıştan satırlar; max_line_bytes'ı aşan satırın yerine None döner (satır atlanır)
+    while True:
+        line = stream.readline(max_line_bytes + 1)
+        if not line:
+            return
+        if len(line) > max_line_bytes and not line.endswith(b'\n'):
+            while line and not line.endswith(b'\n'):
+                line = stream.readline(max_line_bytes + 1)
+            yield None
+        else:
+            yield line
+
+
+def iter_ndjson(stream, max_line_bytes=DEFAULT_MAX_LINE_BYTES):
+    # (satır no, kayıt, hata) üretir; hatalı satır sonrakileri etkilemez
+    for number, line in enumerate(read_lines(stream, max_line_bytes), 1):
+        if line is None:
+            yield number, None, f"Satır {max_line_bytes} bayttan uzun"
+            continue
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield number, None, f"Geçersiz JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield number, None, "Her satır bir JSON nesnesi olmalı"
+            continue
+        yield number, record, None
+
+
+def _csv_lines(stream, max_line_bytes):
+    for index, line in enumerate(read_lines(stream, max_line_bytes)):
+        if line is None:
+            # Tırnaklı alanlar satırlara yayılabildiği için CSV'de atlanan satır sonrakileri bozar
+            raise LineTooLong(f"Satır {max_line_bytes} bayttan uzun")
+        yield line.decode('utf-8-sig' if index == 0 else 'utf-8', errors='replace')
+
+
+def iter_csv(stream, max_line_bytes=DEFAULT_MAX_LINE_BYTES):
+    # İlk satır başlıktır (name,price,description). (satır no, kayıt, hata) üretir;
+    # satır no başlık dahil dosyadaki satırdır. Okunamayan satırda yükleme orada biter.
+    reader = csv.DictReader(_csv_lines(stream, max_line_bytes))
+    try:
+        for record in reader:
+            if None in record:
+                yield reader.line_num, None, "Başlıktan fazla sütun"
+                continue
+            yield reader.line_num, record, None
+    except (csv.Error, LineTooLong) as e:
+        yield reader.line_num + 1, None, f"CSV okunamadı, yükleme bu satırda durdu: {e}"
+
+
+def iter_rows(stream, file_format, max_line_bytes=DEFAULT_MAX_LINE_BYTES):
+    if file_format == 'ndjson':
+        return iter_ndjson(stream, max_line_bytes)
+    if file_format == 'csv':
+        return iter_csv(stream, max_line_bytes)
+    raise ValueError(f"Desteklenmeyen biçim: {file_format}")
+
+
+def validate_product(record):
+    # (ad, fiyat, açıklama); ValueError mesajı kullanıcıya satır hatası olarak döner
+    name = record.get('name')
+    if not isinstance(name, str) or not name.strip():
+        raise ValueError("name boş olamaz")
+    try:
+        price = float(record.get('price'))
+    except (TypeError, ValueError):
+        raise ValueError("price sayı olmalı")
+    if not math.isfinite(price) or price < 0:
+        raise ValueError("price sıfır ya da pozitif olmalı")
+    description = record.get('description')
+    if description is None:
+        raise ValueError("description eksik")
+    if not isinstance(description, str):
+        raise ValueError("description metin olmalı")
+    return name.strip(), price, description
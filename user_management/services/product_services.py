@@ -1,11 +1,172 @@
-from user_management.repositories.mongo_repository import mongo_repository
+import datetime
+
+from .product_import import validate_product
+
+# Katalog önbelleğinin ad alanı; ürün eklenip silindiğinde sürümü artırılır
+CATALOG_NAMESPACE = 'catalog'
 
 
 class ProductService:
-    def __init__(self, product_repository):
+    # Rotaların ürün ve sepet işlemleri için tek giriş noktası; MongoDB'ye yalnızca
+    # repository'ler üzerinden gidilir. catalog_cache (SharedCache) verilirse liste sayfaları,
+    # ürün detayları ve sepete ekleme için ürün bilgileri worker'lar arasında önbelleklenir.
+    def __init__(self, product_repository, cart_repository=None, catalog_cache=None):
         self.product_repository = product_repository
+        self.cart_repository = cart_repository
+        self.catalog_cache = catalog_cache
+
+    def _cached(self, key, loader):
+        if self.catalog_cache is None:
+            return loader()
+        return self.catalog_cache.get_or_load(CATALOG_NAMESPACE, key, loader)
+
+    def invalidate_catalog(self):
+        if self.catalog_cache is not None:
+            self.catalog_cache.invalidate(CATALOG_NAMESPACE)
+
+    def catalog_version(self):
+        # (sürüm, son değişiklik zamanı) ya da önbellek yoksa None; ETag üretiminde kullanılır
+        if self.catalog_cache is None:
+            return None
+        return self.catalog_cache.version(CATALOG_NAMESPACE)
+
+    def cart_version(self, user_id):
+        if self.catalog_cache is None:
+            return None
+        return self.catalog_cache.version(f"cart:{user_id}")
+
+    def touch_cart(self, user_id):
+        # Sepet değiştiğinde sürümü artırılır; /cart için önceki ETag'ler geçersiz olur
+        if self.catalog_cache is not None:
+            self.catalog_cache.bump(f"cart:{user_id}")
 
     def get_all_products(self):
         return self.product_repository.find_all()
-    
-product_service = ProductService(mongo_repository())
+
+    def get_product_by_id(self, product_id):
+        return self._cached(f"product:{product_id}",
+                            lambda: self.product_repository.find_by_id(product_id))
+
+    def get_snapshot(self, product_id):
+        return self._cached(f"snapshot:{product_id}",
+                            lambda: self.product_repository.find_snapshot(product_id))
+
+    def list_page(self, preview_length, **page_args):
+        # ValueError: geçersiz sayfa imleci (önbelleğe yazılmaz)
+        key = "page:" + "&".join(f"{name}={page_args[name]}" for name in sorted(page_args))
+        return self._cached(
+            f"{key}&preview_length={preview_length}",
+            lambda: self.product_repository.find_listing_page(preview_length=preview_length, **page_args)
+        )
+
+    def stream_listing(self, preview_length, batch_size, sort='id', min_price=None, max_price=None):
+        # Tüm katalog için cursor; sayfa sayfa akıtıldığından önbelleğe alınmaz
+        return self.product_repository.iter_listing(sort=sort, min_price=min_price, max_price=max_price,
+                                                    preview_length=preview_length, batch_size=batch_size)
+
+    def export_products(self, fields, batch_size, supplier=None, after_id=None):
+        # Dışa aktarım cursor'ı; önbelleğe alınmaz. ValueError: geçersiz after_id
+        return self.product_repository.iter_export(fields, created_by=supplier, after_id=after_id,
+                                                   batch_size=batch_size)
+
+    def search_page(self, text, preview_length, **page_args):
+        # Arama sonuçları da katalog sürümüne bağlı; ürün eklenip silinince geçersiz olur.
+        # ValueError: geçersiz sayfa imleci
+        key = "search:" + "&".join(f"{name}={page_args[name]}" for name in sorted(page_args))
+        return self._cached(
+            f"{key}&preview_length={preview_length}&text={text}",
+            lambda: self.product_repository.search_page(text, preview_length=preview_length, **page_args)
+        )
+
+    @staticmethod
+    def _new_product(name, price, description, owner):
+        return {
+            "name": name,
+            "price": price,
+            "description": description,
+            "user_id": owner['id'],
+            "created_by": owner['username'],
+            "created_at": datetime.datetime.utcnow()
+        }
+
+    def create_product(self, name, price, description, owner):
+        product_id = self.product_repository.insert(self._new_product(name, price, description, owner))
+        self.invalidate_catalog()
+        return product_id
+
+    def import_products(self, rows, owner, batch_size=1000, max_errors=100):
+        # rows: (satır no, kayıt, hata) üreten akış (services.product_import.iter_rows).
+        # Geçerli satırlar batch_size'lık sırasız insert_many ile yazılır; bellekte en fazla
+        # bir batch ve max_errors hata tutulur. Katalog önbelleği yükleme sonunda bir kez
+        # geçersiz kılınır. {'inserted', 'failed', 'errors': [{'row', 'error'}]} döner.
+        report = {'inserted': 0, 'failed': 0, 'errors': []}
+        batch, numbers = [], []
+
+        def fail(number, message):
+            report['failed'] += 1
+            if len(report['errors']) < max_errors:
+                report['errors'].append({'row': number, 'error': message})
+
+        def flush():
+            failures = self.product_repository.insert_many(batch)
+            for index, message in failures:
+                fail(numbers[index], message)
+            report['inserted'] += len(batch) - len(failures)
+            batch.clear()
+            numbers.clear()
+
+        try:
+            for number, record, error in rows:
+                if error is None:
+                    try:
+                        product = self._new_product(*validate_product(record), owner)
+                    except ValueError as e:
+                        error = str(e)
+                if error is not None:
+                    fail(number, error)
+                    continue
+                batch.append(product)
+                numbers.append(number)
+                if len(batch) >= batch_size:
+                    flush()
+            if batch:
+                flush()
+        finally:
+            # Yükleme yarıda kesilse de yazılan ürünler listelerde görünmeli
+            if report['inserted']:
+                self.invalidate_catalog()
+        return report
+
+    def delete_product(self, product_id, username):
+        # Ürün yoksa ya da kullanıcıya ait değilse False
+        deleted = self.product_repository.delete_owned(product_id, username)
+        if deleted:
+            self.invalidate_catalog()
+        return deleted
+
+    def add_to_cart(self, user_id, product_id, quantity=1):
+        # Ürünün ad/fiyat bilgisi (önbellekten ya da tek find_one ile) + tek upsert.
+        # Ürün bulunamazsa None döner.
+        product = self.get_snapshot(product_id)
+        if product:
+            self.cart_repository.upsert_cart_line(user_id, product, quantity)
+            self.touch_cart(user_id)
+        return product
+
+    def cart_summary(self, user_id):
+        return self.cart_repository.cart_summary(user_id)
+
+    def remove_from_cart(self, user_id, item_id):
+        # Silinen satır ya da None
+        line = self.cart_repository.remove_line(user_id, item_id)
+        self.touch_cart(user_id)
+        return line
+
+    def update_cart(self, user_id, item_id, quantity):
+        # Miktar 0 veya negatifse satır silinir. (satır ya da None, silindi mi) döner.
+        if quantity > 0:
+            result = self.cart_repository.set_quantity(user_id, item_id, quantity), False
+        else:
+            result = self.cart_repository.remove_line(user_id, item_id), True
+        self.touch_cart(user_id)
+        return result
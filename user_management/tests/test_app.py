@@ -3,25 +3,28 @@ from unittest.mock import patch, MagicMock
 import json
 import datetime
 from bson.objectid import ObjectId
+from pymongo.errors import OperationFailure
 from flask import Flask
 import jwt
 from dotenv import load_dotenv
 import sys
 import os
-from user_management.services.product_services import product_service
-from user_management.services.product_services import product_service
+from user_management.services.product_services import ProductService
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'user_management')))
 
 
 
-# Ana uygulama dosyasını import edin
-from app import app, bcrypt, auth_service, user_repository, product_repository, products_collection, cart_collection
-
 load_dotenv()  # .env dosyasını yükler
 
-app = Flask(__name__)
-app.secret_key = os.getenv("SECRET_KEY")
+# Ana uygulama dosyasını import edin; HTTP testleri gerçek uygulamanın rotalarına gider
+import app as app_module
+from app import bcrypt, auth_service, user_repository, product_repository
+from repositories.mysql_repository import DuplicateEntryError
+
+app = app_module.app
+# .env yoksa oturum (session) için test anahtarı
+app.secret_key = app.secret_key or 'test-secret-key'
 
 class TestApp(unittest.TestCase):
     
@@ -63,6 +66,7 @@ class TestApp(unittest.TestCase):
         
     def tearDown(self):
         """Her test sonrası çalışacak metod"""
+        patch.stopall()
         self.app_ctx.pop()
 
     def _setup_mocks(self):
@@ -72,28 +76,66 @@ class TestApp(unittest.TestCase):
         self.mock_user_repo = self.user_repo_patcher.start()
         self.mock_user_repo.find_by_username.return_value = self.test_user
         self.mock_user_repo.find_by_id.return_value = self.test_user
+        self.mock_user_repo.find_by_ids.return_value = {1: self.test_user}
         self.mock_user_repo.get_user_mail.return_value = self.test_user
         
         # Product repository mock
         self.product_repo_patcher = patch('app.product_repository')
         self.mock_product_repo = self.product_repo_patcher.start()
+        self.mock_product_repo.find_listing_page.return_value = {'items': [self.test_product], 'next': None, 'prev': None}
+        self.mock_product_repo.find_by_id.return_value = self.test_product
+        self.mock_product_repo.find_snapshot.return_value = self.test_product
+        
+        self.mock_product_repo.insert.return_value = self.test_product['_id']
+        self.mock_product_repo.delete_owned.return_value = True
         
-        # MongoDB collections mock
-        self.products_patcher = patch('app.products_collection')
-        self.mock_products = self.products_patcher.start()
-        self.mock_products.find.return_value = [self.test_product]
-        self.mock_products.find_one.return_value = self.test_product
-        self.mock_products.insert_one.return_value = MagicMock(inserted_id=self.test_product['_id'])
+        self.cart_repo_patcher = patch('app.cart_repository')
+        self.mock_cart_repo = self.cart_repo_patcher.start()
+        self.mock_cart_repo.cart_summary.return_value = {
+            'items': [self.test_cart_item], 'total': 100.0, 'item_count': 1
+        }
+        
+        self.mock_cart_repo.remove_line.return_value = self.test_cart_item
+        self.mock_cart_repo.set_quantity.return_value = self.test_cart_item
         
-        self.cart_patcher = patch('app.cart_collection')
-        self.mock_cart = self.cart_patcher.start()
-        self.mock_cart.find.return_value = [self.test_cart_item]
-        self.mock_cart.find_one.return_value = self.test_cart_item
+        # Rotalar ürün/sepet işlemlerine ProductService üzerinden erişir
+        self.product_service_patcher = patch(
+            'app.product_service', ProductService(self.mock_product_repo, self.mock_cart_repo)
+        )
+        self.product_service_patcher.start()
+        
+        self.order_repo_patcher = patch('app.order_repository')
+        self.mock_order_repo = self.order_repo_patcher.start()
+        self.mock_order_repo.find_page.return_value = {
+            'items': [{
+                '_id': ObjectId(), 'user_id': 1, 'created_at': datetime.datetime(2024, 1, 1, 12, 0),
+                'lines': [{'name': 'Test Product', 'price': 100.0, 'quantity': 1, 'line_total': 100.0}],
+                'total': 100.0, 'item_count': 1,
+            }],
+            'next': None, 'prev': None,
+        }
+        
+        self.rollup_repo_patcher = patch('app.rollup_repository')
+        self.mock_rollup_repo = self.rollup_repo_patcher.start()
+        self.mock_rollup_repo.totals.return_value = [
+            {'name': 'supplier1', 'revenue': 250.0, 'units': 3, 'orders': 2}
+        ]
+        self.mock_rollup_repo.daily.return_value = []
+        
+        self.checkout_patcher = patch('app.checkout_service')
+        self.mock_checkout_service = self.checkout_patcher.start()
+        self.mock_checkout_service.checkout.return_value = (True, [('Satın alma başarılı!', 'success')])
         
         # Mail sender mock
         self.mail_patcher = patch('app.mail')
         self.mock_mail = self.mail_patcher.start()
         
+        # E-posta kuyruğu ve sepet özeti: arka plan thread'leri açılmaz
+        self.mail_outbox_patcher = patch('app.mail_outbox')
+        self.mock_mail_outbox = self.mail_outbox_patcher.start()
+        self.cart_digest_patcher = patch('app.cart_digest')
+        self.mock_cart_digest = self.cart_digest_patcher.start()
+        
         # Jwt mock
         self.jwt_patcher = patch('app.jwt')
         self.mock_jwt = self.jwt_patcher.start()
@@ -112,9 +154,9 @@ class TestApp(unittest.TestCase):
         self.mock_auth_service.register.return_value = True
         self.mock_auth_service.update_profile.return_value = (True, "Profil güncellendi")
         
-    def _get_mock_token_cookie(self):
-        """Test için mock token oluştur"""
-        return {'token': 'test.jwt.token'}
+    def _set_token_cookie(self):
+        """Test istemcisine mock token çerezini ekle"""
+        self.app.set_cookie('token', 'test.jwt.token')
     
     # TEST METHODS
         
@@ -179,14 +221,87 @@ class TestApp(unittest.TestCase):
     
     def test_products_list_with_token(self):
         """Token ile ürün listesi görüntüleme testi"""
+        self._set_token_cookie()
         with self.app.session_transaction() as sess:
             sess['username'] = 'testuser'
             sess['user_type'] = 'customer'
         
-        response = self.app.get('/products', 
-                               cookies=self._get_mock_token_cookie())
+        response = self.app.get('/products')
         self.assertEqual(response.status_code, 200)
     
+    def test_api_list_products(self):
+        """Sayfalı ürün listesi JSON API testi"""
+        response = self.app.get('/api/products?limit=5',
+                               headers={'Authorization': 'Bearer test.jwt.token'})
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data['products'][0]['_id'], str(self.test_product['_id']))
+        self.assertIsNone(data['next'])
+        self.mock_product_repo.find_listing_page.assert_called_with(
+            preview_length=160, limit=5, after=None, before=None, sort='id')
+    
+    def test_api_get_product(self):
+        """Ürün detayı tam dokümanla dönmeli"""
+        response = self.app.get(f'/api/products/{self.test_product["_id"]}',
+                               headers={'Authorization': 'Bearer test.jwt.token'})
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data['description'], 'This is a test product')
+    
+    def test_api_list_products_price_filter(self):
+        """Fiyat aralığı ve sıralama repository'ye iletilmeli"""
+        response = self.app.get('/api/products?sort=price_desc&min_price=100&max_price=600',
+                               headers={'Authorization': 'Bearer test.jwt.token'})
+        self.assertEqual(response.status_code, 200)
+        self.mock_product_repo.find_listing_page.assert_called_with(
+            preview_length=160, limit=20, after=None, before=None, sort='price_desc',
+            min_price=100.0, max_price=600.0)
+    
+    def test_api_search_products(self):
+        """Arama sonuçları JSON olarak dönmeli"""
+        self.mock_product_repo.search_page.return_value = {
+            'items': [dict(self.test_product, score=1.5)], 'next': None, 'prev': None}
+        response = self.app.get('/api/products/search?search=test',
+                               headers={'Authorization': 'Bearer test.jwt.token'})
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data['products'][0]['score'], 1.5)
+        self.mock_product_repo.search_page.assert_called_with(
+            'test', preview_length=160, limit=20, after=None, before=None)
+    
+    def test_api_bulk_add_products_requires_supplier(self):
+        """Toplu yükleme müşteri hesabına kapalı, tedarikçiye açık olmalı"""
+        body = '{"name": "Çay", "price": 12.5, "description": "Siyah çay"}\n'
+        headers = {'Authorization': 'Bearer test.jwt.token', 'Content-Type': 'application/x-ndjson'}
+        response = self.app.post('/api/products/bulk', data=body, headers=headers)
+        self.assertEqual(response.status_code, 403)
+        self.mock_product_repo.insert_many.assert_not_called()
+        
+        self.mock_user_repo.find_by_id.return_value = dict(self.test_user, user_type='supplier')
+        self.mock_product_repo.insert_many.return_value = []
+        response = self.app.post('/api/products/bulk', data=body, headers=headers)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(json.loads(response.data)['inserted'], 1)
+    
+    def test_api_export_products(self):
+        """Dışa aktarım ilk batch okunduktan sonra akıtılmalı; after ile CSV başlığı yazılmaz"""
+        self.mock_product_repo.iter_export.return_value = MagicMock(
+            __next__=MagicMock(side_effect=[self.test_product, StopIteration]))
+        response = self.app.get('/api/products/export?format=csv&fields=name&after=507f1f77bcf86cd799439010',
+                               headers={'Authorization': 'Bearer test.jwt.token'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_data(as_text=True), '507f1f77bcf86cd799439011,Test Product\r\n')
+    
+    def test_api_export_products_query_error(self):
+        """Sorgu hatası boş bir 200 yerine hata yanıtı olarak dönmeli"""
+        self.mock_product_repo.iter_export.return_value = MagicMock(
+            __next__=MagicMock(side_effect=OperationFailure("hint provided does not correspond to an existing index")))
+        response = self.app.get('/api/products/export',
+                               headers={'Authorization': 'Bearer test.jwt.token'})
+        self.assertEqual(response.status_code, 503)
+        self.assertNotIn('Content-Disposition', response.headers)
+        self.mock_product_repo.iter_export.return_value.close.assert_called_once()
+    
     def test_products_list_without_token(self):
         """Token olmadan ürün listesi görüntüleme testi"""
         response = self.app.get('/products')
@@ -195,19 +310,19 @@ class TestApp(unittest.TestCase):
     
     def test_add_product_get(self):
         """Ürün ekleme sayfası GET isteği testi"""
-        response = self.app.get('/add-product', 
-                               cookies=self._get_mock_token_cookie())
+        self._set_token_cookie()
+        response = self.app.get('/add-product')
         self.assertEqual(response.status_code, 200)
     
     def test_add_product_post(self):
         """Ürün ekleme POST isteği testi"""
+        self._set_token_cookie()
         response = self.app.post('/add-product', 
                                 data={
                                     'name': 'New Product',
                                     'price': '199.99',
                                     'description': 'A new test product'
-                                },
-                                cookies=self._get_mock_token_cookie())
+                                })
         self.assertEqual(response.status_code, 302)  # Yönlendirme kodu
         self.assertTrue('/products' in response.location)
     
@@ -230,56 +345,106 @@ class TestApp(unittest.TestCase):
     
     def test_add_to_cart(self):
         """Sepete ürün ekleme testi"""
-        response = self.app.post(f'/add-to-cart/{self.test_product["_id"]}', 
-                                cookies=self._get_mock_token_cookie())
+        self._set_token_cookie()
+        response = self.app.post(f'/add-to-cart/{self.test_product["_id"]}')
         self.assertEqual(response.status_code, 302)  # Yönlendirme kodu
         self.assertTrue('/cart' in response.location)
+        self.mock_cart_repo.upsert_cart_line.assert_called_once_with(1, self.test_product, 1)
     
     def test_view_cart(self):
         """Sepeti görüntüleme testi"""
-        response = self.app.get('/cart', 
-                               cookies=self._get_mock_token_cookie())
+        self._set_token_cookie()
+        response = self.app.get('/cart')
         self.assertEqual(response.status_code, 200)
+        self.assertIn('100.0 TL', response.get_data(as_text=True))
+        self.mock_cart_repo.cart_summary.assert_called_once_with(1)
+    
+    def test_cart_not_modified(self):
+        """Sepet sürümü değişmediyse 304 dönmeli, sepet okunmamalı"""
+        self._set_token_cookie()
+        cache = MagicMock()
+        cache.version.return_value = (3, 1700000000.0)
+        with patch('app.product_service', ProductService(self.mock_product_repo, self.mock_cart_repo, cache)):
+            response = self.app.get('/cart')
+            etag = response.headers['ETag']
+            response = self.app.get('/cart', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.mock_cart_repo.cart_summary.assert_called_once_with(1)
     
     def test_remove_from_cart(self):
         """Sepetten ürün çıkarma testi"""
-        response = self.app.post(f'/remove-from-cart/{self.test_cart_item["_id"]}', 
-                                cookies=self._get_mock_token_cookie())
+        self._set_token_cookie()
+        response = self.app.post(f'/remove-from-cart/{self.test_cart_item["_id"]}')
         self.assertEqual(response.status_code, 302)  # Yönlendirme kodu
         self.assertTrue('/cart' in response.location)
     
     def test_update_cart(self):
         """Sepet güncelleme testi"""
+        self._set_token_cookie()
         response = self.app.post(f'/update-cart/{self.test_cart_item["_id"]}', 
-                                data={'quantity': '2'},
-                                cookies=self._get_mock_token_cookie())
+                                data={'quantity': '2'})
         self.assertEqual(response.status_code, 302)  # Yönlendirme kodu
         self.assertTrue('/cart' in response.location)
     
     def test_checkout(self):
         """Checkout işlemi testi"""
+        self._set_token_cookie()
         with patch('app.flash') as mock_flash:
-            response = self.app.post('/checkout', 
-                                   cookies=self._get_mock_token_cookie())
+            response = self.app.post('/checkout')
             self.assertEqual(response.status_code, 302)  # Yönlendirme kodu
             self.assertTrue('/products' in response.location)
     
+    def test_order_history(self):
+        """Sipariş geçmişi testi"""
+        self._set_token_cookie()
+        for path in ('/orders', '/order-history'):
+            response = self.app.get(path)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('Test Product', response.get_data(as_text=True))
+        self.mock_order_repo.find_page.assert_called_with(1, after=None, before=None, limit=10)
+    
+    def test_admin_dashboard(self):
+        """Admin paneli testi"""
+        self._set_token_cookie()
+        response = self.app.get('/admin')
+        self.assertEqual(response.status_code, 403)
+        
+        app.config['ADMIN_USER_IDS'] = {1}
+        try:
+            response = self.app.get('/admin')
+        finally:
+            app.config['ADMIN_USER_IDS'] = set()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('supplier1', response.get_data(as_text=True))
+        self.mock_rollup_repo.totals.assert_any_call('supplier')
+
+    def test_admin_ignores_username_claim(self):
+        """Kullanıcı adını 'admin' yapan kullanıcı admin olmaz"""
+        self.mock_jwt.decode.return_value = {'user_id': 2, 'username': 'admin', 'user_type': 'customer'}
+        self._set_token_cookie()
+        app.config['ADMIN_USER_IDS'] = {1}
+        try:
+            self.assertEqual(self.app.get('/admin').status_code, 403)
+            self.assertEqual(self.app.get('/admin/pool-stats').status_code, 403)
+        finally:
+            app.config['ADMIN_USER_IDS'] = set()
+
     def test_profile_get(self):
         """Profil sayfası GET isteği testi"""
-        response = self.app.get('/profile', 
-                               cookies=self._get_mock_token_cookie())
+        self._set_token_cookie()
+        response = self.app.get('/profile')
         self.assertEqual(response.status_code, 200)
     
     def test_profile_post(self):
         """Profil güncelleme testi"""
+        self._set_token_cookie()
         response = self.app.post('/profile', 
                                 data={
                                     'username': 'updateduser',
                                     'email': 'updated@example.com',
                                     'current_password': 'password123',
                                     'new_password': 'newpassword123'
-                                },
-                                cookies=self._get_mock_token_cookie())
+                                })
         self.assertEqual(response.status_code, 200)
     
     def test_forget_password_get(self):
@@ -300,7 +465,7 @@ class TestApp(unittest.TestCase):
         response = self.app.get('/logout')
         self.assertEqual(response.status_code, 302)  # Yönlendirme kodu
         self.assertTrue('/login' in response.location)
-        self.assertEqual(response.cookies.get('token'), '')  # Token temizlendi
+        self.assertIn('token=;', response.headers.get('Set-Cookie', ''))  # Token temizlendi
 
 
 class TestAuthService(unittest.TestCase):
@@ -347,6 +512,23 @@ class TestAuthService(unittest.TestCase):
         result = self.auth_service.login('nonexistentuser', 'password123')
         self.assertIsNone(result)
 
+    def test_update_profile_single_write(self):
+        """Şifre değişmiyorsa profil tek UPDATE ile güncellenmeli"""
+        self.mock_user_repo.update_user.return_value = True
+        success, message = self.auth_service.update_profile(1, username='newname', email='new@example.com')
+        self.assertTrue(success)
+        self.mock_user_repo.find_by_id.assert_not_called()
+        self.mock_user_repo.find_by_username.assert_not_called()
+        self.mock_user_repo.find_by_email.assert_not_called()
+        self.mock_user_repo.update_user.assert_called_once_with(1, {'username': 'newname', 'email': 'new@example.com'})
+
+    def test_update_profile_duplicate_username(self):
+        """Kullanıcı adı çakışması mevcut mesajla dönmeli"""
+        self.mock_user_repo.update_user.side_effect = DuplicateEntryError('username')
+        success, message = self.auth_service.update_profile(1, username='taken')
+        self.assertFalse(success)
+        self.assertEqual(message, "Bu kullanıcı adı zaten kullanılıyor.")
+
 
 class TestProductService(unittest.TestCase):
     def setUp(self):
@@ -362,11 +544,11 @@ class TestProductService(unittest.TestCase):
             'created_by': 'testuser',
             'created_at': datetime.datetime.utcnow()
         }
-        self.mock_product_repo.get_all_products.return_value = [self.test_product]
-        self.mock_product_repo.get_product_by_id.return_value = self.test_product
+        self.mock_product_repo.find_all.return_value = [self.test_product]
+        self.mock_product_repo.find_by_id.return_value = self.test_product
+        self.mock_cart_repo = MagicMock()
         
-        self.product_service = product_service
-        self.product_service.product_repository = self.mock_product_repo
+        self.product_service = ProductService(self.mock_product_repo, self.mock_cart_repo)
     
     def test_get_all_products(self):
         """Tüm ürünleri getirme testi"""
@@ -379,6 +561,62 @@ class TestProductService(unittest.TestCase):
         result = self.product_service.get_product_by_id('507f1f77bcf86cd799439011')
         self.assertIsNotNone(result)
         self.assertEqual(result['name'], 'Test Product')
+    
+    def test_create_product(self):
+        """Ürün sahibi bilgileriyle eklenmeli"""
+        self.product_service.create_product('Yeni', 10.0, 'Açıklama', {'id': 7, 'username': 'supplier'})
+        product = self.mock_product_repo.insert.call_args[0][0]
+        self.assertEqual(product['user_id'], 7)
+        self.assertEqual(product['created_by'], 'supplier')
+    
+    def test_add_to_cart_unknown_product(self):
+        """Bulunamayan ürün sepete eklenmemeli"""
+        self.mock_product_repo.find_snapshot.return_value = None
+        self.assertIsNone(self.product_service.add_to_cart(1, 'yok'))
+        self.mock_cart_repo.upsert_cart_line.assert_not_called()
+    
+    def test_catalog_invalidated_on_create(self):
+        """Ürün eklenince katalog önbelleği geçersiz kılınmalı"""
+        cache = MagicMock()
+        service = ProductService(self.mock_product_repo, self.mock_cart_repo, cache)
+        service.create_product('Yeni', 10.0, 'Açıklama', {'id': 7, 'username': 'supplier'})
+        cache.invalidate.assert_called_once_with('catalog')
+    
+    def test_cart_change_bumps_version(self):
+        """Sepet değişince sepet sürümü artırılmalı"""
+        cache = MagicMock()
+        service = ProductService(self.mock_product_repo, self.mock_cart_repo, cache)
+        service.add_to_cart(1, '507f1f77bcf86cd799439011')
+        cache.bump.assert_called_once_with('cart:1')
+    
+    def test_search_page(self):
+        """Arama katalog önbelleğinden okunmalı"""
+        cache = MagicMock()
+        service = ProductService(self.mock_product_repo, self.mock_cart_repo, cache)
+        service.search_page('lamba', 160, limit=20, after=None, before=None)
+        namespace, key, loader = cache.get_or_load.call_args[0]
+        self.assertEqual(namespace, 'catalog')
+        self.assertIn('text=lamba', key)
+        loader()
+        self.mock_product_repo.search_page.assert_called_once_with(
+            'lamba', preview_length=160, limit=20, after=None, before=None)
+    
+    def test_stream_listing_bypasses_cache(self):
+        """Akış cursor'ı önbelleğe yazılmamalı"""
+        cache = MagicMock()
+        service = ProductService(self.mock_product_repo, self.mock_cart_repo, cache)
+        cursor = service.stream_listing(160, 500, sort='price_asc', min_price=10.0)
+        self.assertIs(cursor, self.mock_product_repo.iter_listing.return_value)
+        self.mock_product_repo.iter_listing.assert_called_once_with(
+            sort='price_asc', min_price=10.0, max_price=None, preview_length=160, batch_size=500)
+        cache.get_or_load.assert_not_called()
+    
+    def test_update_cart_zero_removes_line(self):
+        """Miktar 0 ise satır silinmeli"""
+        line, removed = self.product_service.update_cart(1, 'item', 0)
+        self.assertTrue(removed)
+        self.mock_cart_repo.remove_line.assert_called_once_with(1, 'item')
+        self.mock_cart_repo.set_quantity.assert_not_called()
 
 
 if __name__ == '__main__':
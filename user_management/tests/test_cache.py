@@ -0,0 +1,53 @@
+import unittest
+from user_management.repositories.cache import LRUCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+class TestLRUCache(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = LRUCache(max_size=2, ttl=10, clock=self.clock)
+
+    def test_hit_and_miss(self):
+        self.assertIsNone(self.cache.get('a'))
+        self.cache.set('a', 1)
+        self.assertEqual(self.cache.get('a'), 1)
+        stats = self.cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+
+    def test_least_recently_used_is_evicted(self):
+        self.cache.set('a', 1)
+        self.cache.set('b', 2)
+        self.cache.get('a')
+        self.cache.set('c', 3)
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.get('a'), 1)
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+
+    def test_entry_expires(self):
+        self.cache.set('a', 1)
+        self.clock.now = 11
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(self.cache.stats()['expirations'], 1)
+
+    def test_invalidate_tag(self):
+        self.cache.set('a', 1, tags=('user:1',))
+        self.cache.set('b', 2, tags=('user:1',))
+        self.cache.invalidate_tag('user:1')
+        self.assertEqual(len(self.cache), 0)
+
+    def test_stale_write_after_invalidation_is_rejected(self):
+        version = self.cache.version()
+        self.cache.invalidate_tag('user:1')
+        self.assertFalse(self.cache.set('a', 1, if_version=version))
+        self.assertIsNone(self.cache.get('a'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import os
+from concurrent.futures import ThreadPoolExecutor
+from bson.objectid import ObjectId
+from dotenv import load_dotenv
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+from user_management.repositories.mongo_repository import MongoCartRepository
+from user_management.migrations.mongo_indexes import MONGO_INDEXES, ensure_indexes
+
+load_dotenv()
+
+# Canlı MongoDB gerektirir (MONGO_URI); sunucu yoksa testler atlanır
+class TestCartConcurrency(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.client = MongoClient(os.getenv('MONGO_URI', 'mongodb://localhost:27017'),
+                                 serverSelectionTimeoutMS=1000)
+        try:
+            cls.client.admin.command('ping')
+        except PyMongoError:
+            cls.client.close()
+            raise unittest.SkipTest("MongoDB sunucusuna bağlanılamadı")
+        cls.db = cls.client[f'test_cart_{ObjectId()}']
+        ensure_indexes(cls.db, {'cart': MONGO_INDEXES['cart']})
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.client.drop_database(cls.db.name)
+        cls.client.close()
+
+    def setUp(self):
+        self.db.cart.delete_many({})
+        self.repo = MongoCartRepository(self.db)
+        self.product = {'_id': ObjectId(), 'name': 'Test Product', 'price': 100.0}
+
+    def test_parallel_adds_create_single_line(self):
+        """Aynı ürüne eş zamanlı eklemeler tek satır ve doğru miktar üretmeli"""
+        adds = 50
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            list(executor.map(lambda _: self.repo.upsert_cart_line(1, self.product), range(adds)))
+
+        lines = list(self.db.cart.find({'user_id': 1}))
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(lines[0]['quantity'], adds)
+        self.assertEqual(lines[0]['name'], 'Test Product')
+
+    def test_users_have_separate_lines(self):
+        """Farklı kullanıcılar aynı ürün için ayrı satırlara sahip olmalı"""
+        self.repo.upsert_cart_line(1, self.product)
+        self.repo.upsert_cart_line(2, self.product)
+        self.assertEqual(self.db.cart.count_documents({'product_id': str(self.product['_id'])}), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+from unittest.mock import MagicMock
+from flask import Flask
+from flask_mail import Mail
+from user_management.services.cart_digest import CartDigestNotifier, digest_body
+
+def event(action, product):
+    return {'action': action, 'product': product}
+
+class TestCartDigest(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['MAIL_DEFAULT_SENDER'] = 'magaza@example.com'
+        Mail(self.app)
+        self.repo = MagicMock()
+        self.outbox = MagicMock()
+        self.notifier = CartDigestNotifier(self.repo, self.outbox, self.app, window_seconds=60)
+        # Testlerde arka plan thread'i açılmaz; özetler flush_due ile elle gönderilir
+        self.notifier.start = MagicMock()
+
+    def test_digest_body_groups_by_product(self):
+        body = digest_body([event('add', 'Çay'), event('add', 'Çay'), event('add', 'Vazo'),
+                            event('remove', 'Çay')])
+        self.assertIn('- "Çay": 2 kez eklendi, çıkarıldı', body)
+        self.assertIn('- "Vazo": eklendi', body)
+
+    def test_digest_body_reports_trimmed_events(self):
+        body = digest_body([event('update', 'Çay')], event_count=5)
+        self.assertIn('ve 4 değişiklik daha', body)
+
+    def test_record_does_not_send(self):
+        self.notifier.record(7, 'a@example.com', 'add', 'Çay')
+        user_id, email, recorded, window = self.repo.record.call_args[0]
+        self.assertEqual((user_id, email, recorded['action'], recorded['product'], window),
+                         (7, 'a@example.com', 'add', 'Çay', 60))
+        self.outbox.send.assert_not_called()
+
+    def test_flush_sends_one_digest_per_user(self):
+        self.repo.claim_due.side_effect = [
+            {'_id': 1, 'email': 'a@example.com', 'event_count': 3,
+             'events': [event('add', 'Çay'), event('add', 'Vazo'), event('update', 'Çay')]},
+            {'_id': 2, 'email': 'b@example.com', 'event_count': 1, 'events': [event('remove', 'Vazo')]},
+            None,
+        ]
+        self.assertEqual(self.notifier.flush_due(), 2)
+        messages = [c[0][0] for c in self.outbox.send.call_args_list]
+        self.assertEqual([m.recipients for m in messages], [['a@example.com'], ['b@example.com']])
+        self.assertIn('"Çay": eklendi, miktarı güncellendi', messages[0].body)
+        self.assertEqual([c[0][0]['_id'] for c in self.repo.finish.call_args_list], [1, 2])
+        self.repo.pending.return_value = 0
+        self.assertEqual(self.notifier.stats()['events_per_digest'], 2)
+
+    def test_enqueue_failure_keeps_events(self):
+        self.repo.claim_due.side_effect = [
+            {'_id': 1, 'email': 'a@example.com', 'event_count': 1, 'events': [event('add', 'Çay')]},
+        ]
+        self.outbox.send.side_effect = Exception('bağlantı hatası')
+        with self.assertRaises(Exception):
+            self.notifier.flush_due()
+        # Hareketler silinmedi; kira dolunca özet yeniden denenir
+        self.repo.finish.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+from unittest.mock import MagicMock
+from flask import Flask
+from flask_mail import Mail
+from user_management.services.checkout_service import CheckoutService
+
+class TestCheckoutService(unittest.TestCase):
+
+    def setUp(self):
+        # Message oluşturmak için uygulama bağlamı gerekli
+        self.app = Flask(__name__)
+        Mail(self.app)
+        self.app_ctx = self.app.app_context()
+        self.app_ctx.push()
+
+        self.product_repo = MagicMock()
+        self.cart_repo = MagicMock()
+        self.user_repo = MagicMock()
+        self.order_repo = MagicMock()
+        self.rollup_repo = MagicMock()
+        self.mail = MagicMock()
+        self.connection = self.mail.connect.return_value.__enter__.return_value
+
+        self.cart_repo.find_lines.return_value = [
+            {'product_id': 'p1', 'name': 'Ürün 1', 'price': 10.0, 'quantity': 2},
+            {'product_id': 'p2', 'name': 'Ürün 2', 'price': 5.0, 'quantity': 1},
+            {'product_id': 'p3', 'name': 'Ürün 3', 'price': 7.0, 'quantity': 1},
+        ]
+        self.product_repo.find_by_ids.return_value = {
+            'p1': {'user_id': 1, 'created_by': 'supplier1'},
+            'p2': {'user_id': 1, 'created_by': 'supplier1'},
+            'p3': {'user_id': 2, 'created_by': 'supplier2'},
+        }
+        self.user_repo.find_by_ids.return_value = {
+            1: {'id': 1, 'username': 'supplier1', 'email': 's1@example.com'},
+            2: {'id': 2, 'username': 'supplier2', 'email': 's2@example.com'},
+        }
+        self.service = CheckoutService(self.product_repo, self.cart_repo, self.user_repo,
+                                       self.order_repo, self.mail, self.rollup_repo)
+
+    def tearDown(self):
+        self.app_ctx.pop()
+
+    def test_one_email_per_supplier(self):
+        success, messages = self.service.checkout(42)
+        self.assertTrue(success)
+        self.assertEqual(self.connection.send.call_count, 2)
+        first = self.connection.send.call_args_list[0][0][0]
+        self.assertEqual(first.recipients, ['s1@example.com'])
+        self.assertIn('Toplam: 25.0 TL', first.body)
+        self.order_repo.place_order.assert_called_once()
+
+    def test_order_document(self):
+        self.service.checkout(42)
+        order, user_id, lines = self.order_repo.place_order.call_args[0]
+        self.assertEqual(lines, self.cart_repo.find_lines.return_value)
+        self.assertEqual(user_id, 42)
+        self.assertEqual(order['user_id'], 42)
+        self.assertEqual(order['total'], 32.0)
+        self.assertEqual(order['item_count'], 4)
+        self.assertEqual(len(order['lines']), 3)
+        self.assertEqual(order['lines'][2]['supplier'], 'supplier2')
+        self.assertEqual(order['lines'][0]['line_total'], 20.0)
+        self.rollup_repo.record_order.assert_called_once_with(order)
+
+    def test_rollup_failure_keeps_order(self):
+        self.rollup_repo.record_order.side_effect = Exception("bağlantı hatası")
+        success, messages = self.service.checkout(42)
+        self.assertTrue(success)
+        self.assertEqual(self.connection.send.call_count, 2)
+
+    def test_batched_lookups(self):
+        self.service.checkout(42)
+        self.product_repo.find_by_ids.assert_called_once()
+        self.user_repo.find_by_ids.assert_called_once_with({1, 2})
+
+    def test_empty_cart(self):
+        self.cart_repo.find_lines.return_value = []
+        success, messages = self.service.checkout(42)
+        self.assertFalse(success)
+        self.assertEqual(messages, [('Sepetiniz boş!', 'error')])
+        self.order_repo.place_order.assert_not_called()
+
+    def test_mail_failure_keeps_order(self):
+        self.connection.send.side_effect = Exception("SMTP hatası")
+        success, messages = self.service.checkout(42)
+        self.assertTrue(success)
+        self.assertIn(('E-posta gönderim hatası: SMTP hatası', 'error'), messages)
+        self.order_repo.place_order.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
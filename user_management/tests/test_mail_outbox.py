@@ -0,0 +1,116 @@
+import datetime
+import unittest
+from unittest.mock import MagicMock, patch
+from flask import Flask
+from flask_mail import Mail, Message
+from user_management.services.mail_outbox import MailOutbox, TimeoutConnection, build_message, serialize_message
+
+def queued(subject, attempts=1):
+    # Kiralanmış ileti: attempts kiralamada artırılmıştır
+    return {'_id': subject, 'lease_id': 1, 'attempts': attempts, 'subject': subject,
+            'recipients': ['a@example.com'], 'body': 'gövde', 'created_at': datetime.datetime.utcnow()}
+
+class TestMailOutbox(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['MAIL_DEFAULT_SENDER'] = 'magaza@example.com'
+        Mail(self.app)
+        self.repo = MagicMock()
+        self.mail = MagicMock()
+        self.connection = self.mail.connect.return_value.__enter__.return_value
+        self.outbox = MailOutbox(self.repo, self.mail, self.app, workers=1, batch_size=10,
+                                 max_attempts=3, backoff_base=10, backoff_max=60)
+        # Testlerde arka plan thread'i açılmaz; kuyruk drain_once ile elle boşaltılır
+        self.outbox.start = MagicMock()
+
+    def claims(self, *documents):
+        self.repo.claim.side_effect = list(documents) + [None]
+
+    def test_message_round_trip(self):
+        with self.app.app_context():
+            message = Message('Konu', recipients=['a@example.com'], body='gövde', sender=('Mağaza', 'm@example.com'))
+            rebuilt = build_message(serialize_message(message))
+        self.assertEqual((rebuilt.subject, rebuilt.recipients, rebuilt.body, rebuilt.sender),
+                         ('Konu', ['a@example.com'], 'gövde', message.sender))
+
+    def test_send_only_enqueues(self):
+        with self.app.app_context():
+            self.outbox.send(Message('Konu', recipients=['a@example.com'], body='gövde'))
+        self.repo.enqueue.assert_called_once()
+        self.assertEqual(self.repo.enqueue.call_args[0][0]['subject'], 'Konu')
+        self.mail.connect.assert_not_called()
+        self.outbox.start.assert_called_once()
+
+    def test_drain_sends_batch_over_one_connection(self):
+        self.claims(queued('bir'), queued('iki'))
+        self.assertEqual(self.outbox.drain_once(), 2)
+        self.mail.connect.assert_called_once()
+        self.assertEqual([c[0][0].subject for c in self.connection.send.call_args_list], ['bir', 'iki'])
+        self.assertEqual(self.repo.mark_sent.call_count, 2)
+        self.assertEqual(self.outbox.stats()['sent'], 2)
+
+    def test_failed_message_is_retried_with_backoff(self):
+        self.claims(queued('bir'), queued('iki'))
+        self.connection.send.side_effect = [Exception('SMTP hatası'), None]
+        before = datetime.datetime.utcnow()
+        self.outbox.drain_once()
+        document, next_attempt_at, error = self.repo.mark_retry.call_args[0]
+        self.assertEqual((document['subject'], error), ('bir', 'SMTP hatası'))
+        # İlk yeniden deneme: backoff_base ±%50
+        self.assertGreaterEqual(next_attempt_at, before + datetime.timedelta(seconds=5))
+        self.assertLessEqual(next_attempt_at, datetime.datetime.utcnow() + datetime.timedelta(seconds=15))
+        self.repo.mark_sent.assert_called_once()
+
+    def test_gives_up_after_max_attempts(self):
+        self.claims(queued('bir', attempts=3))
+        self.connection.send.side_effect = Exception('SMTP hatası')
+        self.outbox.drain_once()
+        self.repo.mark_failed.assert_called_once()
+        self.repo.mark_retry.assert_not_called()
+        self.assertEqual(self.outbox.stats()['failed'], 1)
+
+    def test_connect_failure_retries_claimed_message(self):
+        self.claims(queued('bir'), queued('iki'))
+        self.mail.connect.side_effect = Exception('bağlantı reddedildi')
+        self.outbox.drain_once()
+        # İletiler gönderilmeden hemen önce tek tek kiralanır; ikincisi hiç kiralanmadı
+        self.assertEqual(self.repo.mark_retry.call_count, 1)
+        self.assertEqual(self.repo.claim.call_count, 1)
+
+    def test_batch_size_limits_claims_per_connection(self):
+        self.outbox.batch_size = 2
+        self.claims(queued('bir'), queued('iki'), queued('üç'))
+        self.assertEqual(self.outbox.drain_once(), 2)
+        self.assertEqual(self.repo.claim.call_count, 2)
+
+    def test_lost_lease_is_counted(self):
+        self.claims(queued('bir'))
+        self.repo.mark_sent.return_value = False
+        self.outbox.drain_once()
+        self.assertEqual(self.outbox.stats()['lease_lost'], 1)
+
+    def test_reclaimed_past_max_attempts_is_not_sent(self):
+        # Worker'ı her seferinde çökerten ileti: kira doldukça yeniden kiralanır
+        self.claims(queued('bir', attempts=4))
+        self.assertEqual(self.outbox.drain_once(), 0)
+        self.connection.send.assert_not_called()
+        self.repo.mark_failed.assert_called_once()
+
+    def test_smtp_timeout_shorter_than_lease(self):
+        mail = Mail(self.app)
+        outbox = MailOutbox(self.repo, mail, self.app, lease_seconds=40, smtp_timeout=30)
+        self.assertEqual(outbox.smtp_timeout, 20)
+        with self.app.app_context():
+            connection = outbox._connect()
+        self.assertIsInstance(connection, TimeoutConnection)
+        with patch('user_management.services.mail_outbox.smtplib.SMTP') as smtp:
+            connection.configure_host()
+        self.assertEqual(smtp.call_args[1]['timeout'], 20)
+
+    def test_backoff_is_capped(self):
+        for _ in range(20):
+            self.assertLessEqual(self.outbox.backoff(10), 90)
+
+if __name__ == '__main__':
+    unittest.main()
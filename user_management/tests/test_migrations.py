@@ -0,0 +1,122 @@
+import unittest
+from unittest.mock import MagicMock
+from user_management.migrations import mysql_migrations, mongo_indexes
+from user_management.repositories.mongo_repository import PRODUCT_SORTS, PRODUCT_SORT_INDEXES
+
+class TestMySQLMigrations(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = MagicMock()
+        self.cursor = MagicMock()
+        self.conn.cursor.return_value = self.cursor
+        self.first = MagicMock()
+        self.second = MagicMock()
+        self.migrations = [
+            (1, 'ilk', self.first),
+            (2, 'ikinci', self.second),
+        ]
+
+    def test_applies_only_pending_migrations(self):
+        self.cursor.fetchall.return_value = [(1,)]
+        applied = mysql_migrations.migrate(self.conn, self.migrations)
+        self.assertEqual(applied, [2])
+        self.first.assert_not_called()
+        self.second.assert_called_once_with(self.cursor)
+        self.cursor.execute.assert_any_call(
+            "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+            (2, 'ikinci')
+        )
+
+    def test_rerun_is_noop(self):
+        self.cursor.fetchall.return_value = [(1,), (2,)]
+        applied = mysql_migrations.migrate(self.conn, self.migrations)
+        self.assertEqual(applied, [])
+        self.conn.commit.assert_not_called()
+
+    def test_index_exists_matches_column_prefix(self):
+        self.cursor.fetchall.return_value = [
+            ('PRIMARY', 0, 'id'),
+            ('uq_users_email', 0, 'email'),
+        ]
+        self.assertTrue(mysql_migrations.index_exists(self.cursor, 'users', ('email',), unique=True))
+        self.assertFalse(mysql_migrations.index_exists(self.cursor, 'users', ('username',), unique=True))
+
+    def test_composite_unique_index_not_unique_on_prefix(self):
+        self.cursor.fetchall.return_value = [
+            ('uq_users_email_type', 0, 'email'),
+            ('uq_users_email_type', 0, 'user_type'),
+        ]
+        self.assertFalse(mysql_migrations.index_exists(self.cursor, 'users', ('email',), unique=True))
+        self.assertTrue(mysql_migrations.index_exists(self.cursor, 'users', ('email',)))
+        # Bileşik unique indeks email'i tekil yapmadığı için uq_users_email yine eklenir
+        self.cursor.fetchall.side_effect = [self.cursor.fetchall.return_value, []]
+        mysql_migrations.add_unique_email_index(self.cursor)
+        self.cursor.execute.assert_called_with("ALTER TABLE users ADD UNIQUE INDEX uq_users_email (email)")
+
+    def test_email_index_not_added_over_duplicates(self):
+        self.cursor.fetchall.side_effect = [[], [('dup@example.com', 2)]]
+        with self.assertRaises(RuntimeError):
+            mysql_migrations.add_unique_email_index(self.cursor)
+
+class TestMongoIndexes(unittest.TestCase):
+
+    def test_find_collscans(self):
+        db = MagicMock()
+        cursor = db.__getitem__.return_value.find.return_value
+        cursor.limit.return_value.explain.side_effect = [
+            {'queryPlanner': {'winningPlan': {'stage': 'COLLSCAN'}}},
+            {'queryPlanner': {'winningPlan': {'stage': 'FETCH', 'inputStage': {'stage': 'IXSCAN'}}}},
+        ]
+        queries = [
+            ('sepet', 'cart', {'user_id': 0}, None),
+            ('ürün', 'products', {'created_by': ''}, None),
+        ]
+        result = mongo_indexes.find_collscans(db, queries)
+        self.assertEqual(result, [('sepet', 'cart', ['COLLSCAN'])])
+
+    def test_find_blocking_sort(self):
+        db = MagicMock()
+        cursor = db.__getitem__.return_value.find.return_value
+        cursor.sort.return_value.limit.return_value.explain.return_value = {
+            'queryPlanner': {'winningPlan': {'stage': 'SORT', 'inputStage': {'stage': 'FETCH'}}}}
+        queries = [('fiyat', 'products', {'price': {'$gte': 0}}, [('created_at', -1), ('_id', -1)])]
+        result = mongo_indexes.find_collscans(db, queries)
+        self.assertEqual(result, [('fiyat', 'products', ['SORT', 'FETCH'])])
+
+    def test_filtered_listing_explained_with_app_hint(self):
+        # --explain, find_page'in fiyat filtresiyle kullandığı indeksi doğrulamalı
+        hints = {tuple(query[3]): query[4] for query in mongo_indexes.ROUTE_QUERIES
+                 if 'price' in query[2]}
+        for name, sort in PRODUCT_SORTS.items():
+            self.assertEqual(hints[tuple(sort)], PRODUCT_SORT_INDEXES[name])
+        index_names = {model.document['name'] for model in mongo_indexes.MONGO_INDEXES['products']}
+        self.assertTrue(set(PRODUCT_SORT_INDEXES.values()) <= index_names)
+
+        db = MagicMock()
+        cursor = db.__getitem__.return_value.find.return_value
+        cursor.sort.return_value.hint.return_value.limit.return_value.explain.return_value = {
+            'queryPlanner': {'winningPlan': {'stage': 'FETCH', 'inputStage': {'stage': 'IXSCAN'}}}}
+        queries = [('fiyat', 'products', {'price': {'$gte': 0}}, [('_id', 1)], 'products_id_price')]
+        self.assertEqual(mongo_indexes.find_collscans(db, queries), [])
+        cursor.sort.return_value.hint.assert_called_once_with('products_id_price')
+
+    def test_missing_indexes(self):
+        db = MagicMock()
+        db.__getitem__.return_value.index_information.return_value = {
+            '_id_': {'key': [('_id', 1)]},
+            'cart_user_product': {'key': [('user_id', 1), ('product_id', 1)], 'unique': True},
+        }
+        missing = mongo_indexes.missing_indexes(db, {'cart': mongo_indexes.MONGO_INDEXES['cart']})
+        self.assertEqual(missing, [])
+
+    def test_text_index_matches_live_key(self):
+        db = MagicMock()
+        db.__getitem__.return_value.index_information.return_value = {
+            'products_text': {'key': [('_fts', 'text'), ('_ftsx', 1)]},
+        }
+        text_index = [model for model in mongo_indexes.MONGO_INDEXES['products']
+                      if model.document['name'] == 'products_text']
+        self.assertEqual(mongo_indexes.missing_indexes(db, {'products': text_index}), [])
+
+if __name__ == '__main__':
+    unittest.main()
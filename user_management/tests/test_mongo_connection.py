@@ -0,0 +1,52 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from user_management.repositories.mongo_connection import MongoConnection, LazyCollection
+
+class TestMongoConnection(unittest.TestCase):
+
+    def setUp(self):
+        self.factory = MagicMock(side_effect=lambda *args, **kwargs: MagicMock())
+        self.mongo = MongoConnection('mongodb://localhost:27017', db_name='shop', max_pool_size=20,
+                                     min_pool_size=2, client_factory=self.factory)
+
+    def test_lazy_client(self):
+        products = self.mongo['products']
+        self.assertIsInstance(products, LazyCollection)
+        self.factory.assert_not_called()
+
+        products.find_one({})
+        self.factory.assert_called_once()
+        kwargs = self.factory.call_args[1]
+        self.assertEqual(kwargs['maxPoolSize'], 20)
+        self.assertEqual(kwargs['minPoolSize'], 2)
+
+    def test_single_client_per_process(self):
+        self.mongo['products'].find_one({})
+        self.mongo['cart'].find_one({})
+        self.assertIs(self.mongo.client, self.mongo.client)
+        self.assertEqual(self.factory.call_count, 1)
+
+    def test_new_client_after_fork(self):
+        parent = self.mongo.client
+        with patch('user_management.repositories.mongo_connection.os.getpid', return_value=-1):
+            child = self.mongo.client
+        self.assertIsNot(parent, child)
+        parent.close.assert_not_called()
+
+    def test_stats(self):
+        self.mongo.client
+        listener = self.factory.call_args[1]['event_listeners'][0]
+        listener.connection_created(None)
+        listener.connection_checked_out(None)
+        stats = self.mongo.stats()
+        self.assertTrue(stats['connected'])
+        self.assertEqual(stats['open'], 1)
+        self.assertEqual(stats['in_use'], 1)
+        self.assertEqual(stats['max_pool_size'], 20)
+
+    def test_invalid_pool_size(self):
+        with self.assertRaises(ValueError):
+            MongoConnection(max_pool_size=1, min_pool_size=5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import datetime
+import unittest
+from bson.objectid import ObjectId
+from user_management.repositories.pagination import keyset_page
+from user_management.repositories.mongo_repository import (PRODUCT_SORTS, MongoCartDigestRepository,
+                                                           MongoCacheVersionRepository, MongoCartRepository,
+                                                           MongoMailOutboxRepository, MongoOrderRepository)
+
+try:
+    import mongomock
+except ImportError:
+    mongomock = None
+
+# Sunucu gerektirmeyen depo testleri; mongomock yoksa atlanır
+@unittest.skipIf(mongomock is None, "mongomock kurulu değil")
+class TestMongoRepository(unittest.TestCase):
+
+    def setUp(self):
+        self.db = mongomock.MongoClient().db
+        self.cart_repo = MongoCartRepository(self.db)
+        self.order_repo = MongoOrderRepository(self.db)
+        # mongomock replica set değildir; sipariş transaction'sız yazılır
+        self.order_repo._transactions = False
+        self.tea = {'_id': ObjectId(), 'name': 'Çay', 'price': 10.0}
+        self.vase = {'_id': ObjectId(), 'name': 'Vazo', 'price': 25.0}
+
+    def test_cart_summary_totals(self):
+        self.cart_repo.upsert_cart_line(1, self.tea, 3)
+        self.cart_repo.upsert_cart_line(1, self.vase)
+        self.cart_repo.upsert_cart_line(2, self.vase, 5)
+        summary = self.cart_repo.cart_summary(1)
+        self.assertEqual([line['name'] for line in summary['items']], ['Çay', 'Vazo'])
+        self.assertEqual((summary['total'], summary['item_count']), (55.0, 4))
+
+    def test_cart_summary_empty_cart(self):
+        self.assertEqual(self.cart_repo.cart_summary(1), {'items': [], 'total': 0, 'item_count': 0})
+
+    def test_place_order_keeps_lines_added_after_read(self):
+        self.cart_repo.upsert_cart_line(1, self.tea, 2)
+        lines = self.cart_repo.find_lines(1)
+        # Sepet okunduktan sonra başka sekmeden gelen eklemeler
+        self.cart_repo.upsert_cart_line(1, self.vase)
+        self.cart_repo.upsert_cart_line(1, self.tea)
+
+        self.order_repo.place_order({'_id': ObjectId(), 'user_id': 1}, 1, lines)
+
+        remaining = {line['name']: line['quantity'] for line in self.cart_repo.find_lines(1)}
+        self.assertEqual(remaining, {'Vazo': 1, 'Çay': 1})
+        self.assertEqual(self.db.orders.count_documents({'user_id': 1}), 1)
+
+    def test_place_order_removes_ordered_lines(self):
+        self.cart_repo.upsert_cart_line(1, self.tea, 2)
+        self.cart_repo.upsert_cart_line(2, self.tea)
+        self.order_repo.place_order({'_id': ObjectId(), 'user_id': 1}, 1, self.cart_repo.find_lines(1))
+        self.assertEqual(self.cart_repo.find_lines(1), [])
+        self.assertEqual(len(self.cart_repo.find_lines(2)), 1)
+
+    def test_outbox_reclaim_counts_as_attempt(self):
+        outbox = MongoMailOutboxRepository(self.db)
+        outbox.enqueue({'subject': 'Konu', 'recipients': ['a@example.com']})
+        first = outbox.claim(60)
+        self.assertEqual(first['attempts'], 1)
+        # Worker kira dolmadan çöktü: ileti yeniden kiralanır, eski kira işlem yapamaz
+        later = datetime.datetime.utcnow() + datetime.timedelta(seconds=61)
+        second = outbox.claim(60, now=later)
+        self.assertEqual(second['attempts'], 2)
+        self.assertFalse(outbox.mark_sent(first))
+        self.assertTrue(outbox.mark_sent(second))
+
+    def test_cart_digest_keeps_events_after_claim(self):
+        digests = MongoCartDigestRepository(self.db)
+        now = datetime.datetime(2024, 1, 1, 12, 0)
+        for action in ('add', 'add', 'remove'):
+            digests.record(1, 'a@example.com', {'action': action, 'product': 'Çay'}, 0, now=now)
+        digest = digests.claim_due(60, now=now)
+        self.assertEqual(digest['event_count'], 3)
+        # Kiralanan özet başka süreçte tekrar alınmaz
+        self.assertIsNone(digests.claim_due(60, now=now))
+        # Özet kuyruğa yazılırken gelen hareket yeni pencerede kalır
+        digests.record(1, 'a@example.com', {'action': 'update', 'product': 'Vazo'}, 0, now=now)
+        digests.finish(digest, 300, now=now)
+        remaining = self.db.cart_digests.find_one({'_id': 1})
+        self.assertEqual((remaining['event_count'], [e['product'] for e in remaining['events']]), (1, ['Vazo']))
+        self.assertEqual(remaining['due_at'], now + datetime.timedelta(seconds=300))
+
+        digests.finish(digests.claim_due(60), 300)
+        self.assertEqual(digests.pending(), 0)
+
+    def test_keyset_pages_through_missing_sort_fields(self):
+        # product_management ürünleri created_by/created_at olmadan ekler
+        for i in range(3):
+            self.db.products.insert_one({'name': f'eski {i}', 'price': float(i)})
+        for i in range(3):
+            self.db.products.insert_one({'name': f'yeni {i}', 'price': float(i), 'created_by': f't{i % 2}',
+                                         'created_at': datetime.datetime(2024, 1, 1 + i)})
+        for sort in ('supplier', 'newest'):
+            names, after = [], None
+            while True:
+                page = keyset_page(self.db.products, PRODUCT_SORTS[sort], after=after, limit=2)
+                names += [product['name'] for product in page['items']]
+                after = page['next']
+                if not after:
+                    break
+            self.assertEqual(sorted(names), sorted(p['name'] for p in self.db.products.find()), sort)
+            # Son sayfadan geriye doğru da aynı sırayla dönülmeli
+            before, back = page['prev'], []
+            while before:
+                previous = keyset_page(self.db.products, PRODUCT_SORTS[sort], before=before, limit=2)
+                back = [product['name'] for product in previous['items']] + back
+                before = previous['prev']
+            self.assertEqual(back, names[:len(back)], sort)
+
+    def test_cache_versions_shared_between_apps(self):
+        versions = MongoCacheVersionRepository(self.db)
+        self.assertEqual(versions.version('catalog'), (0, None))
+        versions.bump('catalog', now=datetime.datetime(2024, 1, 1))
+        # product_management aynı koleksiyonu kendi istemcisiyle artırır
+        MongoCacheVersionRepository(self.db).bump('catalog', now=datetime.datetime(2024, 1, 2))
+        self.assertEqual(versions.version('catalog'), (2, 1704153600.0))
+        self.assertEqual(versions.version('cart:1'), (0, None))
+
+if __name__ == '__main__':
+    unittest.main()
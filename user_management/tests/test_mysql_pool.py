@@ -0,0 +1,90 @@
+import unittest
+import threading
+from unittest.mock import MagicMock, patch
+from user_management.repositories.mysql_pool import MySQLConnectionPool, PoolExhaustedError
+
+class TestMySQLConnectionPool(unittest.TestCase):
+
+    def setUp(self):
+        # Her çağrıda yeni sahte bağlantı üreten fabrika
+        self.connect_mock = MagicMock(side_effect=lambda: MagicMock())
+        self.pool = MySQLConnectionPool(
+            host='localhost', user='test', password='test', db='user_management',
+            min_size=1, max_size=2, idle_timeout=60, checkout_timeout=0.1,
+            health_check_interval=0, connect=self.connect_mock
+        )
+
+    def test_connection_is_reused(self):
+        with self.pool.connection() as first:
+            pass
+        with self.pool.connection() as second:
+            pass
+        self.assertIs(first, second)
+        self.assertEqual(self.connect_mock.call_count, 1)
+        self.assertEqual(self.pool.stats()['checkouts'], 2)
+
+    def test_pool_is_bounded(self):
+        first = self.pool.acquire()
+        second = self.pool.acquire()
+        with self.assertRaises(PoolExhaustedError):
+            self.pool.acquire()
+        self.assertEqual(self.pool.stats()['timeouts'], 1)
+        self.pool.release(first)
+        self.pool.release(second)
+
+    def test_waiting_checkout_gets_released_connection(self):
+        self.pool.checkout_timeout = 2
+        first = self.pool.acquire()
+        second = self.pool.acquire()
+        threading.Timer(0.05, self.pool.release, args=(first,)).start()
+        third = self.pool.acquire()
+        self.assertIs(third, first)
+        self.pool.release(second)
+        self.pool.release(third)
+
+    def test_unhealthy_connection_is_replaced(self):
+        with self.pool.connection() as first:
+            pass
+        first.ping.side_effect = Exception("MySQL server has gone away")
+        with self.pool.connection() as second:
+            pass
+        self.assertIsNot(first, second)
+        stats = self.pool.stats()
+        self.assertEqual(stats['health_check_failures'], 1)
+        self.assertEqual(stats['size'], 1)
+
+    def test_recently_used_connection_is_not_pinged(self):
+        self.pool.health_check_interval = 30
+        with self.pool.connection() as first:
+            pass
+        with self.pool.connection() as second:
+            pass
+        self.assertIs(first, second)
+        first.ping.assert_not_called()
+
+    def test_idle_connection_expires(self):
+        with patch('user_management.repositories.mysql_pool.time.monotonic', return_value=1000):
+            with self.pool.connection() as first:
+                pass
+        with patch('user_management.repositories.mysql_pool.time.monotonic', return_value=2000):
+            with self.pool.connection() as second:
+                pass
+        self.assertIsNot(first, second)
+        first.close.assert_called_once()
+        self.assertEqual(self.pool.stats()['idle_evictions'], 1)
+
+    def test_error_rolls_back_and_returns_connection(self):
+        with self.assertRaises(ValueError):
+            with self.pool.connection() as conn:
+                raise ValueError("hata")
+        conn.rollback.assert_called_once()
+        stats = self.pool.stats()
+        self.assertEqual(stats['idle'], 1)
+        self.assertEqual(stats['in_use'], 0)
+
+    def test_invalid_sizes(self):
+        with self.assertRaises(ValueError):
+            MySQLConnectionPool('localhost', 'u', 'p', min_size=3, max_size=2)
+
+if __name__ == '__main__':
+    unittest.main()
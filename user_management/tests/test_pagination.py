@@ -0,0 +1,111 @@
+import unittest
+from unittest.mock import MagicMock
+import datetime
+from bson.objectid import ObjectId
+from pymongo.errors import OperationFailure
+from user_management.repositories.pagination import (decode_cursor, encode_cursor, keyset_filter,
+                                                     keyset_pipeline_page)
+from user_management.repositories.mongo_repository import MongoProductRepository
+
+class TestPagination(unittest.TestCase):
+
+    def test_cursor_round_trip(self):
+        values = [datetime.datetime(2024, 1, 1, 12, 0), ObjectId('507f1f77bcf86cd799439011')]
+        self.assertEqual(decode_cursor(encode_cursor(values)), values)
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(ValueError):
+            decode_cursor('bozuk-imlec')
+
+    def test_single_field_filter(self):
+        oid = ObjectId('507f1f77bcf86cd799439011')
+        self.assertEqual(keyset_filter([('_id', 1)], [oid]), {'_id': {'$gt': oid}})
+        self.assertEqual(keyset_filter([('_id', 1)], [oid], forward=False), {'_id': {'$lt': oid}})
+
+    def test_compound_filter(self):
+        oid = ObjectId('507f1f77bcf86cd799439011')
+        created = datetime.datetime(2024, 1, 1)
+        result = keyset_filter([('created_at', -1), ('_id', -1)], [created, oid])
+        self.assertEqual(result, {'$or': [
+            {'created_at': {'$lt': created}},
+            {'created_at': None},
+            {'created_at': created, '_id': {'$lt': oid}},
+        ]})
+
+    def test_null_sort_value_filter(self):
+        oid = ObjectId('507f1f77bcf86cd799439011')
+        sort = [('created_by', 1), ('price', 1), ('_id', 1)]
+        self.assertEqual(keyset_filter(sort, [None, None, oid]), {'$or': [
+            {'created_by': {'$ne': None}},
+            {'created_by': None, 'price': {'$ne': None}},
+            {'created_by': None, 'price': None, '_id': {'$gt': oid}},
+        ]})
+        # null'dan küçük değer yok: geri giderken yalnızca null grubu içinde ilerlenir
+        self.assertEqual(keyset_filter(sort, [None, 5.0, oid], forward=False), {'$or': [
+            {'created_by': None, 'price': {'$lt': 5.0}},
+            {'created_by': None, 'price': None},
+            {'created_by': None, 'price': 5.0, '_id': {'$lt': oid}},
+        ]})
+
+    def test_pipeline_page(self):
+        oid = ObjectId('507f1f77bcf86cd799439011')
+        collection = MagicMock()
+        collection.aggregate.return_value = [{'_id': oid, 'score': 2.0}, {'_id': ObjectId(), 'score': 1.0}]
+        sort = [('score', -1), ('_id', 1)]
+        cursor = encode_cursor([3.0, oid])
+        page = keyset_pipeline_page(collection, [{'$match': {'$text': {'$search': 'x'}}}], sort,
+                                    after=cursor, limit=1)
+        stages = collection.aggregate.call_args[0][0]
+        self.assertEqual(stages[1], {'$match': keyset_filter(sort, [3.0, oid])})
+        self.assertEqual(stages[2:], [{'$sort': {'score': -1, '_id': 1}}, {'$limit': 2}])
+        self.assertEqual(len(page['items']), 1)
+        self.assertEqual(decode_cursor(page['next']), [2.0, oid])
+        self.assertIsNotNone(page['prev'])
+
+    def test_price_filter_uses_sort_index(self):
+        db = MagicMock()
+        collection = db.__getitem__.return_value
+        cursor = collection.find.return_value.sort.return_value.limit.return_value
+        cursor.hint.return_value = []
+        collection.index_information.return_value = {'_id_': {}, 'products_price_id': {}}
+        MongoProductRepository(db).find_page(sort='price_desc', min_price=100.0, max_price=600.0)
+        self.assertEqual(collection.find.call_args[0][0], {'price': {'$gte': 100.0, '$lte': 600.0}})
+        collection.find.return_value.sort.assert_called_with([('price', -1), ('_id', -1)])
+        cursor.hint.assert_called_once_with('products_price_id')
+
+    def test_price_filter_without_migrated_index(self):
+        # Migration çalışmamış veritabanı: olmayan indekse hint verilmez
+        db = MagicMock()
+        collection = db.__getitem__.return_value
+        cursor = collection.find.return_value.sort.return_value.limit.return_value
+        cursor.__iter__.return_value = iter([])
+        collection.index_information.return_value = {'_id_': {}, 'products_price_id': {}}
+        repository = MongoProductRepository(db)
+        repository.find_page(sort='newest', min_price=100.0)
+        cursor.hint.assert_not_called()
+        repository.iter_listing(sort='newest', min_price=100.0)
+        collection.find.return_value.sort.return_value.batch_size.return_value.hint.assert_not_called()
+
+    def test_dropped_hint_index_retried_without_hint(self):
+        db = MagicMock()
+        collection = db.__getitem__.return_value
+        cursor = collection.find.return_value.sort.return_value.limit.return_value
+        cursor.hint.return_value.__iter__.side_effect = OperationFailure(
+            "hint provided does not correspond to an existing index")
+        cursor.__iter__.return_value = iter([])
+        collection.index_information.return_value = {'products_created_at_id_price': {}}
+        page = MongoProductRepository(db).find_page(sort='newest', min_price=100.0)
+        self.assertEqual(page['items'], [])
+        self.assertEqual(collection.find.call_count, 2)
+
+    def test_iter_listing_is_lazy_and_batched(self):
+        db = MagicMock()
+        collection = db.__getitem__.return_value
+        cursor = collection.find.return_value.sort.return_value.batch_size.return_value
+        result = MongoProductRepository(db).iter_listing(sort='newest', batch_size=250)
+        self.assertIs(result, cursor)
+        collection.find.return_value.sort.return_value.batch_size.assert_called_once_with(250)
+        cursor.hint.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import csv
+import datetime
+import io
+import json
+import unittest
+from unittest.mock import MagicMock
+from bson.objectid import ObjectId
+from user_management.repositories.mongo_repository import MongoProductRepository
+from user_management.services.product_export import EXPORT_FIELDS, export_chunks, parse_fields
+
+PRODUCTS = [
+    {'_id': ObjectId('507f1f77bcf86cd799439011'), 'name': 'Çay, siyah', 'price': 12.5,
+     'created_at': datetime.datetime(2024, 1, 1, 12, 0)},
+    {'_id': ObjectId('507f1f77bcf86cd799439012'), 'name': 'Vazo', 'price': 3.0},
+]
+
+class TestProductExport(unittest.TestCase):
+
+    def test_parse_fields(self):
+        self.assertEqual(parse_fields(None), EXPORT_FIELDS)
+        self.assertEqual(parse_fields('price, name,price'), ('_id', 'price', 'name'))
+        with self.assertRaises(ValueError):
+            parse_fields('name,password')
+
+    def test_ndjson(self):
+        body = ''.join(export_chunks(iter(PRODUCTS), ('_id', 'name', 'created_at'), 'ndjson'))
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(rows[0], {'_id': '507f1f77bcf86cd799439011', 'name': 'Çay, siyah',
+                                   'created_at': '2024-01-01T12:00:00'})
+        self.assertIsNone(rows[1]['created_at'])
+
+    def test_csv(self):
+        body = ''.join(export_chunks(iter(PRODUCTS), ('_id', 'name', 'price'), 'csv'))
+        rows = list(csv.reader(io.StringIO(body)))
+        self.assertEqual(rows[0], ['_id', 'name', 'price'])
+        self.assertEqual(rows[1], ['507f1f77bcf86cd799439011', 'Çay, siyah', '12.5'])
+        self.assertEqual(len(rows), 3)
+
+    def test_csv_resume_without_header(self):
+        body = ''.join(export_chunks(iter(PRODUCTS[1:]), ('_id', 'name'), 'csv', header=False))
+        self.assertEqual(list(csv.reader(io.StringIO(body))), [['507f1f77bcf86cd799439012', 'Vazo']])
+
+    def test_resume_after_id(self):
+        db = MagicMock()
+        collection = db.__getitem__.return_value
+        repository = MongoProductRepository(db)
+        repository.iter_export(('_id', 'name'), created_by='tedarikci', after_id='507f1f77bcf86cd799439011')
+        query, projection = collection.find.call_args[0]
+        self.assertEqual(query, {'created_by': 'tedarikci', '_id': {'$gt': ObjectId('507f1f77bcf86cd799439011')}})
+        self.assertEqual(projection, {'_id': 1, 'name': 1})
+        collection.find.return_value.sort.return_value.hint.assert_called_once_with('products_created_by_id')
+        with self.assertRaises(ValueError):
+            repository.iter_export(('_id',), after_id='bozuk')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import io
+import unittest
+from unittest.mock import MagicMock
+from user_management.services.product_import import iter_csv, iter_ndjson, validate_product
+from user_management.services.product_services import ProductService
+
+OWNER = {'id': 7, 'username': 'tedarikci'}
+
+class TestProductImportParsing(unittest.TestCase):
+
+    def test_ndjson_rows_and_errors(self):
+        body = b'{"name": "A", "price": 10, "description": "x"}\n\n{bozuk\n[1, 2]\n'
+        rows = list(iter_ndjson(io.BytesIO(body)))
+        self.assertEqual(rows[0], (1, {'name': 'A', 'price': 10, 'description': 'x'}, None))
+        self.assertEqual([(number, error is not None) for number, _, error in rows[1:]], [(3, True), (4, True)])
+
+    def test_ndjson_long_line_skipped(self):
+        body = b'{"name": "' + b'a' * 100 + b'"}\n{"name": "B"}\n'
+        rows = list(iter_ndjson(io.BytesIO(body), max_line_bytes=50))
+        self.assertIsNotNone(rows[0][2])
+        self.assertEqual(rows[1], (2, {'name': 'B'}, None))
+
+    def test_csv_multiline_field(self):
+        body = '﻿name,price,description\n"Lamba",12.5,"iki\nsatır"\nVazo,3,düz\n'.encode('utf-8')
+        rows = list(iter_csv(io.BytesIO(body)))
+        self.assertEqual(rows[0][1], {'name': 'Lamba', 'price': '12.5', 'description': 'iki\nsatır'})
+        self.assertEqual(rows[1][0], 4)
+        self.assertEqual(rows[1][1]['name'], 'Vazo')
+
+    def test_validate_product(self):
+        self.assertEqual(validate_product({'name': ' A ', 'price': '5', 'description': ''}), ('A', 5.0, ''))
+        for record in ({'price': 1, 'description': ''}, {'name': 'A', 'price': 'abc', 'description': ''},
+                       {'name': 'A', 'price': -1, 'description': ''}, {'name': 'A', 'price': 1}):
+            with self.assertRaises(ValueError):
+                validate_product(record)
+
+class TestImportProducts(unittest.TestCase):
+
+    def setUp(self):
+        self.product_repo = MagicMock()
+        self.product_repo.insert_many.return_value = []
+        self.cache = MagicMock()
+        self.service = ProductService(self.product_repo, catalog_cache=self.cache)
+
+    def test_batches_and_invalidates_once(self):
+        rows = ((i, {'name': f'Ürün {i}', 'price': i, 'description': ''}, None) for i in range(1, 6))
+        report = self.service.import_products(rows, OWNER, batch_size=2)
+        self.assertEqual(report, {'inserted': 5, 'failed': 0, 'errors': []})
+        self.assertEqual(self.product_repo.insert_many.call_count, 3)
+        self.cache.invalidate.assert_called_once_with('catalog')
+
+    def test_row_errors_reported(self):
+        self.product_repo.insert_many.return_value = [(1, 'yazılamadı')]
+        rows = [
+            (1, {'name': 'A', 'price': 1, 'description': ''}, None),
+            (2, {'name': '', 'price': 1, 'description': ''}, None),
+            (3, None, 'Geçersiz JSON'),
+            (4, {'name': 'B', 'price': 2, 'description': ''}, None),
+        ]
+        report = self.service.import_products(rows, OWNER, max_errors=2)
+        self.assertEqual(report['inserted'], 1)
+        self.assertEqual(report['failed'], 3)
+        self.assertEqual([error['row'] for error in report['errors']], [2, 3])
+
+    def test_nothing_inserted_keeps_cache(self):
+        report = self.service.import_products([(1, None, 'Geçersiz JSON')], OWNER)
+        self.assertEqual(report['inserted'], 0)
+        self.cache.invalidate.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
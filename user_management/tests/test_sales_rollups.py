@@ -0,0 +1,46 @@
+import unittest
+import datetime
+from unittest.mock import MagicMock
+from user_management.repositories.mongo_repository import (
+    MongoSalesRollupRepository, rollup_increments, ROLLUP_ALL_TIME
+)
+
+class TestSalesRollups(unittest.TestCase):
+
+    def setUp(self):
+        self.order = {
+            'created_at': datetime.datetime(2024, 3, 5, 10, 0),
+            'lines': [
+                {'product_id': 'p1', 'name': 'Ürün 1', 'quantity': 2, 'line_total': 20.0,
+                 'supplier_id': 1, 'supplier': 'supplier1'},
+                {'product_id': 'p2', 'name': 'Ürün 2', 'quantity': 1, 'line_total': 5.0,
+                 'supplier_id': 1, 'supplier': 'supplier1'},
+                {'product_id': 'p3', 'name': 'Ürün 3', 'quantity': 1, 'line_total': 7.0,
+                 'supplier_id': None, 'supplier': None},
+            ],
+            'total': 32.0,
+            'item_count': 4,
+        }
+
+    def test_increments(self):
+        increments = rollup_increments(self.order)
+        # 3 ürün + 1 tedarikçi + mağaza, her biri günlük ve tüm zamanlar
+        self.assertEqual(len(increments), 10)
+        supplier = increments[('supplier', 1, '2024-03-05')]
+        self.assertEqual(supplier['revenue'], 25.0)
+        self.assertEqual(supplier['units'], 3)
+        self.assertEqual(supplier['orders'], 1)
+        store = increments[('store', None, ROLLUP_ALL_TIME)]
+        self.assertEqual((store['revenue'], store['units'], store['orders']), (32.0, 4, 1))
+
+    def test_record_order_single_bulk_write(self):
+        db = MagicMock()
+        repo = MongoSalesRollupRepository(db)
+        repo.record_order(self.order)
+        repo.collection.bulk_write.assert_called_once()
+        operations = repo.collection.bulk_write.call_args[0][0]
+        self.assertEqual(len(operations), 10)
+        self.assertFalse(repo.collection.bulk_write.call_args[1]['ordered'])
+
+if __name__ == '__main__':
+    unittest.main()
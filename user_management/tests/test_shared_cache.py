@@ -0,0 +1,126 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+from user_management.repositories.shared_cache import SharedCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class TestSharedCache(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'cache.sqlite3')
+        self.clock = FakeClock()
+        self.cache = SharedCache(self.path, ttl=10, stale_ttl=60, clock=self.clock)
+        self.calls = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def loader(self):
+        self.calls += 1
+        return {'value': self.calls}
+
+    def test_hit_after_load(self):
+        self.assertEqual(self.cache.get_or_load('catalog', 'k', self.loader), {'value': 1})
+        self.assertEqual(self.cache.get_or_load('catalog', 'k', self.loader), {'value': 1})
+        self.assertEqual(self.calls, 1)
+
+    def test_invalidate(self):
+        self.cache.get_or_load('catalog', 'k', self.loader)
+        self.cache.invalidate('catalog')
+        self.assertEqual(self.cache.get_or_load('catalog', 'k', self.loader), {'value': 2})
+        self.assertEqual(self.cache.version('catalog')[0], 1)
+
+    def test_bump_keeps_entries_of_other_namespaces(self):
+        self.cache.get_or_load('catalog', 'k', self.loader)
+        self.cache.bump('cart:1')
+        self.assertEqual(self.cache.version('cart:1'), (1, 1000.0))
+        self.assertEqual(self.cache.get_or_load('catalog', 'k', self.loader), {'value': 1})
+
+    def test_shared_between_instances(self):
+        self.cache.get_or_load('catalog', 'k', self.loader)
+        other = SharedCache(self.path, ttl=10, stale_ttl=60, clock=self.clock)
+        self.assertEqual(other.get_or_load('catalog', 'k', self.loader), {'value': 1})
+        other.invalidate('catalog')
+        self.assertEqual(self.cache.get_or_load('catalog', 'k', self.loader), {'value': 2})
+
+    def test_versions_from_shared_store(self):
+        versions = MagicMock()
+        versions.version.return_value = (0, None)
+        cache = SharedCache(self.path, ttl=10, stale_ttl=60, clock=self.clock, versions=versions)
+        cache.get_or_load('catalog', 'k', self.loader)
+        # Sayaç başka bir makinede artırıldı: bu makinedeki girdi de geçersiz
+        versions.version.return_value = (1, 1000.0)
+        self.assertEqual(cache.get_or_load('catalog', 'k', self.loader), {'value': 2})
+        cache.invalidate('catalog')
+        versions.bump.assert_called_once_with('catalog')
+        self.assertEqual(self.cache.version('catalog'), (0, None))
+
+    def test_stale_while_revalidate(self):
+        self.cache.get_or_load('catalog', 'k', self.loader)
+        self.clock.now += 20
+        # Bayat değer hemen döner, yenileme arka planda yapılır
+        self.assertEqual(self.cache.get_or_load('catalog', 'k', self.loader), {'value': 1})
+        for _ in range(100):
+            if self.cache.stats()['refreshes']:
+                break
+            time.sleep(0.01)
+        self.assertEqual(self.cache.get_or_load('catalog', 'k', self.loader), {'value': 2})
+
+    def test_cold_key_coalesced(self):
+        def slow_loader():
+            time.sleep(0.1)
+            return self.loader()
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.cache.get_or_load('catalog', 'k', slow_loader)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, [{'value': 1}] * 8)
+
+    def test_loader_error_not_cached(self):
+        with self.assertRaises(ValueError):
+            self.cache.get_or_load('catalog', 'k', lambda: (_ for _ in ()).throw(ValueError("hata")))
+        self.assertEqual(self.cache.get_or_load('catalog', 'k', self.loader), {'value': 1})
+
+    def test_none_not_cached(self):
+        self.assertIsNone(self.cache.get_or_load('catalog', 'product:yok', lambda: None))
+        self.assertEqual(self.cache.stats()['size'], 0)
+        self.assertEqual(self.cache.get_or_load('catalog', 'product:yok', self.loader), {'value': 1})
+
+    def test_expired_entries_purged_on_store(self):
+        for i in range(5):
+            self.cache.get_or_load('catalog', f'k{i}', self.loader)
+        self.clock.now += 100
+        # Bayatlık süresi dolan girdiler sonraki yazmada silinir
+        self.cache.get_or_load('catalog', 'yeni', self.loader)
+        self.assertEqual(self.cache.stats()['size'], 1)
+
+    def test_max_entries_evicts_oldest(self):
+        cache = SharedCache(self.path, ttl=10, stale_ttl=60, clock=self.clock, max_entries=3, purge_interval=0)
+        for i in range(5):
+            self.clock.now += 1
+            cache.get_or_load('catalog', f'k{i}', self.loader)
+        stats = cache.stats()
+        self.assertEqual((stats['size'], stats['evictions']), (3, 2))
+        # En yeni girdiler kalır
+        self.assertEqual(cache.get_or_load('catalog', 'k4', self.loader), {'value': 5})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,18 +1,23 @@
 import unittest
 from unittest.mock import MagicMock, patch
-from user_management.repositories.mysql_repository import MySQLUserRepository
+import MySQLdb
+from user_management.repositories.mysql_repository import MySQLUserRepository, DuplicateEntryError
+from user_management.repositories.cache import LRUCache
+
+USER_ROW = (1, 'testuser', 'hashedpw', 'test@example.com', 'customer')
+PROFILE_ROW = (1, 'testuser', 'test@example.com', 'customer')
 
 class TestMySQLUserRepository(unittest.TestCase):
     
     def setUp(self):
-        # Sahte MySQL bağlantısı oluştur
-        self.mysql_mock = MagicMock()
+        # Sahte MySQL bağlantı havuzu oluştur
+        self.pool_mock = MagicMock()
         self.connection_mock = MagicMock()
         self.cursor_mock = MagicMock()
-        self.mysql_mock.connection = self.connection_mock
+        self.pool_mock.connection.return_value.__enter__.return_value = self.connection_mock
         self.connection_mock.cursor.return_value = self.cursor_mock
         
-        self.repo = MySQLUserRepository(self.mysql_mock)
+        self.repo = MySQLUserRepository(self.pool_mock)
     
     def test_save_success(self):
         user_data = {
@@ -30,11 +35,21 @@ class TestMySQLUserRepository(unittest.TestCase):
         )
     
     def test_find_by_username_found(self):
-        self.cursor_mock.fetchone.return_value = (1, 'testuser', 'hashedpw', 'test@example.com', 'normal')
+        self.cursor_mock.fetchone.return_value = (1, 'testuser', 'test@example.com', 'normal')
         
         result = self.repo.find_by_username('testuser')
         self.assertIsNotNone(result)
         self.assertEqual(result['username'], 'testuser')
+        self.assertNotIn('password', result)
+        self.assertNotIn('password', self.cursor_mock.execute.call_args[0][0])
+
+    def test_find_by_username_fresh_reads_hash(self):
+        self.cursor_mock.fetchone.return_value = USER_ROW
+        result = self.repo.find_by_username('testuser', fresh=True)
+        self.assertEqual(result['password'], 'hashedpw')
+        self.cursor_mock.execute.assert_called_once_with(
+            "SELECT id, username, password, email, user_type FROM users WHERE username = %s", ('testuser',)
+        )
     
     def test_find_by_username_not_found(self):
         self.cursor_mock.fetchone.return_value = None
@@ -44,16 +59,15 @@ class TestMySQLUserRepository(unittest.TestCase):
     def test_update_password_success(self):
         result = self.repo.update_password(1, 'newhashedpw')
         self.assertTrue(result)
-        self.cursor_mock.execute.assert_any_call("USE user_management")
-        self.cursor_mock.execute.assert_any_call(
+        self.cursor_mock.execute.assert_called_once_with(
             "UPDATE users SET password = %s WHERE id = %s",
             ('newhashedpw', 1)
         )
     
     def test_find_by_id_found(self):
-        self.cursor_mock.fetchone.return_value = (1, 'user', 'pass', 'email', 'normal')
+        self.cursor_mock.fetchone.return_value = (1, 'user', 'email', 'normal')
         result = self.repo.find_by_id(1)
-        self.assertEqual(result['id'], 1)
+        self.assertEqual((result['id'], result['email']), (1, 'email'))
     
     def test_find_by_id_not_found(self):
         self.cursor_mock.fetchone.return_value = None
@@ -67,5 +81,116 @@ class TestMySQLUserRepository(unittest.TestCase):
         expected_sql = "UPDATE users SET email = %s, user_type = %s WHERE id = %s"
         self.cursor_mock.execute.assert_called_with(expected_sql, ['new@example.com', 'premium', 1])
 
+    def test_update_user_duplicate_email(self):
+        self.cursor_mock.execute.side_effect = MySQLdb.IntegrityError(
+            1062, "Duplicate entry 'taken@example.com' for key 'users.uq_users_email'"
+        )
+        with self.assertRaises(DuplicateEntryError) as ctx:
+            self.repo.update_user(1, {'email': 'taken@example.com'})
+        self.assertEqual(ctx.exception.field, 'email')
+
+    def test_find_by_ids_single_query(self):
+        self.cursor_mock.fetchall.return_value = [
+            (1, 'user1', 'u1@example.com', 'supplier'),
+            (2, 'user2', 'u2@example.com', 'supplier'),
+        ]
+        result = self.repo.find_by_ids([1, 2, 2])
+        self.assertEqual(set(result), {1, 2})
+        self.assertNotIn('password', result[1])
+        self.cursor_mock.execute.assert_called_once_with(
+            "SELECT id, username, email, user_type FROM users WHERE id IN (%s, %s)",
+            [1, 2]
+        )
+
+    def test_find_by_ids_is_chunked(self):
+        self.cursor_mock.fetchall.return_value = []
+        self.repo.find_by_ids(range(5), chunk_size=2)
+        self.assertEqual(self.cursor_mock.execute.call_count, 3)
+
+    def test_update_user_rejects_unknown_column(self):
+        result = self.repo.update_user(1, {'id': 5})
+        self.assertFalse(result)
+        self.cursor_mock.execute.assert_not_called()
+
+    def test_lookup_is_single_round_trip(self):
+        self.cursor_mock.fetchone.return_value = (1, 'user', 'email', 'normal')
+        self.repo.find_by_id(1)
+        self.repo.find_by_username('user')
+        self.repo.find_by_email('email')
+        # "USE user_management" artık her sorgudan önce çalıştırılmıyor
+        self.assertEqual(self.cursor_mock.execute.call_count, 3)
+
+class TestMySQLUserRepositoryCache(unittest.TestCase):
+
+    def setUp(self):
+        self.pool_mock = MagicMock()
+        self.connection_mock = MagicMock()
+        self.cursor_mock = MagicMock()
+        self.pool_mock.connection.return_value.__enter__.return_value = self.connection_mock
+        self.connection_mock.cursor.return_value = self.cursor_mock
+        # Hash'li sorguya hash'li satır, profil sorgusuna hash'siz satır döner
+        self.cursor_mock.fetchone.side_effect = lambda: (
+            USER_ROW if 'password' in self.cursor_mock.execute.call_args[0][0] else PROFILE_ROW)
+
+        self.cache = LRUCache(max_size=16, ttl=60)
+        self.repo = MySQLUserRepository(self.pool_mock, self.cache)
+
+    def test_lookup_is_served_from_cache(self):
+        self.repo.find_by_id(1)
+        result = self.repo.find_by_id(1)
+        self.assertEqual(result['email'], 'test@example.com')
+        self.assertEqual(self.cursor_mock.execute.call_count, 1)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+
+    def test_lookup_by_id_populates_username_and_email(self):
+        self.repo.find_by_id(1)
+        self.repo.find_by_username('testuser')
+        self.repo.find_by_email('test@example.com')
+        self.assertEqual(self.cursor_mock.execute.call_count, 1)
+
+    def test_password_hash_is_not_cached(self):
+        self.repo.find_by_id(1)
+        cached = self.repo.find_by_id(1)
+        self.assertNotIn('password', cached)
+        fresh = self.repo.find_by_id(1, fresh=True)
+        self.assertEqual(fresh['password'], 'hashedpw')
+        self.assertEqual(self.cursor_mock.execute.call_count, 2)
+
+    def test_miss_and_hit_return_same_profile(self):
+        # Önbellek ıskası da isabeti de şifre hash'i döndürmez
+        missed = self.repo.find_by_username('testuser')
+        hit = self.repo.find_by_username('testuser')
+        self.assertEqual(missed, hit)
+        self.assertNotIn('password', missed)
+        # Kimlik doğrulama okuması hash'i alır ama önbelleğe hash yazılmaz
+        self.assertEqual(self.repo.find_by_email('test@example.com', fresh=True)['password'], 'hashedpw')
+        self.assertNotIn('password', self.repo.find_by_email('test@example.com'))
+
+    def test_update_invalidates_cache(self):
+        self.repo.find_by_username('testuser')
+        self.repo.update_user(1, {'username': 'renamed'})
+        self.repo.find_by_username('testuser')
+        # find_by_username -> UPDATE -> find_by_username (önbellek temizlendi)
+        self.assertEqual(self.cursor_mock.execute.call_count, 3)
+
+    def test_find_by_ids_uses_cache(self):
+        self.repo.find_by_id(1)
+        result = self.repo.find_by_ids([1])
+        self.assertEqual(result[1]['username'], 'testuser')
+        self.assertEqual(self.cursor_mock.execute.call_count, 1)
+
+    def test_find_by_ids_same_shape_cached_or_fetched(self):
+        self.cursor_mock.fetchall.return_value = [PROFILE_ROW]
+        fetched = self.repo.find_by_ids([1])[1]
+        cached = self.repo.find_by_ids([1])[1]
+        self.assertEqual(fetched, cached)
+        self.assertNotIn('password', fetched)
+        self.assertEqual(self.cursor_mock.execute.call_count, 1)
+
+    def test_password_update_invalidates_cache(self):
+        self.repo.find_by_id(1)
+        self.repo.update_password(1, 'newhashedpw')
+        self.assertEqual(len(self.cache), 0)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,73 @@
+# Kataloğu NDJSON ya da CSV olarak dosyaya/standart çıktıya aktarır (/api/products/export ile aynı akış).
+# Ürünler _id sırasıyla batch'ler hâlinde okunur; yarıda kalırsa ekrana yazılan son _id
+# --after ile verilerek kaldığı yerden devam edilir.
+# user_management dizininden:
+#   python -m tools.export_products --format csv --fields name,price --output urunler.csv
+#   python -m tools.export_products --supplier tedarikci1 --after 665f1c... >> urunler.ndjson
+#   python -m tools.export_products --format csv --after 665f1c... --output urunler.csv
+import argparse
+import sys
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from config import Config
+from repositories.mongo_connection import MongoConnection
+from repositories.mongo_repository import MongoProductRepository
+from services.product_export import EXPORT_CONTENT_TYPES, export_lines, parse_fields
+from services.product_services import ProductService
+
+
+def track_last_id(documents, state):
+    # Bir sonraki doküman istendiğinde önceki satır yazılmış olur; last_id yazılan son _id'dir
+    for document in documents:
+        yield document
+        state['last_id'] = document['_id']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ürün kataloğunu NDJSON ya da CSV olarak dışa aktar")
+    parser.add_argument('--format', choices=tuple(EXPORT_CONTENT_TYPES), default='ndjson')
+    parser.add_argument('--fields', help="virgülle ayrılmış alanlar; _id her zaman yazılır")
+    parser.add_argument('--supplier', help="yalnızca bu tedarikçinin ürünleri")
+    parser.add_argument('--after', help="bu _id'den sonraki ürünlerden devam et")
+    parser.add_argument('--batch-size', type=int, default=Config.EXPORT_BATCH_SIZE)
+    parser.add_argument('--output', help="dosya yolu; verilmezse standart çıktı")
+    args = parser.parse_args(argv)
+
+    try:
+        fields = parse_fields(args.fields)
+    except ValueError as e:
+        parser.error(str(e))
+
+    mongo = MongoConnection.from_config(Config, max_pool_size=1)
+    product_service = ProductService(MongoProductRepository(mongo))
+    # --after ile devam ederken dosyanın sonuna eklenir ve CSV başlığı tekrar yazılmaz
+    mode = 'a' if args.after else 'w'
+    output = open(args.output, mode, encoding='utf-8', newline='') if args.output else sys.stdout
+    state = {'last_id': None}
+    try:
+        products = product_service.export_products(fields, args.batch_size, supplier=args.supplier,
+                                                   after_id=args.after)
+        for line in export_lines(track_last_id(products, state), fields, args.format, header=not args.after):
+            output.write(line)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    except Exception as e:
+        print(f"Dışa aktarım yarıda kaldı: {str(e)}", file=sys.stderr)
+        if state['last_id'] is not None:
+            print(f"Devam etmek için: --after {state['last_id']}", file=sys.stderr)
+        return 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        mongo.close()
+
+    print(f"Dışa aktarım tamamlandı (son _id: {state['last_id']})", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,82 @@
+# Dosyadan toplu ürün yükleme (/api/products/bulk ile aynı akış).
+# Dosya satır satır okunur; ürünler sırasız insert_many batch'leriyle yazılır ve çalışan
+# worker'ların katalog önbelleği yükleme sonunda geçersiz kılınır.
+# user_management dizininden:
+#   python -m tools.import_products --supplier tedarikci1 urunler.ndjson
+#   python -m tools.import_products --supplier tedarikci1 --format csv - < urunler.csv
+import argparse
+import sys
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from config import Config
+from repositories.mongo_connection import MongoConnection
+from repositories.mongo_repository import MongoProductRepository
+from repositories.mysql_pool import MySQLConnectionPool
+from repositories.mysql_repository import MySQLUserRepository
+from repositories.shared_cache import SharedCache
+from services.product_import import iter_rows
+from services.product_services import ProductService
+
+EXTENSION_FORMATS = {'.ndjson': 'ndjson', '.jsonl': 'ndjson', '.csv': 'csv'}
+
+
+def detect_format(path):
+    for extension, file_format in EXTENSION_FORMATS.items():
+        if path.lower().endswith(extension):
+            return file_format
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NDJSON ya da CSV dosyasından toplu ürün yükleme")
+    parser.add_argument('path', help="dosya yolu; '-' standart girdi")
+    parser.add_argument('--supplier', required=True, help="ürünlerin ekleneceği tedarikçinin kullanıcı adı")
+    parser.add_argument('--format', choices=('ndjson', 'csv'),
+                        help="verilmezse dosya uzantısından (.ndjson, .jsonl, .csv) anlaşılır")
+    parser.add_argument('--batch-size', type=int, default=Config.BULK_IMPORT_BATCH_SIZE)
+    parser.add_argument('--max-errors', type=int, default=Config.BULK_IMPORT_MAX_ERRORS,
+                        help="ekrana yazılan en fazla satır hatası")
+    args = parser.parse_args(argv)
+
+    file_format = args.format or detect_format(args.path)
+    if not file_format:
+        parser.error("biçim anlaşılamadı, --format verin")
+
+    mysql_pool = MySQLConnectionPool.from_config(Config)
+    try:
+        supplier = MySQLUserRepository(mysql_pool).find_by_username(args.supplier)
+    finally:
+        mysql_pool.close()
+    if not supplier or supplier.get('user_type') != 'supplier':
+        print(f"Tedarikçi bulunamadı: {args.supplier}")
+        return 1
+
+    mongo = MongoConnection.from_config(Config, max_pool_size=1)
+    catalog_cache = SharedCache(Config.CATALOG_CACHE_PATH, ttl=Config.CATALOG_CACHE_TTL,
+                                stale_ttl=Config.CATALOG_CACHE_STALE_TTL)
+    product_service = ProductService(MongoProductRepository(mongo), catalog_cache=catalog_cache)
+    stream = sys.stdin.buffer if args.path == '-' else open(args.path, 'rb')
+    try:
+        report = product_service.import_products(
+            iter_rows(stream, file_format, Config.BULK_IMPORT_MAX_LINE_BYTES),
+            {'id': supplier['id'], 'username': supplier['username']},
+            batch_size=args.batch_size, max_errors=args.max_errors
+        )
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+        mongo.close()
+
+    for error in report['errors']:
+        print(f"satır {error['row']}: {error['error']}")
+    if report['failed'] > len(report['errors']):
+        print(f"... ve {report['failed'] - len(report['errors'])} hata daha")
+    print(f"{report['inserted']} ürün eklendi, {report['failed']} satır hatalı.")
+    return 1 if report['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())